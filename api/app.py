@@ -1,4 +1,7 @@
 # api/app.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from typing import List, Literal
 
 from dotenv import load_dotenv
@@ -6,21 +9,99 @@ load_dotenv()
 import csv
 from io import StringIO
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 from .models import QueryRequest, QueryResponse, SchemaRequest, SchemaResponse
-from .dependencies import get_config, get_user_context
-from .auth import get_current_user
-from core.engine import run_one_shot_query, get_schema_snapshot
-from core.models import UserContext
-from core.logging import get_user_history
+from .config import WATCH_INTERVAL_S, ConfigReloadError, get_config_manager
+from .dependencies import get_config, get_user_context, get_profile_requested
+from .auth import API_AUDIENCE, get_current_user, get_verifier, require_admin
+from .warmup import ENABLED as WARMUP_ENABLED, Warmup, get_warmup, set_warmup
+from core.engine import run_one_shot_query_async, run_profiled_query, get_schema_snapshot
+from core.models import QueryResult, UserContext
+from core.profiler import should_profile
+from core.logging import get_user_history, configure_logging
 from core.history_db import init_history_db
 
-app = FastAPI(title="SQL-Speak Enterprise API", version="0.1.0")
+logger = logging.getLogger(__name__)
 
+
+# How often a request waiting for its result checks whether the client left
+DISCONNECT_POLL_S = 0.25
+
+
+async def answer(request: Request, profile_requested: bool, **kwargs) -> QueryResult:
+    """
+    Result of one question for /query, /chat and /download. The request
+    joins identical ones in flight and stops waiting (499) once its client
+    disconnects; the shared work goes on for the others. Profiled requests
+    run on their own in the threadpool.
+    """
+    if should_profile(profile_requested):
+        return await run_in_threadpool(run_profiled_query, profile_requested=True, **kwargs)
+
+    task = asyncio.ensure_future(run_one_shot_query_async(**kwargs))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.wait({task})  # lets it log its "cancelled" entry
+                raise HTTPException(status_code=499, detail="Client closed the request")
+    finally:
+        task.cancel()  # no-op once done
+
+
+async def watch_config(interval_s: float) -> None:
+    """Reload the config whenever its file's mtime changes."""
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await run_in_threadpool(get_config_manager().reload_if_changed)
+        except ConfigReloadError as e:
+            logger.error("config reload failed, keeping the running config error=%s", e)
+
+
+async def warm_up(app: FastAPI, warmup: Warmup) -> None:
+    try:
+        # Honour dependency overrides (benchmarks) for the data sources to warm
+        config = app.dependency_overrides.get(get_config, get_config)()
+        data_sources = dict(config.data_sources)
+    except Exception as e:
+        logger.error("warm-up could not load the config error=%s", e)
+        data_sources = {}
+    verifier = get_verifier() if API_AUDIENCE else None
+    await run_in_threadpool(warmup.run, data_sources, verifier)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = asyncio.create_task(watch_config(WATCH_INTERVAL_S)) if WATCH_INTERVAL_S > 0 else None
+    warmup = Warmup()
+    set_warmup(warmup)
+    warming = None
+    if WARMUP_ENABLED:
+        # In the background: the server accepts connections (and /ready says 503) meanwhile
+        warming = asyncio.create_task(warm_up(app, warmup))
+    else:
+        warmup.skip()
+    try:
+        yield
+    finally:
+        for task in (watcher, warming):
+            if task is not None:
+                task.cancel()
+        get_config_manager().close()
+
+
+app = FastAPI(title="SQL-Speak Enterprise API", version="0.1.0", lifespan=lifespan)
+
+configure_logging()
 init_history_db()
 
 # CORS for Next.js
@@ -41,11 +122,30 @@ def read_me(user: UserContext = Depends(get_current_user)):
         "roles": user.roles,
     }
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the startup warm-up is over (see api.warmup)."""
+    warmup = get_warmup()
+    if warmup is None:
+        return JSONResponse(status_code=503, content={"ready": False, "detail": "warm-up not started"})
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.as_dict())
+
+@app.post("/admin/reload-config")
+def reload_config(user: UserContext = Depends(require_admin)):
+    """Apply config/local.toml now; returns the data sources added, changed and removed."""
+    try:
+        report = get_config_manager().reload()
+    except ConfigReloadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return report.as_dict()
+
 @app.post("/query", response_model=QueryResponse)
-def query(
+async def query(
     req: QueryRequest,
+    request: Request,
     config = Depends(get_config),
     user: UserContext = Depends(get_user_context),
+    profile_requested: bool = Depends(get_profile_requested),
 ):
     conn_str = config.data_sources.get(req.data_source)
     if not conn_str:
@@ -54,7 +154,9 @@ def query(
             detail=f"Unknown data_source '{req.data_source}'",
         )
 
-    result = run_one_shot_query(
+    result = await answer(
+        request,
+        profile_requested,
         user=user,
         data_source=req.data_source,
         profile_name=req.profile,
@@ -136,10 +238,12 @@ class ChatResponse(BaseModel):
 
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(
+async def chat(
     req: ChatRequest,
+    request: Request,
     config = Depends(get_config),
     user: UserContext = Depends(get_user_context),
+    profile_requested: bool = Depends(get_profile_requested),
 ):
     conn_str = config.data_sources.get(req.data_source)
     if not conn_str:
@@ -153,7 +257,9 @@ def chat(
     if last_user is None:
         raise HTTPException(status_code=400, detail="No user message provided")
 
-    result = run_one_shot_query(
+    result = await answer(
+        request,
+        profile_requested,
         user=user,
         data_source=req.data_source,
         profile_name=req.profile,
@@ -174,11 +280,25 @@ def chat(
         results=result.rows,
         meta=result.meta,
     )
+
+
+def csv_file(rows: List[dict]) -> StringIO:
+    """Rows as an in-memory CSV, rewound for streaming."""
+    output = StringIO()
+    writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+    output.seek(0)
+    return output
+
+
 @app.post("/download")
-def download(
+async def download(
     req: QueryRequest,
+    request: Request,
     config = Depends(get_config),
     user: UserContext = Depends(get_user_context),
+    profile_requested: bool = Depends(get_profile_requested),
 ):
     conn_str = config.data_sources.get(req.data_source)
     if not conn_str:
@@ -187,7 +307,9 @@ def download(
             detail=f"Unknown data_source '{req.data_source}'",
         )
 
-    result = run_one_shot_query(
+    result = await answer(
+        request,
+        profile_requested,
         user=user,
         data_source=req.data_source,
         profile_name=req.profile,
@@ -198,12 +320,7 @@ def download(
     if not result.rows:
         raise HTTPException(status_code=400, detail="No rows to download")
 
-    # Build CSV in-memory
-    output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=list(result.rows[0].keys()))
-    writer.writeheader()
-    writer.writerows(result.rows)
-    output.seek(0)
+    output = await run_in_threadpool(csv_file, result.rows)
 
     filename = "query_results.csv"
     return StreamingResponse(
@@ -1,5 +1,13 @@
+# api/auth.py
+
+import hashlib
+import logging
 import os
-import requests
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+
 from jose import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -9,37 +17,228 @@ from core.models import UserContext
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TENANT_ID = os.getenv("AZURE_TENANT_ID", "")
 API_AUDIENCE = os.getenv("AZURE_API_AUDIENCE", "")
 
-JWKS_URL = f"https://login.microsoftonline.com/{TENANT_ID}/discovery/v2.0/keys"
-ISSUER = f"https://sts.windows.net/{TENANT_ID}/"
+JWKS_URL = os.getenv(
+    "SQLSPEAK_JWKS_URL", f"https://login.microsoftonline.com/{TENANT_ID}/discovery/v2.0/keys"
+)
+ISSUER = os.getenv("SQLSPEAK_JWT_ISSUER", f"https://sts.windows.net/{TENANT_ID}/")
+
+# Signing keys are refetched after this long, or early (rate-limited) on an unknown kid
+JWKS_TTL_S = float(os.getenv("SQLSPEAK_JWKS_TTL_S", "3600"))
+JWKS_MIN_REFETCH_S = float(os.getenv("SQLSPEAK_JWKS_MIN_REFETCH_S", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("SQLSPEAK_TOKEN_CACHE_SIZE", "10000"))
+
+# App role (token `roles` claim) required by the /admin endpoints
+ADMIN_ROLE = os.getenv("SQLSPEAK_ADMIN_ROLE", "SQLSpeak.Admin")
 
 http_bearer = HTTPBearer()
-_jwks = requests.get(JWKS_URL).json()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-) -> UserContext:
-    token = credentials.credentials
-    try:
-        header = jwt.get_unverified_header(token)
-        kid = header["kid"]
-        key = next(k for k in _jwks["keys"] if k["kid"] == kid)
 
+class UnknownSigningKey(Exception):
+    pass
+
+
+def fetch_jwks(url: str) -> Dict[str, Any]:
+    import requests  # deferred: nothing is fetched until the first token arrives
+
+    resp = requests.get(url, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+class JWKSManager:
+    """
+    Signing keys by kid. The JWKS is fetched on first use and again after
+    `ttl` seconds; a token signed with a kid we don't know (key rotation)
+    triggers an early refetch, at most once per `min_refetch_interval`. If a
+    refresh fails, the keys we already have stay in use.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fetcher: Callable[[str], Dict[str, Any]] = fetch_jwks,
+        ttl: float = JWKS_TTL_S,
+        min_refetch_interval: float = JWKS_MIN_REFETCH_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.clock = clock
+        self.fetches = 0
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None  # last successful fetch
+        self._attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        self._attempted_at = self.clock()
+        self.fetches += 1
+        try:
+            jwks = self.fetcher(self.url)
+            keys = {k["kid"]: k for k in jwks["keys"] if "kid" in k}
+        except Exception as e:
+            if not self._keys:
+                raise
+            logger.warning("JWKS refresh failed, keeping %d cached keys error=%s", len(self._keys), e)
+            return
+        self._keys = keys
+        self._fetched_at = self._attempted_at
+
+    def _may_fetch(self, now: float) -> bool:
+        return self._attempted_at is None or now - self._attempted_at >= self.min_refetch_interval
+
+    def _stale(self, now: float) -> bool:
+        return self._fetched_at is None or now - self._fetched_at >= self.ttl
+
+    def prefetch(self) -> int:
+        """Fetch the keys now unless they are fresh (startup warm-up); returns how many are cached."""
+        with self._lock:
+            now = self.clock()
+            if self._stale(now) and self._may_fetch(now):
+                self._refresh()
+            return len(self._keys)
+
+    def get_key(self, kid: str) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            if self._stale(now) and self._may_fetch(now):
+                self._refresh()
+            key = self._keys.get(kid)
+            if key is None and self._may_fetch(now):
+                self._refresh()
+                key = self._keys.get(kid)
+        if key is None:
+            raise UnknownSigningKey(f"No signing key with kid {kid!r}")
+        return key
+
+
+class VerifiedTokenCache:
+    """
+    Claims of tokens that already passed verification, keyed by the token's
+    SHA-256, so a client reusing its bearer token skips the RS256 check.
+    Entries end at the token's `exp`; the least recently used go first
+    once `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if self.clock() >= claims["exp"]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if not isinstance(claims.get("exp"), (int, float)) or self.max_entries <= 0:
+            return  # without exp there is nothing to bound the entry by
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        jwks: JWKSManager,
+        audience: str,
+        issuer: str,
+        cache: Optional[VerifiedTokenCache] = None,
+        algorithms: Sequence[str] = ("RS256",),
+    ):
+        self.jwks = jwks
+        self.audience = audience
+        self.issuer = issuer
+        self.cache = cache
+        self.algorithms = list(algorithms)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises (JWTError, UnknownSigningKey, ...) otherwise."""
+        if self.cache is not None:
+            claims = self.cache.get(token)
+            if claims is not None:
+                return claims
+
+        header = jwt.get_unverified_header(token)
+        key = self.jwks.get_key(header["kid"])
         claims = jwt.decode(
             token,
             key,
-            algorithms=["RS256"],
-            audience=API_AUDIENCE,
-            issuer=ISSUER,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
         )
+        if self.cache is not None:
+            self.cache.put(token, claims)
+        return claims
+
+
+_verifier: Optional[TokenVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier() -> TokenVerifier:
+    """The process-wide verifier, built on first use from the AZURE_* settings (no network until a token is checked)."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier(JWKSManager(JWKS_URL), API_AUDIENCE, ISSUER, VerifiedTokenCache())
+    return _verifier
+
+
+def set_verifier(verifier: Optional[TokenVerifier]) -> Optional[TokenVerifier]:
+    """
+    Replace the process-wide verifier (None: rebuild from settings on next use).
+    Returns the previous one so tests and benchmarks can restore it.
+    """
+    global _verifier
+    previous = _verifier
+    _verifier = verifier
+    return previous
+
+
+def _verified_claims(credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
+    try:
+        return get_verifier().verify(credentials.credentials)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {exc}",
         )
 
+
+def _user(claims: Dict[str, Any], roles: Sequence[str]) -> UserContext:
     user_id = claims.get("oid") or claims.get("sub")
     display_name = claims.get("name") or claims.get("preferred_username")
 
@@ -52,5 +251,28 @@ def get_current_user(
     return UserContext(
         id=user_id,
         display_name=display_name or user_id,
-        roles=["admin"],
+        roles=list(roles),
     )
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+) -> UserContext:
+    return _user(_verified_claims(credentials), ["admin"])
+
+
+def require_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+) -> UserContext:
+    """
+    A verified token carrying the ADMIN_ROLE app role (the `roles` claim
+    Azure AD issues for app role assignments); 403 otherwise.
+    """
+    claims = _verified_claims(credentials)
+    roles = claims.get("roles") or []
+    if ADMIN_ROLE not in roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Requires the {ADMIN_ROLE} role",
+        )
+    return _user(claims, roles)
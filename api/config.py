@@ -0,0 +1,197 @@
+# api/config.py
+#
+# Hot-reloadable API configuration. config/local.toml is read once and kept
+# in a ConfigManager; a reload (file change or POST /admin/reload-config)
+# diffs the data sources, connects to new databases before anything is
+# swapped, then replaces the config in one assignment. Engines of removed
+# data sources stay usable for a grace period so requests already holding
+# the old config finish, and are disposed afterwards; unchanged data sources
+# keep their pools and cached schemas.
+
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import tomli as tomllib  # for Python 3.8
+from pydantic import BaseModel
+
+from core import db
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path("config/local.toml")
+
+# Seconds between config file checks (0 = only reload through the admin endpoint)
+WATCH_INTERVAL_S = float(os.getenv("SQLSPEAK_CONFIG_WATCH_S", "2"))
+
+# How long a removed data source's engine stays usable before it is disposed
+RETIRE_GRACE_S = float(os.getenv("SQLSPEAK_CONFIG_GRACE_S", "30"))
+
+
+class AppConfig(BaseModel):
+    data_sources: Dict[str, str]
+
+
+class ConfigReloadError(Exception):
+    pass
+
+
+@dataclass
+class ReloadReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_config(path: Path) -> AppConfig:
+    with path.open("rb") as f:
+        raw = tomllib.load(f)
+
+    ds = raw.get("data_sources", {})
+    return AppConfig(data_sources=ds)
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+class ConfigManager:
+    def __init__(self, path: Path = CONFIG_PATH, grace_s: float = RETIRE_GRACE_S):
+        self.path = path
+        self.grace_s = grace_s
+        self._config: Optional[AppConfig] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._retiring: Dict[str, threading.Timer] = {}
+
+    @property
+    def config(self) -> AppConfig:
+        config = self._config
+        if config is None:
+            with self._lock:
+                if self._config is None:
+                    self._mtime = _mtime(self.path)
+                    self._config = load_config(self.path)
+                config = self._config
+        return config
+
+    def changed_on_disk(self) -> bool:
+        return self._config is not None and _mtime(self.path) != self._mtime
+
+    def reload(self) -> ReloadReport:
+        """
+        Re-read the file and apply it. All-or-nothing: if the file can't be
+        parsed or a new database can't be reached, ConfigReloadError is
+        raised and the running config is untouched.
+        """
+        with self._lock:
+            mtime = _mtime(self.path)
+            try:
+                new = load_config(self.path)
+            except Exception as e:
+                self._mtime = mtime  # don't retry the same broken file on every poll
+                raise ConfigReloadError(f"Cannot read {self.path}: {e}") from e
+
+            old = self._config.data_sources if self._config is not None else {}
+            report = ReloadReport()
+            for name, conn_str in sorted(new.data_sources.items()):
+                if name not in old:
+                    report.added.append(name)
+                elif old[name] != conn_str:
+                    report.changed.append(name)
+                else:
+                    report.unchanged.append(name)
+            report.removed = sorted(set(old) - set(new.data_sources))
+
+            kept = set(new.data_sources.values())
+            fresh = {new.data_sources[n] for n in report.added + report.changed}
+            fresh -= set(old.values()) | set(self._retiring)  # those already have engines
+            warmed = {}
+            try:
+                for conn_str in fresh:
+                    warmed[conn_str] = db.warm_engine(conn_str)
+            except Exception as e:
+                for engine in warmed.values():
+                    engine.dispose()
+                self._mtime = mtime
+                raise ConfigReloadError(f"Cannot connect a new data source: {e}") from e
+
+            for conn_str, engine in warmed.items():
+                db.install_engine(conn_str, engine)
+            for conn_str in kept:
+                timer = self._retiring.pop(conn_str, None)  # re-added before it was retired
+                if timer is not None:
+                    timer.cancel()
+
+            self._config = new
+            self._mtime = mtime
+
+            for conn_str in set(old.values()) - kept:
+                self._schedule_retire(conn_str)
+
+        logger.info(
+            "config reloaded added=%s changed=%s removed=%s",
+            report.added, report.changed, report.removed,
+        )
+        return report
+
+    def reload_if_changed(self) -> Optional[ReloadReport]:
+        if not self.changed_on_disk():
+            return None
+        return self.reload()
+
+    def _schedule_retire(self, conn_str: str) -> None:
+        if conn_str in self._retiring:
+            return
+        timer = threading.Timer(self.grace_s, self._retire, args=(conn_str,))
+        timer.daemon = True
+        self._retiring[conn_str] = timer
+        timer.start()
+
+    def _retire(self, conn_str: str) -> None:
+        with self._lock:
+            if self._retiring.pop(conn_str, None) is None:
+                return  # cancelled: the data source came back
+            engine = db.invalidate(conn_str)
+        if engine is not None:
+            engine.dispose()
+        logger.info("retired engine for removed data source")
+
+    def close(self) -> None:
+        """Dispose engines still waiting out their grace period (shutdown)."""
+        with self._lock:
+            pending = list(self._retiring)
+            for conn_str in pending:
+                self._retiring.pop(conn_str).cancel()
+        for conn_str in pending:
+            engine = db.invalidate(conn_str)
+            if engine is not None:
+                engine.dispose()
+
+
+_manager: Optional[ConfigManager] = None
+
+
+def get_config_manager() -> ConfigManager:
+    global _manager
+    if _manager is None:
+        _manager = ConfigManager()
+    return _manager
+
+
+def set_config_manager(manager: Optional[ConfigManager]) -> Optional[ConfigManager]:
+    """Replace the process-wide manager; returns the previous one."""
+    global _manager
+    previous = _manager
+    _manager = manager
+    return previous
@@ -1,30 +1,15 @@
 # api/dependencies.py
 
-from functools import lru_cache
-from pathlib import Path
-from typing import Dict
-
-import tomli as tomllib  # for Python 3.8
 from fastapi import Header
-from pydantic import BaseModel
 
 from core.models import UserContext
 from .auth import get_current_user as get_user_context
+from .config import AppConfig, CONFIG_PATH, get_config_manager
 
-CONFIG_PATH = Path("config/local.toml")
-
-
-class AppConfig(BaseModel):
-    data_sources: Dict[str, str]
 
-
-@lru_cache
 def get_config() -> AppConfig:
-    with CONFIG_PATH.open("rb") as f:
-        raw = tomllib.load(f)
-
-    ds = raw.get("data_sources", {})
-    return AppConfig(data_sources=ds)
+    """The current config; replaced as a whole on reload (see api.config)."""
+    return get_config_manager().config
 
 
 def get_user_context(x_user_id: str = Header("local-dev"), x_user_name: str = Header("Local Developer")) -> UserContext:
@@ -39,3 +24,11 @@ def get_user_context(x_user_id: str = Header("local-dev"), x_user_name: str = He
         display_name=x_user_name,
         roles=["admin"],
     )
+
+
+def get_profile_requested(x_sqlspeak_profile: bool = Header(False)) -> bool:
+    """
+    Opt-in per-request profiling: send `X-SQLSpeak-Profile: 1` to run the
+    query under cProfile/tracemalloc (see core.profiler).
+    """
+    return x_sqlspeak_profile
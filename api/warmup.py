@@ -0,0 +1,186 @@
+# api/warmup.py
+#
+# Startup warm-up, started from the FastAPI lifespan. Every data source gets
+# its pool filled, its schema context loaded and its most asked questions
+# (query history) put in the generation cache; provider clients and the JWKS
+# are fetched alongside. Everything runs in parallel under one time budget;
+# GET /ready answers 503 until it is over, so a load balancer only sends
+# traffic to warm nodes. Failures are reported, not fatal: a database that
+# is down must not keep the node out of rotation forever. Step outcomes are
+# frozen when the budget runs out, so /ready keeps showing what decided it.
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from core.db import fill_pool, get_engine, get_schema_context
+from core.engine import prime_generation_cache
+from core.history_db import load_frequent_questions
+from core.providers import get_providers
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("SQLSPEAK_WARMUP", "1") not in ("0", "false", "no")
+BUDGET_S = float(os.getenv("SQLSPEAK_WARMUP_BUDGET_S", "30"))
+POOL_CONNECTIONS = int(os.getenv("SQLSPEAK_WARMUP_CONNECTIONS", "2"))
+QUESTIONS = int(os.getenv("SQLSPEAK_WARMUP_QUESTIONS", "50"))
+
+
+@dataclass
+class WarmupStep:
+    name: str    # pool | schema | generation_cache | provider | jwks
+    target: str  # data source, provider name or "jwks"
+    status: str = "pending"  # running | ok | error | timeout (still running at the deadline) | skipped
+    duration_ms: Optional[float] = None
+    detail: Optional[str] = None
+
+
+class Warmup:
+    def __init__(
+        self,
+        budget_s: float = BUDGET_S,
+        connections: int = POOL_CONNECTIONS,
+        questions: int = QUESTIONS,
+    ):
+        self.budget_s = budget_s
+        self.connections = connections
+        self.questions = questions
+        self.steps: List[WarmupStep] = []
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._done = threading.Event()
+        # Guards step statuses; once the budget is spent they no longer change
+        self._lock = threading.Lock()
+        self._frozen = False
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def _plan(self, name: str, target: str) -> WarmupStep:
+        step = WarmupStep(name, target)
+        self.steps.append(step)
+        return step
+
+    def _step(self, step: WarmupStep, fn: Callable[[], Any]) -> bool:
+        with self._lock:
+            if step.status != "pending":
+                return False  # skipped: the budget is spent
+            step.status = "running"
+        start = perf_counter()
+        try:
+            detail = fn()
+        except Exception as e:
+            status, detail = "error", str(e)
+            logger.warning("warm-up step failed step=%s target=%s error=%s", step.name, step.target, e)
+        else:
+            status = "ok"
+            detail = None if detail is None else str(detail)
+        with self._lock:
+            if self._frozen:
+                return False  # finished after the deadline: it stays "timeout"
+            step.status, step.detail = status, detail
+            step.duration_ms = (perf_counter() - start) * 1000.0
+        return status == "ok"
+
+    def _skip(self, steps: List[WarmupStep], detail: str) -> None:
+        with self._lock:
+            for step in steps:
+                if step.status == "pending":
+                    step.status, step.detail = "skipped", detail
+
+    def _data_source(self, steps: List[WarmupStep], conn_str: str, asked) -> None:
+        pool, schema, *cache = steps
+        if not self._step(pool, lambda: fill_pool(get_engine(conn_str), self.connections)):
+            self._skip([schema, *cache], "pool not warmed")  # unreachable: the rest would fail the same way
+            return
+        if not self._step(schema, lambda: len(get_schema_context(conn_str))):
+            self._skip(cache, "schema not loaded")
+            return
+        for step in cache:
+            self._step(step, lambda: prime_generation_cache(conn_str, asked))
+
+    def _freeze(self) -> None:
+        """Fix every step's status at the deadline."""
+        with self._lock:
+            self._frozen = True
+            for step in self.steps:
+                if step.status == "running":
+                    step.status = "timeout"
+                elif step.status == "pending":
+                    step.status, step.detail = "skipped", "budget spent before it started"
+
+    def run(self, data_sources: Dict[str, str], verifier=None) -> None:
+        """Warm everything (blocking); returns when done or when the budget runs out."""
+        self.started_at = datetime.utcnow()
+        try:
+            asked = defaultdict(list)
+            if self.questions > 0:
+                try:
+                    for data_source, profile, nl_query, sql, _ in load_frequent_questions(self.questions):
+                        asked[data_source].append((profile, nl_query, sql))
+                except Exception as e:
+                    logger.warning("warm-up could not read query history error=%s", e)
+
+            # Every step is listed before anything starts, so /ready shows the unstarted ones too
+            tasks: List[Callable[[], Any]] = []
+            for n, c in data_sources.items():
+                names = ["pool", "schema"] + (["generation_cache"] if asked.get(n) else [])
+                steps = [self._plan(name, n) for name in names]
+                tasks.append(lambda s=steps, c=c, a=asked.get(n): self._data_source(s, c, a))
+            for p in get_providers():
+                tasks.append(lambda s=self._plan("provider", p.name), p=p: self._step(s, p.warm))
+            if verifier is not None:
+                tasks.append(lambda s=self._plan("jwks", "jwks"): self._step(s, verifier.jwks.prefetch))
+            if not tasks:
+                return
+
+            pool = ThreadPoolExecutor(max_workers=min(len(tasks), 16), thread_name_prefix="warmup")
+            futures = [pool.submit(task) for task in tasks]
+            _, pending = wait(futures, timeout=self.budget_s)
+            pool.shutdown(wait=False, cancel_futures=True)
+            if pending:
+                logger.warning("warm-up budget of %.0fs spent, %d task(s) unfinished", self.budget_s, len(pending))
+        finally:
+            self._freeze()
+            self.finished_at = datetime.utcnow()
+            self._done.set()
+            logger.info("warm-up finished steps=%d failed=%d", len(self.steps),
+                        sum(s.status != "ok" for s in self.steps))
+
+    def skip(self) -> None:
+        """Mark ready without warming (warm-up disabled)."""
+        self._done.set()
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [asdict(s) for s in self.steps]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": self._snapshot(),
+        }
+
+
+_warmup: Optional[Warmup] = None
+
+
+def get_warmup() -> Optional[Warmup]:
+    """The warm-up of this process; None until the lifespan has started it."""
+    return _warmup
+
+
+def set_warmup(warmup: Optional[Warmup]) -> Optional[Warmup]:
+    global _warmup
+    previous = _warmup
+    _warmup = warmup
+    return previous
@@ -0,0 +1,196 @@
+# bench/auth.py
+
+import json
+import platform
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import typer
+
+from api.auth import JWKSManager, TokenVerifier, VerifiedTokenCache, set_verifier
+
+from .engine import time_case
+from .stats import git_revision
+
+app = typer.Typer(help="Bearer-token verification: signature checks vs. the verified-token cache, key rotation")
+
+AUDIENCE = "api://sql-speak-bench"
+ISSUER = "https://issuer.bench.local/"
+
+
+class SigningKey:
+    """A locally generated RSA key with its public JWK."""
+
+    def __init__(self, kid: str):
+        import rsa  # python-jose dependency, so this works whichever backend jose uses
+        from jose import jwk
+
+        _, private = rsa.newkeys(2048)
+        self.kid = kid
+        self.pem = private.save_pkcs1().decode()
+        self.jwk = {**jwk.construct(self.pem, "RS256").public_key().to_dict(), "kid": kid, "use": "sig"}
+
+    def token(self, sub: str, ttl_s: int = 3600, kid: Optional[str] = None) -> str:
+        from jose import jwt
+
+        now = int(time.time())
+        claims = {"sub": sub, "name": sub, "aud": AUDIENCE, "iss": ISSUER, "iat": now, "exp": now + ttl_s}
+        return jwt.encode(claims, self.pem, algorithm="RS256", headers={"kid": kid or self.kid})
+
+
+class StubJWKSServer:
+    """JWKS endpoint on 127.0.0.1 serving `keys`, counting requests."""
+
+    def __init__(self, keys: List[SigningKey]):
+        self.keys = keys
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                body = json.dumps({"keys": [k.jwk for k in stub.keys]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/keys"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def bench_verify(server: StubJWKSServer, key: SigningKey, iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    token = key.token("bench-user")
+    for name, cache in (("verify (signature every time)", None), ("verify (cached token)", VerifiedTokenCache())):
+        verifier = TokenVerifier(JWKSManager(server.url), AUDIENCE, ISSUER, cache)
+        stats = time_case(lambda: verifier.verify(token), iterations)
+        results.append({"case": name, **stats})
+
+    # Many clients, one token each: every first sight pays the signature check
+    tokens = [key.token(f"user-{i}") for i in range(iterations + 2)]  # + warm-up and memory runs
+    verifier = TokenVerifier(JWKSManager(server.url), AUDIENCE, ISSUER, VerifiedTokenCache())
+    pending = iter(tokens)
+    stats = time_case(lambda: verifier.verify(next(pending)), iterations)
+    results.append({"case": "verify (new token per call)", **stats})
+    return results
+
+
+def bench_rotation(server: StubJWKSServer, old: SigningKey, new: SigningKey, min_refetch_s: float = 0.2) -> Dict[str, Any]:
+    """
+    A key published after our last fetch is picked up by one early refetch;
+    a burst of tokens with unknown kids refetches at most once per interval.
+    """
+    server.keys = [old]
+    jwks = JWKSManager(server.url, min_refetch_interval=min_refetch_s)
+    verifier = TokenVerifier(jwks, AUDIENCE, ISSUER, VerifiedTokenCache())
+    verifier.verify(old.token("before-rotation"))
+    time.sleep(min_refetch_s)
+    server.keys = [old, new]
+
+    def outcomes(tokens: List[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            try:
+                verifier.verify(token)
+                outcome = "ok"
+            except Exception as e:
+                outcome = type(e).__name__
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return counts
+
+    fetches = jwks.fetches
+    rotated = outcomes([new.token(f"after-rotation-{i}") for i in range(5)])
+    rotation_fetches = jwks.fetches - fetches
+    forged = [new.token(f"unknown-kid-{i}", kid="unpublished") for i in range(50)]
+    fetches = jwks.fetches
+    started = time.perf_counter()
+    flood = outcomes(forged)
+    return {
+        "case": "key rotation",
+        "rotated_key": rotated,
+        "rotation_fetches": rotation_fetches,
+        "unknown_kid": flood,
+        "unknown_kid_fetches": jwks.fetches - fetches,
+        "unknown_kid_seconds": time.perf_counter() - started,
+    }
+
+
+def bench_endpoint(server: StubJWKSServer, key: SigningKey, iterations: int) -> List[Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+
+    from api.app import app as api_app
+
+    results = []
+    client = TestClient(api_app)
+    headers = {"Authorization": f"Bearer {key.token('bench-user')}"}
+    for name, cache in (("GET /me (no token cache)", None), ("GET /me (token cache)", VerifiedTokenCache())):
+        previous = set_verifier(TokenVerifier(JWKSManager(server.url), AUDIENCE, ISSUER, cache))
+        try:
+            def run() -> None:
+                client.get("/me", headers=headers).raise_for_status()
+
+            results.append({"case": name, **time_case(run, iterations)})
+        finally:
+            set_verifier(previous)
+    return results
+
+
+@app.command()
+def run(
+    iterations: int = typer.Option(200, help="Timed iterations per case"),
+    api: bool = typer.Option(True, help="Also time GET /me through FastAPI"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Verify RS256 tokens signed with locally generated keys against a stub
+    JWKS server: full signature checks vs. cache hits, first-seen tokens,
+    and a key rotation. Nothing leaves the machine.
+    """
+    typer.echo("🔑 Generating signing keys...", err=True)
+    old, new = SigningKey("bench-key-1"), SigningKey("bench-key-2")
+    server = StubJWKSServer([old])
+    try:
+        typer.echo("⏱  verify...", err=True)
+        results = bench_verify(server, old, iterations)
+        typer.echo("⏱  key rotation...", err=True)
+        results.append(bench_rotation(server, old, new))
+        if api:
+            typer.echo("⏱  GET /me...", err=True)
+            server.keys = [old]
+            results += bench_endpoint(server, old, iterations)
+        jwks_requests = server.requests
+    finally:
+        server.close()
+
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jwks_requests": jwks_requests,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text)
+
+
+if __name__ == "__main__":
+    app()
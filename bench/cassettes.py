@@ -0,0 +1,120 @@
+# bench/cassettes.py
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Optional
+
+from core.providers import ProviderError, SQLProvider
+
+
+@dataclass
+class Recording:
+    key: str
+    provider: str
+    nl_query: str
+    db_type: str
+    sql: Optional[str]
+    error: Optional[str]
+    latency_ms: float
+    recorded_at: str
+
+
+def cassette_key(provider: str, nl_query: str, schema_context: str, db_type: str) -> str:
+    raw = "\x1f".join((provider, db_type, schema_context, nl_query))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """
+    Append-only JSONL file of provider responses. A prompt (provider, db_type,
+    schema, question) maps to its latest recording, so re-recording replaces
+    older answers without rewriting the file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, Recording] = {}
+        if path.exists():
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        rec = Recording(**json.loads(line))
+                        self._recordings[rec.key] = rec
+
+    def get(self, key: str) -> Optional[Recording]:
+        return self._recordings.get(key)
+
+    def put(self, rec: Recording) -> None:
+        with self._lock:
+            self._recordings[rec.key] = rec
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._recordings)
+
+
+class RecordingProvider(SQLProvider):
+    """Calls a real provider and stores its answer (or error) with the observed latency."""
+
+    def __init__(self, inner: SQLProvider, store: CassetteStore):
+        self.inner = inner
+        self.name = inner.name
+        self.store = store
+        self.last: Optional[Recording] = None
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        start = perf_counter()
+        sql: Optional[str] = None
+        error: Optional[str] = None
+        try:
+            sql = self.inner.generate_sql(nl_query, schema_context, db_type)
+            return sql
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.last = Recording(
+                key=cassette_key(self.name, nl_query, schema_context, db_type),
+                provider=self.name,
+                nl_query=nl_query,
+                db_type=db_type,
+                sql=sql,
+                error=error,
+                latency_ms=(perf_counter() - start) * 1000.0,
+                recorded_at=datetime.utcnow().isoformat(),
+            )
+            self.store.put(self.last)
+
+
+class ReplayProvider(SQLProvider):
+    """
+    Answers from a cassette, offline and deterministically. With
+    `replay_latency` it also sleeps for the recorded latency, so fallback and
+    racing behaviour can be reproduced in wall-clock terms.
+    """
+
+    def __init__(self, name: str, store: CassetteStore, replay_latency: bool = False):
+        self.name = name
+        self.store = store
+        self.replay_latency = replay_latency
+        self.last: Optional[Recording] = None
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        rec = self.store.get(cassette_key(self.name, nl_query, schema_context, db_type))
+        self.last = rec
+        if rec is None:
+            raise ProviderError(f"No {self.name} recording for question: {nl_query!r}")
+        if self.replay_latency:
+            time.sleep(rec.latency_ms / 1000.0)
+        if rec.error is not None:
+            raise ProviderError(rec.error)
+        return rec.sql or ""
@@ -0,0 +1,263 @@
+# bench/engine.py
+
+import json
+import platform
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+import typer
+
+from core import generation_cache
+from core.db import get_schema_context
+from core.engine import _apply_profile_policies, run_one_shot_query
+from core.logging import QueryLogEvent, log_query
+from core.models import UserContext
+from core.profiles import get_profile
+
+from .fakes import FakeProvider, fake_providers
+from .fixtures import build_sqlite_fixture, isolated_history, sqlite_url
+from .stats import git_revision, summarize
+
+app = typer.Typer(help="SQL-Speak engine micro-benchmarks (fake providers, SQLite fixtures)")
+
+BENCH_USER = UserContext(id="bench", display_name="Benchmark", roles=["admin"])
+
+_POLICY_SAMPLES = [
+    "SELECT * FROM facts",
+    "SELECT status, COUNT(*) FROM facts GROUP BY status;",
+    "select id, amount from facts where amount > 10 limit 5",
+    "SELECT customer_id, SUM(amount) FROM facts GROUP BY customer_id ORDER BY 2 DESC",
+]
+
+
+def _parse_sizes(value: str) -> List[int]:
+    return [int(v.replace("_", "")) for v in value.split(",") if v.strip()]
+
+
+def time_case(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Time `fn` `iterations` times, then run it once more under tracemalloc
+    (kept out of the timed loop, which it would slow down) for peak memory.
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies: List[float] = []
+    start = perf_counter()
+    for _ in range(iterations):
+        t0 = perf_counter()
+        fn()
+        latencies.append((perf_counter() - t0) * 1000.0)
+    stats = summarize(latencies, perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, stats["peak_memory_bytes"] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return stats
+
+
+def bench_schema_context(tables: List[int], iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for n in tables:
+        conn_str = sqlite_url(build_sqlite_fixture(tables=n, rows=1_000))
+        stats = time_case(lambda: get_schema_context(conn_str), iterations)
+        results.append({"case": "get_schema_context", "tables": n, **stats})
+        # Cache hits above; this is the reflection they save
+        stats = time_case(lambda: get_schema_context(conn_str, refresh=True), iterations)
+        results.append({"case": "get_schema_context(refresh)", "tables": n, **stats})
+    return results
+
+
+def bench_profile_policies(iterations: int, batch: int = 1_000) -> List[Dict[str, Any]]:
+    results = []
+    for profile_name in ("sqlite-dev", "prod-readonly", "benchmark-postgres"):
+        profile = get_profile(profile_name)
+
+        def run_batch() -> None:
+            for i in range(batch):
+                _apply_profile_policies(_POLICY_SAMPLES[i % len(_POLICY_SAMPLES)], profile)
+
+        stats = time_case(run_batch, iterations)
+        results.append(
+            {"case": "_apply_profile_policies", "profile": profile_name, "batch": batch, **stats}
+        )
+    return results
+
+
+def bench_history_logging(iterations: int) -> List[Dict[str, Any]]:
+    event = QueryLogEvent(
+        timestamp=datetime.utcnow(),
+        user_id=BENCH_USER.id,
+        data_source="bench",
+        profile="sqlite-dev",
+        nl_query="How many facts are there?",
+        generated_sql="SELECT COUNT(*) FROM facts;",
+        status="success",
+        row_count=1,
+        execution_time_ms=1.0,
+        meta={},
+    )
+    stats = time_case(lambda: log_query(event), iterations)
+    return [{"case": "log_query", **stats}]
+
+
+def bench_one_shot(rows: List[int], tables: int, iterations: int, latency_ms: float) -> List[Dict[str, Any]]:
+    results = []
+    for n in rows:
+        conn_str = sqlite_url(build_sqlite_fixture(tables=tables, rows=n))
+        provider = FakeProvider(
+            name="fake-copilot",
+            sql=f"SELECT * FROM facts LIMIT {n};",
+            latency_s=latency_ms / 1000.0,
+        )
+
+        def run() -> None:
+            result = run_one_shot_query(
+                user=BENCH_USER,
+                data_source="bench",
+                profile_name="sqlite-dev",
+                nl_query="Show all facts",
+                conn_str=conn_str,
+            )
+            if result.meta["status"] != "success":
+                raise RuntimeError(f"benchmark query failed: {result.sql}")
+
+        for case, cached in (("run_one_shot_query", False), ("run_one_shot_query (cached generation)", True)):
+            previous = generation_cache.set_max_entries(generation_cache.MAX_ENTRIES if cached else 0)
+            try:
+                with fake_providers(provider):
+                    stats = time_case(run, iterations)
+            finally:
+                generation_cache.set_max_entries(previous)
+            results.append(
+                {"case": case, "tables": tables, "rows": n, "provider_latency_ms": latency_ms, **stats}
+            )
+    return results
+
+
+def bench_coalescing(tables: int, concurrency: int, latency_ms: float) -> List[Dict[str, Any]]:
+    """`concurrency` threads asking at once: the same question (coalesced) vs. distinct ones."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    conn_str = sqlite_url(build_sqlite_fixture(tables=tables, rows=1000))
+    results = []
+    previous = generation_cache.set_max_entries(0)  # measure coalescing, not the cache
+    try:
+        for case, same in (("concurrent identical questions", True), ("concurrent distinct questions", False)):
+            provider = FakeProvider(name="fake-copilot", sql="SELECT * FROM facts LIMIT 100;", latency_s=latency_ms / 1000.0)
+
+            def ask(i: int) -> Dict[str, Any]:
+                question = "Show all facts" if same else f"Show all facts #{i}"
+                return run_one_shot_query(BENCH_USER, "bench", "sqlite-dev", question, conn_str).meta
+
+            with fake_providers(provider), ThreadPoolExecutor(max_workers=concurrency) as pool:
+                started = perf_counter()
+                metas = list(pool.map(ask, range(concurrency)))
+                wall_ms = (perf_counter() - started) * 1000.0
+            results.append({
+                "case": case,
+                "concurrency": concurrency,
+                "provider_latency_ms": latency_ms,
+                "provider_calls": provider.calls,
+                "coalesced": sum(1 for m in metas if m.get("coalesced")),
+                "wall_ms": wall_ms,
+            })
+    finally:
+        generation_cache.set_max_entries(previous)
+    return results
+
+
+def bench_api(rows: List[int], tables: int, iterations: int, latency_ms: float) -> List[Dict[str, Any]]:
+    # Imported lazily: api.app pulls in FastAPI and the auth module
+    from fastapi.testclient import TestClient
+
+    from api.app import app as api_app
+    from api.dependencies import AppConfig, get_config
+
+    results = []
+    client = TestClient(api_app)
+    previous = generation_cache.set_max_entries(0)  # every request pays the provider latency
+    for n in rows:
+        conn_str = sqlite_url(build_sqlite_fixture(tables=tables, rows=n))
+        api_app.dependency_overrides[get_config] = lambda: AppConfig(data_sources={"bench": conn_str})
+        provider = FakeProvider(
+            name="fake-copilot",
+            sql=f"SELECT * FROM facts LIMIT {n};",
+            latency_s=latency_ms / 1000.0,
+        )
+        payload = {"data_source": "bench", "profile": "sqlite-dev", "query": "Show all facts"}
+
+        for endpoint in ("/query", "/download"):
+
+            def run() -> None:
+                resp = client.post(endpoint, json=payload)
+                resp.raise_for_status()
+
+            with fake_providers(provider):
+                stats = time_case(run, iterations)
+            results.append(
+                {"case": f"api {endpoint}", "tables": tables, "rows": n, "provider_latency_ms": latency_ms, **stats}
+            )
+
+    api_app.dependency_overrides.pop(get_config, None)
+    generation_cache.set_max_entries(previous)
+    return results
+
+
+@app.command()
+def run(
+    tables: str = typer.Option("10,100,1000", help="Comma-separated table counts for schema benchmarks"),
+    rows: str = typer.Option("1000,100000,1000000", help="Comma-separated result sizes for query benchmarks"),
+    iterations: int = typer.Option(20, help="Timed iterations per case"),
+    provider_latency_ms: float = typer.Option(0.0, help="Simulated provider latency per call"),
+    api: bool = typer.Option(True, help="Also benchmark the FastAPI endpoints"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Run the engine benchmark matrix and emit a JSON report.
+    Copilot/Perplexity are replaced by deterministic fakes; nothing leaves the machine.
+    """
+    table_sizes = _parse_sizes(tables)
+    row_sizes = _parse_sizes(rows)
+
+    results: List[Dict[str, Any]] = []
+    with isolated_history():
+        typer.echo("⏱  get_schema_context...", err=True)
+        results += bench_schema_context(table_sizes, iterations)
+        typer.echo("⏱  _apply_profile_policies...", err=True)
+        results += bench_profile_policies(iterations)
+        typer.echo("⏱  log_query...", err=True)
+        results += bench_history_logging(iterations)
+        typer.echo("⏱  run_one_shot_query...", err=True)
+        results += bench_one_shot(row_sizes, min(table_sizes), iterations, provider_latency_ms)
+        typer.echo("⏱  coalescing...", err=True)
+        results += bench_coalescing(min(table_sizes), 16, provider_latency_ms)
+        if api:
+            typer.echo("⏱  API endpoints...", err=True)
+            results += bench_api(row_sizes, min(table_sizes), iterations, provider_latency_ms)
+
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text)
+
+
+if __name__ == "__main__":
+    app()
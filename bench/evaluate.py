@@ -0,0 +1,274 @@
+# bench/evaluate.py
+
+import itertools
+import json
+import platform
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import typer
+from sqlalchemy import text
+
+from core.db import get_engine, get_schema_context
+from core.engine import _apply_profile_policies
+from core.profiles import Profile, get_profile
+from core.providers import CopilotProvider, PerplexityProvider, SQLProvider
+
+from .cassettes import CassetteStore, RecordingProvider, ReplayProvider
+from .fixtures import FIXTURE_DIR, sqlite_url
+from .stats import git_revision, percentile
+
+app = typer.Typer(help="Gold-question evaluation of text-to-SQL providers (record/replay)")
+
+GOLD_DIR = Path(__file__).parent / "gold"
+DEFAULT_CASSETTE = FIXTURE_DIR / "cassettes.jsonl"
+
+_REAL_PROVIDERS = {
+    "copilot": CopilotProvider,
+    "perplexity": PerplexityProvider,
+}
+
+
+def load_gold(name: str) -> Dict[str, Any]:
+    """A gold set by name (bench/gold/<name>.json) or by path."""
+    path = Path(name)
+    if not path.exists():
+        path = GOLD_DIR / f"{name}.json"
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gold_source(gold: Dict[str, Any], db_url: Optional[str]) -> str:
+    if db_url:
+        return db_url
+    if gold["name"] == "hospital":
+        path = FIXTURE_DIR / "hospital_eval.db"
+        if not path.exists():
+            from setup_pro_db import setup
+
+            FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+            setup(str(path))
+        return sqlite_url(path)
+    raise typer.BadParameter(f"--db-url is required for gold set '{gold['name']}'")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (Decimal, float)):
+        return round(float(value), 6)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _fetch(conn_str: str, sql: str) -> List[Tuple[Any, ...]]:
+    # Never commit: a bad generated statement must not change the fixture
+    with get_engine(conn_str).connect() as conn:
+        try:
+            return [tuple(_normalize(v) for v in row) for row in conn.execute(text(sql))]
+        finally:
+            conn.rollback()
+
+
+def _explain(conn_str: str, sql: str) -> None:
+    engine = get_engine(conn_str)
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        try:
+            conn.execute(text(prefix + sql)).fetchall()
+        finally:
+            conn.rollback()
+
+
+def _same_results(got: List[Tuple[Any, ...]], expected: List[Tuple[Any, ...]], ordered: bool) -> bool:
+    if ordered:
+        return got == expected
+    return sorted(got, key=repr) == sorted(expected, key=repr)
+
+
+def evaluate_provider(
+    provider: SQLProvider,
+    gold: Dict[str, Any],
+    conn_str: str,
+    schema_context: str,
+    profile: Profile,
+    expected: Dict[str, List[Tuple[Any, ...]]],
+) -> List[Dict[str, Any]]:
+    """Ask `provider` every gold question once (first try) and grade the answer."""
+    outcomes = []
+    for q in gold["questions"]:
+        outcome: Dict[str, Any] = {
+            "id": q["id"],
+            "provider": provider.name,
+            "latency_ms": None,
+            "recorded": True,
+            "generated": False,
+            "valid": False,
+            "executed": False,
+            "correct": False,
+            "sql": None,
+            "error": None,
+        }
+        try:
+            raw_sql = provider.generate_sql(q["question"], schema_context, profile.db_type)
+            outcome["generated"] = True
+        except Exception as e:
+            # Broader than the engine, which only handles ProviderError: here any
+            # failure (missing gh, a requests error) is scored for this question
+            outcome["error"] = str(e) or type(e).__name__
+            raw_sql = None
+        finally:
+            rec = getattr(provider, "last", None)
+            if rec is None:
+                outcome["recorded"] = False
+            else:
+                outcome["latency_ms"] = rec.latency_ms
+
+        if raw_sql is not None:
+            try:
+                sql = _apply_profile_policies(raw_sql, profile)
+                outcome["sql"] = sql
+                _explain(conn_str, sql)
+                outcome["valid"] = True
+                rows = _fetch(conn_str, sql)
+                outcome["executed"] = True
+                outcome["correct"] = _same_results(rows, expected[q["id"]], q.get("ordered", False))
+            except Exception as e:
+                outcome["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        outcomes.append(outcome)
+    return outcomes
+
+
+def _summarize_provider(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    n = len(outcomes)
+    latencies = [o["latency_ms"] for o in outcomes if o["latency_ms"] is not None]
+    return {
+        "questions": n,
+        "missing_recordings": sum(1 for o in outcomes if not o["recorded"]),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p90_ms": percentile(latencies, 90),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "generated_rate": sum(o["generated"] for o in outcomes) / n if n else 0.0,
+        "first_try_validity": sum(o["valid"] for o in outcomes) / n if n else 0.0,
+        "execution_success": sum(o["executed"] for o in outcomes) / n if n else 0.0,
+        "accuracy": sum(o["correct"] for o in outcomes) / n if n else 0.0,
+    }
+
+
+def _strategies(by_provider: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Replay the recorded per-question outcomes through provider-chain strategies:
+
+    - "a>b": sequential fallback as run_one_shot_query does it (next provider
+      only when the previous one produced nothing); latencies add up.
+    - "race": all providers at once, first produced answer wins.
+    """
+    names = list(by_provider)
+    questions = len(next(iter(by_provider.values()), []))
+    strategies: Dict[str, Dict[str, Any]] = {}
+
+    def summary(points: List[Tuple[float, bool]]) -> Dict[str, Any]:
+        latencies = [lat for lat, _ in points]
+        return {
+            "latency_p50_ms": percentile(latencies, 50),
+            "latency_p99_ms": percentile(latencies, 99),
+            "accuracy": sum(ok for _, ok in points) / len(points) if points else 0.0,
+        }
+
+    for order in itertools.permutations(names):
+        points = []
+        for i in range(questions):
+            elapsed, ok = 0.0, False
+            for name in order:
+                o = by_provider[name][i]
+                elapsed += o["latency_ms"] or 0.0
+                if o["generated"]:
+                    ok = o["correct"]
+                    break
+            points.append((elapsed, ok))
+        strategies[">".join(order)] = summary(points)
+
+    if len(names) > 1:
+        points = []
+        for i in range(questions):
+            answered = [by_provider[n][i] for n in names if by_provider[n][i]["generated"]]
+            if answered:
+                first = min(answered, key=lambda o: o["latency_ms"] or 0.0)
+                points.append((first["latency_ms"] or 0.0, first["correct"]))
+            else:
+                points.append((max(by_provider[n][i]["latency_ms"] or 0.0 for n in names), False))
+        strategies["race"] = summary(points)
+    return strategies
+
+
+@app.command()
+def run(
+    gold: str = typer.Option("hospital", help="Gold set name (bench/gold/<name>.json) or path"),
+    providers: str = typer.Option("copilot,perplexity", help="Comma-separated providers to evaluate"),
+    mode: str = typer.Option("replay", help="replay (offline, from the cassette) | record (call real providers)"),
+    cassette: Path = typer.Option(DEFAULT_CASSETTE, help="Cassette file (JSONL)"),
+    db_url: Optional[str] = typer.Option(None, help="Database to execute against (default: hospital fixture)"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Grade providers on gold questions: latency distribution, first-try SQL
+    validity, execution success and result-set accuracy, plus how each
+    provider order / racing would have performed.
+    """
+    if mode not in ("replay", "record"):
+        raise typer.BadParameter("mode must be 'replay' or 'record'")
+    gold_set = load_gold(gold)
+    conn_str = _gold_source(gold_set, db_url)
+    profile = get_profile(gold_set["profile"])
+    schema_context = get_schema_context(conn_str)
+    store = CassetteStore(cassette)
+
+    expected = {
+        q["id"]: _fetch(conn_str, _apply_profile_policies(q["gold_sql"], profile))
+        for q in gold_set["questions"]
+    }
+
+    by_provider: Dict[str, List[Dict[str, Any]]] = {}
+    for name in [p.strip() for p in providers.split(",") if p.strip()]:
+        if mode == "record":
+            if name not in _REAL_PROVIDERS:
+                raise typer.BadParameter(f"Unknown provider: {name}")
+            provider: SQLProvider = RecordingProvider(_REAL_PROVIDERS[name](), store)
+        else:
+            provider = ReplayProvider(name, store)
+        typer.echo(f"⏱  {mode} {name} on {gold_set['name']}...", err=True)
+        by_provider[name] = evaluate_provider(provider, gold_set, conn_str, schema_context, profile, expected)
+
+    summaries = {name: _summarize_provider(o) for name, o in by_provider.items()}
+    for name, s in summaries.items():
+        typer.echo(
+            f"   {name}: p50={s['latency_p50_ms']:.0f}ms valid={s['first_try_validity']:.0%} "
+            f"executed={s['execution_success']:.0%} accuracy={s['accuracy']:.0%} "
+            f"missing={s['missing_recordings']}",
+            err=True,
+        )
+
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "gold": gold_set["name"],
+        "profile": profile.name,
+        "mode": mode,
+        "providers": summaries,
+        "strategies": _strategies(by_provider),
+        "outcomes": [o for outcomes in by_provider.values() for o in outcomes],
+    }
+    text_report = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text_report)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text_report)
+
+
+if __name__ == "__main__":
+    app()
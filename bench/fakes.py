@@ -0,0 +1,93 @@
+# bench/fakes.py
+
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Union
+
+from core.providers import ProviderError, SQLProvider, set_providers
+
+Latency = Union[float, Callable[[], float]]
+
+
+def latency_distribution(spec: str, seed: int = 0) -> Callable[[], float]:
+    """
+    Parse a latency spec (milliseconds) into a seeded sampler returning seconds:
+
+    - "const:50"          always 50 ms
+    - "uniform:20:200"    uniform between 20 and 200 ms
+    - "lognormal:80:0.5"  log-normal with median 80 ms and sigma 0.5 (long tail)
+    - "exp:50"            exponential with mean 50 ms
+    """
+    kind, _, rest = spec.partition(":")
+    params = [float(p) for p in rest.split(":") if p]
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    if kind == "const" and len(params) == 1:
+        draw = lambda: params[0]
+    elif kind == "uniform" and len(params) == 2:
+        draw = lambda: rng.uniform(params[0], params[1])
+    elif kind == "lognormal" and len(params) == 2:
+        draw = lambda: rng.lognormvariate(math.log(params[0]), params[1])
+    elif kind == "exp" and len(params) == 1:
+        draw = lambda: rng.expovariate(1.0 / params[0])
+    else:
+        raise ValueError(f"Unknown latency spec: {spec!r}")
+
+    def sample() -> float:
+        with lock:  # endpoints call providers from many worker threads
+            return max(draw(), 0.0) / 1000.0
+
+    return sample
+
+
+class FakeProvider(SQLProvider):
+    """
+    Deterministic in-process stand-in for Copilot/Perplexity.
+
+    - sql: SQL returned for any question not found in `responses`
+    - responses: optional mapping of nl_query -> SQL
+    - latency_s: seconds to sleep per call, or a callable returning them
+    - fail: raise ProviderError instead of answering (exercises fallback)
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        sql: str = "SELECT 1;",
+        responses: Optional[Dict[str, str]] = None,
+        latency_s: Latency = 0.0,
+        fail: bool = False,
+    ):
+        self.name = name
+        self.sql = sql
+        self.responses = responses or {}
+        self.latency_s = latency_s
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        with self._lock:
+            self.calls += 1
+
+        delay = self.latency_s() if callable(self.latency_s) else self.latency_s
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.fail:
+            raise ProviderError(f"{self.name} configured to fail")
+        return self.responses.get(nl_query, self.sql)
+
+
+@contextmanager
+def fake_providers(*providers: SQLProvider) -> Iterator[None]:
+    """Swap the engine's provider chain for `providers`, restoring it afterwards."""
+    previous = set_providers(providers)
+    try:
+        yield
+    finally:
+        set_providers(previous)
@@ -0,0 +1,97 @@
+# bench/fixtures.py
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Tuple
+
+FIXTURE_DIR = Path(os.getenv("SQLSPEAK_BENCH_DIR", ".bench"))
+
+_STATUSES = ("pending", "completed", "shipped", "cancelled")
+
+
+def _fact_rows(rows: int) -> Iterator[Tuple[int, int, float, str, str]]:
+    # Arithmetic rather than random so every fixture is byte-for-byte reproducible
+    for i in range(1, rows + 1):
+        yield (
+            i,
+            i % 1000 + 1,
+            (i * 37 % 100_000) / 100.0,
+            _STATUSES[i % len(_STATUSES)],
+            f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00",
+        )
+
+
+def build_sqlite_fixture(tables: int, rows: int, directory: Path = FIXTURE_DIR) -> Path:
+    """
+    SQLite database with `tables` tables in total: one `facts` table holding
+    `rows` rows plus empty padding tables t0001.. that only widen the schema.
+    Files are cached by size in `directory` and reused across runs.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"bench_t{tables}_r{rows}.db"
+    if path.exists():
+        return path
+
+    tmp_path = path.with_suffix(".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            """
+            CREATE TABLE facts (
+                id INTEGER PRIMARY KEY,
+                customer_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.executemany("INSERT INTO facts VALUES (?, ?, ?, ?, ?)", _fact_rows(rows))
+        for t in range(1, tables):
+            conn.execute(
+                f"""
+                CREATE TABLE t{t:04d} (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT,
+                    value REAL,
+                    created_at TEXT
+                )
+                """
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    tmp_path.rename(path)
+    return path
+
+
+def sqlite_url(path: Path) -> str:
+    return f"sqlite:///{path}"
+
+
+@contextmanager
+def isolated_history(directory: Path = FIXTURE_DIR) -> Iterator[Path]:
+    """Point query history at a scratch SQLite file so runs don't touch sqlspeak_logs.db."""
+    from core import history_db
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"history_{os.getpid()}.db"
+    if path.exists():
+        path.unlink()
+
+    previous = history_db.LOG_DB_PATH
+    history_db.LOG_DB_PATH = path
+    history_db.init_history_db()
+    try:
+        yield path
+    finally:
+        history_db.LOG_DB_PATH = previous
+        path.unlink(missing_ok=True)
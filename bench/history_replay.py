@@ -0,0 +1,278 @@
+# bench/history_replay.py
+
+import hashlib
+import json
+import platform
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import typer
+from sqlalchemy import text
+
+from core import history_db
+from core.db import get_engine
+
+from .stats import git_revision
+
+app = typer.Typer(help="Replay query_history SQL against a database and diff plans/timings with a baseline")
+
+
+@dataclass
+class Workload:
+    """One distinct successful statement from history and when it ran."""
+    key: str
+    sql: str
+    data_source: str
+    occurrences: List[datetime] = field(default_factory=list)
+    recorded_ms: List[float] = field(default_factory=list)
+
+
+# String literals and quoted identifiers, kept verbatim by sql_key
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def sql_key(sql: str) -> str:
+    """Same key for statements differing only in whitespace or keyword/name case outside quotes."""
+    parts = _QUOTED.split(sql.strip().rstrip(";"))
+    normalized = "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).lower() for i, part in enumerate(parts)
+    ).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def extract_workload(data_source: Optional[str], since: Optional[str], select_only: bool) -> List[Workload]:
+    workloads: Dict[str, Workload] = {}
+    for ts, ds, sql, exec_ms in history_db.load_successful_sql(data_source, since):
+        if select_only and not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        key = sql_key(sql)
+        wl = workloads.setdefault(key, Workload(key=key, sql=sql, data_source=ds))
+        wl.occurrences.append(datetime.fromisoformat(ts))
+        if exec_ms is not None:
+            wl.recorded_ms.append(exec_ms)
+    return list(workloads.values())
+
+
+def _plan(conn_str: str, sql: str) -> Dict[str, Any]:
+    """EXPLAIN (no ANALYZE) plus a fingerprint of its shape that ignores costs."""
+    engine = get_engine(conn_str)
+    with engine.connect() as conn:
+        try:
+            if engine.dialect.name == "postgresql":
+                raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                plan = raw if isinstance(raw, list) else json.loads(raw)
+                shape = _pg_shape(plan[0]["Plan"])
+                return {"plan": plan, "shape": shape, "total_cost": plan[0]["Plan"].get("Total Cost")}
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            details = [str(r[-1]) for r in rows]
+            return {"plan": details, "shape": " | ".join(details), "total_cost": None}
+        finally:
+            conn.rollback()
+
+
+def _pg_shape(node: Dict[str, Any]) -> str:
+    label = node.get("Node Type", "?")
+    for attr in ("Relation Name", "Index Name", "Join Type"):
+        if attr in node:
+            label += f"[{node[attr]}]"
+    children = ",".join(_pg_shape(child) for child in node.get("Plans", []))
+    return f"{label}({children})" if children else label
+
+
+def _execute_once(conn_str: str, sql: str, timeout_ms: int) -> float:
+    engine = get_engine(conn_str)
+    with engine.connect() as conn:
+        try:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("SET TRANSACTION READ ONLY"))
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+            start = perf_counter()
+            result = conn.execute(text(sql))
+            if result.returns_rows:
+                for _ in result:
+                    pass
+            return (perf_counter() - start) * 1000.0
+        finally:
+            conn.rollback()
+
+
+def replay(
+    conn_str: str,
+    workloads: List[Workload],
+    mode: str,
+    concurrency: int,
+    repeat: int,
+    speed: float,
+    timeout_ms: int,
+) -> Tuple[Dict[str, List[float]], Dict[str, str]]:
+    """
+    Execute the workload; returns (latencies, last error) per statement key.
+
+    - concurrent: every distinct statement `repeat` times on `concurrency` threads
+    - recorded: every historical occurrence, at its original offset / `speed`
+    """
+    timings: Dict[str, List[float]] = {wl.key: [] for wl in workloads}
+    errors: Dict[str, str] = {}
+
+    def run(wl: Workload) -> None:
+        try:
+            timings[wl.key].append(_execute_once(conn_str, wl.sql, timeout_ms))
+        except Exception as e:
+            errors[wl.key] = str(e).splitlines()[0]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if mode == "concurrent":
+            list(pool.map(run, [wl for wl in workloads for _ in range(repeat)]))
+        else:
+            schedule = sorted(
+                ((ts, wl) for wl in workloads for ts in wl.occurrences),
+                key=lambda item: item[0],
+            )
+            if schedule:
+                origin = schedule[0][0]
+                start = perf_counter()
+                futures = []
+                for ts, wl in schedule:
+                    delay = (ts - origin).total_seconds() / speed - (perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                    futures.append(pool.submit(run, wl))
+                for f in futures:
+                    f.result()
+
+    return timings, errors
+
+
+def compare(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    slower_ratio: float,
+    min_delta_ms: float,
+) -> List[Dict[str, Any]]:
+    """Statements that got slower beyond both thresholds, or whose plan shape changed."""
+    findings = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        slower = (
+            cur["median_ms"] is not None
+            and base["median_ms"] is not None
+            and cur["median_ms"] > base["median_ms"] * slower_ratio
+            and cur["median_ms"] - base["median_ms"] >= min_delta_ms
+        )
+        plan_changed = cur["shape"] != base["shape"]
+        if slower or plan_changed or (cur["error"] and not base["error"]):
+            findings.append(
+                {
+                    "key": key,
+                    "sql": cur["sql"],
+                    "slower": slower,
+                    "plan_changed": plan_changed,
+                    "new_error": cur["error"] if not base["error"] else None,
+                    "baseline_ms": base["median_ms"],
+                    "current_ms": cur["median_ms"],
+                    "baseline_shape": base["shape"],
+                    "current_shape": cur["shape"],
+                }
+            )
+    return findings
+
+
+@app.command()
+def run(
+    db_url: str = typer.Option(..., help="Target database to replay against"),
+    data_source: Optional[str] = typer.Option(None, help="Only replay history from this data source"),
+    since: Optional[str] = typer.Option(None, help="Only replay history at or after this ISO timestamp"),
+    history: Optional[Path] = typer.Option(None, help="query_history SQLite file (default: sqlspeak_logs.db)"),
+    mode: str = typer.Option("concurrent", help="concurrent | recorded (original inter-arrival timing)"),
+    concurrency: int = typer.Option(4, help="Worker threads"),
+    repeat: int = typer.Option(3, help="Concurrent mode: executions per statement (median is kept)"),
+    speed: float = typer.Option(1.0, help="Recorded mode: time compression factor (10 = ten times faster)"),
+    timeout_ms: int = typer.Option(30_000, help="Postgres statement_timeout per execution"),
+    select_only: bool = typer.Option(True, help="Skip anything that is not SELECT/WITH"),
+    baseline: Optional[Path] = typer.Option(None, help="Baseline JSON to diff against"),
+    save_baseline: Optional[Path] = typer.Option(None, help="Write this run as a new baseline"),
+    slower_ratio: float = typer.Option(1.5, help="Flag statements slower than baseline × ratio"),
+    min_delta_ms: float = typer.Option(5.0, help="...and slower by at least this many ms"),
+    fail_on_regression: bool = typer.Option(False, help="Exit 1 when regressions are found (for CI)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Turn real traffic into a regression suite: replay distinct successful
+    statements from query_history, capture EXPLAIN plans and timings, and
+    flag statements that got slower or changed plan since the baseline.
+    """
+    if mode not in ("concurrent", "recorded"):
+        raise typer.BadParameter("mode must be 'concurrent' or 'recorded'")
+    if history is not None:
+        history_db.LOG_DB_PATH = history
+
+    workloads = extract_workload(data_source, since, select_only)
+    typer.echo(f"⏱  Replaying {len(workloads)} distinct statements ({mode})...", err=True)
+    timings, errors = replay(db_url, workloads, mode, concurrency, repeat, speed, timeout_ms)
+
+    current: Dict[str, Dict[str, Any]] = {}
+    for wl in workloads:
+        error = errors.get(wl.key)
+        observed = timings[wl.key]
+        try:
+            plan = _plan(db_url, wl.sql)
+        except Exception as e:
+            plan = {"plan": None, "shape": None, "total_cost": None}
+            error = error or str(e).splitlines()[0]
+        current[wl.key] = {
+            "sql": wl.sql,
+            "data_source": wl.data_source,
+            "occurrences": len(wl.occurrences),
+            "recorded_median_ms": statistics.median(wl.recorded_ms) if wl.recorded_ms else None,
+            "median_ms": statistics.median(observed) if observed else None,
+            "max_ms": max(observed) if observed else None,
+            "error": error,
+            **plan,
+        }
+
+    findings: List[Dict[str, Any]] = []
+    if baseline is not None:
+        with baseline.open(encoding="utf-8") as f:
+            findings = compare(current, json.load(f)["statements"], slower_ratio, min_delta_ms)
+        for item in findings:
+            typer.secho(
+                f"⚠ {item['key']}: {item['baseline_ms']} → {item['current_ms']} ms"
+                f"{' (plan changed)' if item['plan_changed'] else ''}",
+                fg=typer.colors.YELLOW,
+                err=True,
+            )
+
+    report = {
+        "label": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "target": get_engine(db_url).url.render_as_string(hide_password=True),
+        "mode": mode,
+        "statements": current,
+        "regressions": findings,
+    }
+    if save_baseline is not None:
+        save_baseline.write_text(json.dumps(report, indent=2, default=str))
+        typer.secho(f"✅ Baseline written to {save_baseline}", fg=typer.colors.GREEN, err=True)
+
+    text_report = json.dumps(report, indent=2, default=str)
+    if out:
+        out.write_text(text_report)
+    elif save_baseline is None:
+        typer.echo(text_report)
+
+    if fail_on_regression and findings:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
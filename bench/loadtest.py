@@ -0,0 +1,347 @@
+# bench/loadtest.py
+
+import asyncio
+import json
+import platform
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import typer
+
+from core import generation_cache as gen_cache
+from core.models import UserContext
+from core.providers import set_providers
+
+from .fakes import FakeProvider, latency_distribution
+from .fixtures import build_sqlite_fixture, isolated_history, sqlite_url
+from .stats import git_revision, percentile
+
+app = typer.Typer(help="HTTP load generator for the SQL-Speak API (fake providers, stubbed auth)")
+
+DATA_SOURCE = "loadtest"
+LOADTEST_USER = UserContext(id="loadtest", display_name="Load Test", roles=["admin"])
+
+_QUESTIONS = [
+    "Show the most recent records",
+    "Top customers by amount",
+    "Count records by status",
+    "Average amount per month",
+]
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    latency_ms: float
+    ok: bool
+
+
+def _parse_levels(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def _parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """'query=0.6,chat=0.3,download=0.1' -> [('query', 0.6), ...]"""
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("query", "chat", "download"):
+            raise typer.BadParameter(f"Unknown endpoint in mix: {name!r}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def _resolve_source(
+    db_url: Optional[str],
+    tables: int,
+    rows: int,
+    result_rows: int,
+    sql: Optional[str],
+    profile: Optional[str],
+) -> Tuple[str, str, str]:
+    """(conn_str, fake provider SQL, profile) for a SQLite fixture or a given database."""
+    if db_url is None:
+        conn_str = sqlite_url(build_sqlite_fixture(tables=tables, rows=rows))
+        default_sql = f"SELECT * FROM facts ORDER BY id LIMIT {result_rows};"
+        default_profile = "sqlite-dev"
+    else:
+        # Assumes the generator's benchmark schema (python -m generator.cli generate)
+        conn_str = db_url
+        default_sql = (
+            "SELECT id, customer_id, order_total, status, created_at "
+            f"FROM orders ORDER BY id LIMIT {result_rows};"
+        )
+        default_profile = "benchmark-postgres"
+    return conn_str, sql or default_sql, profile or default_profile
+
+
+def prepare_app(conn_str: str, sql: str, latency: str, seed: int, generation_cache: bool = False):
+    """
+    The FastAPI app with stubbed auth, a single data source and a fake provider.
+    Installs the fake provider process-wide. Unless `generation_cache`, every
+    request pays the provider latency (the questions repeat).
+    """
+    from api.app import app as api_app
+    from api.auth import get_current_user
+    from api.dependencies import AppConfig, get_config, get_user_context
+
+    api_app.dependency_overrides[get_config] = lambda: AppConfig(data_sources={DATA_SOURCE: conn_str})
+    api_app.dependency_overrides[get_user_context] = lambda: LOADTEST_USER
+    api_app.dependency_overrides[get_current_user] = lambda: LOADTEST_USER
+    set_providers([FakeProvider(name="fake-copilot", sql=sql, latency_s=latency_distribution(latency, seed))])
+    if not generation_cache:
+        gen_cache.set_max_entries(0)
+    return api_app
+
+
+def _request(endpoint: str, question: str, profile: str) -> Tuple[str, Dict[str, Any]]:
+    if endpoint == "chat":
+        return "/chat", {
+            "data_source": DATA_SOURCE,
+            "profile": profile,
+            "messages": [{"role": "user", "content": question}],
+        }
+    return f"/{endpoint}", {"data_source": DATA_SOURCE, "profile": profile, "query": question}
+
+
+def _picker(mix: List[Tuple[str, float]], rng: random.Random) -> Callable[[], Tuple[str, str]]:
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def pick() -> Tuple[str, str]:
+        return rng.choices(names, weights)[0], rng.choice(_QUESTIONS)
+
+    return pick
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, question: str, profile: str, started: float) -> Sample:
+    path, payload = _request(endpoint, question, profile)
+    try:
+        resp = await client.post(path, json=payload)
+        ok = resp.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    return Sample(endpoint=endpoint, latency_ms=(perf_counter() - started) * 1000.0, ok=ok)
+
+
+async def closed_loop(
+    client: httpx.AsyncClient,
+    users: int,
+    duration_s: float,
+    pick: Callable[[], Tuple[str, str]],
+    profile: str,
+    think_ms: float,
+) -> List[Sample]:
+    """`users` virtual users, each sending its next request when the previous one returns."""
+    deadline = perf_counter() + duration_s
+    samples: List[Sample] = []
+
+    async def user() -> None:
+        while perf_counter() < deadline:
+            endpoint, question = pick()
+            samples.append(await _send(client, endpoint, question, profile, perf_counter()))
+            if think_ms > 0:
+                await asyncio.sleep(think_ms / 1000.0)
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    return samples
+
+
+async def open_loop(
+    client: httpx.AsyncClient,
+    rate: float,
+    duration_s: float,
+    pick: Callable[[], Tuple[str, str]],
+    profile: str,
+    rng: random.Random,
+) -> List[Sample]:
+    """
+    Poisson arrivals at `rate` requests/s regardless of completions. Latency
+    is measured from the scheduled send time, so a backed-up server is not
+    hidden by the generator slowing down (no coordinated omission).
+    """
+    start = perf_counter()
+    next_at = start
+    tasks = []
+    while next_at < start + duration_s:
+        delay = next_at - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint, question = pick()
+        tasks.append(asyncio.create_task(_send(client, endpoint, question, profile, next_at)))
+        next_at += rng.expovariate(rate)
+    return list(await asyncio.gather(*tasks))
+
+
+def _summarize_level(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    def block(group: List[Sample]) -> Dict[str, Any]:
+        latencies = [s.latency_ms for s in group if s.ok]
+        errors = sum(1 for s in group if not s.ok)
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": errors / len(group) if group else 0.0,
+            "throughput_per_s": len(latencies) / elapsed_s if elapsed_s > 0 else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+
+    summary = block(samples)
+    summary["by_endpoint"] = {
+        name: block([s for s in samples if s.endpoint == name])
+        for name in sorted({s.endpoint for s in samples})
+    }
+    return summary
+
+
+async def _run_levels(
+    client: httpx.AsyncClient,
+    mode: str,
+    levels: List[float],
+    duration_s: float,
+    mix: List[Tuple[str, float]],
+    profile: str,
+    think_ms: float,
+    seed: int,
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    pick = _picker(mix, rng)
+
+    # Warm pools, schema reflection and the threadpool before measuring
+    for _ in range(5):
+        endpoint, question = pick()
+        await _send(client, endpoint, question, profile, perf_counter())
+
+    curve = []
+    for level in levels:
+        typer.echo(f"⏱  {mode} level={level:g} for {duration_s:g}s...", err=True)
+        start = perf_counter()
+        if mode == "closed":
+            samples = await closed_loop(client, int(level), duration_s, pick, profile, think_ms)
+        else:
+            samples = await open_loop(client, level, duration_s, pick, profile, rng)
+        curve.append({"level": level, **_summarize_level(samples, perf_counter() - start)})
+    return curve
+
+
+def _capacity(curve: List[Dict[str, Any]], slo_p99_ms: float, max_error_rate: float) -> Optional[Dict[str, Any]]:
+    """Highest-throughput level that still meets the p99 and error-rate targets."""
+    healthy = [
+        point
+        for point in curve
+        if point["p99_ms"] <= slo_p99_ms and point["error_rate"] <= max_error_rate
+    ]
+    if not healthy:
+        return None
+    best = max(healthy, key=lambda p: p["throughput_per_s"])
+    return {"level": best["level"], "throughput_per_s": best["throughput_per_s"], "p99_ms": best["p99_ms"]}
+
+
+@app.command()
+def run(
+    url: Optional[str] = typer.Option(None, help="Target a running server (see `serve`); default runs the app in-process"),
+    mode: str = typer.Option("closed", help="closed (N concurrent users) | open (fixed arrival rate)"),
+    levels: str = typer.Option("1,2,4,8,16,32", help="Users (closed) or requests/s (open) per step of the curve"),
+    duration: float = typer.Option(10.0, help="Seconds per level"),
+    mix: str = typer.Option("query=0.6,chat=0.3,download=0.1", help="Endpoint weights"),
+    think_ms: float = typer.Option(0.0, help="Closed loop: pause between a user's requests"),
+    latency: str = typer.Option("lognormal:80:0.5", help="Fake provider latency (const:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA | exp:MEAN)"),
+    db_url: Optional[str] = typer.Option(None, help="Data source URL (e.g. local Postgres); default is a generated SQLite fixture"),
+    tables: int = typer.Option(10, help="SQLite fixture: number of tables"),
+    rows: int = typer.Option(100_000, help="SQLite fixture: rows in the facts table"),
+    result_rows: int = typer.Option(100, help="Rows returned per request by the default fake SQL"),
+    sql: Optional[str] = typer.Option(None, help="SQL the fake provider returns (overrides the default)"),
+    generation_cache: bool = typer.Option(False, help="Reuse generated SQL for repeated questions (off: every request pays the provider latency)"),
+    profile: Optional[str] = typer.Option(None, help="Execution profile (default: sqlite-dev / benchmark-postgres)"),
+    timeout: float = typer.Option(30.0, help="Per-request timeout in seconds"),
+    slo_p99_ms: float = typer.Option(1000.0, help="p99 target used to derive the capacity number"),
+    max_error_rate: float = typer.Option(0.01, help="Error-rate target used to derive the capacity number"),
+    seed: int = typer.Option(0, help="Seed for arrivals, endpoint mix and provider latency"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Step through load levels and report latency percentiles, error rates, the
+    saturation curve and the resulting capacity (requests/s within the SLO).
+    """
+    if mode not in ("closed", "open"):
+        raise typer.BadParameter("mode must be 'closed' or 'open'")
+    level_values = _parse_levels(levels)
+    endpoint_mix = _parse_mix(mix)
+
+    async def main(transport: Optional[httpx.AsyncBaseTransport], base_url: str, profile: str) -> List[Dict[str, Any]]:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            timeout=timeout,
+            limits=limits,
+        ) as client:
+            return await _run_levels(client, mode, level_values, duration, endpoint_mix, profile, think_ms, seed)
+
+    if url:
+        # Providers, data source and auth stubs live in the `serve` process
+        profile = profile or ("sqlite-dev" if db_url is None else "benchmark-postgres")
+        curve = asyncio.run(main(None, url, profile))
+    else:
+        conn_str, fake_sql, profile = _resolve_source(db_url, tables, rows, result_rows, sql, profile)
+        with isolated_history():
+            transport = httpx.ASGITransport(app=prepare_app(conn_str, fake_sql, latency, seed, generation_cache))
+            curve = asyncio.run(main(transport, "http://loadtest", profile))
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target": url or "in-process",
+        "mode": mode,
+        "duration_s": duration,
+        "generation_cache": generation_cache,
+        "mix": dict(endpoint_mix),
+        "provider_latency": None if url else latency,
+        "slo_p99_ms": slo_p99_ms,
+        "max_error_rate": max_error_rate,
+        "capacity": _capacity(curve, slo_p99_ms, max_error_rate),
+        "curve": curve,
+    }
+    text = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1"),
+    port: int = typer.Option(8000),
+    latency: str = typer.Option("lognormal:80:0.5", help="Fake provider latency spec (see `run --help`)"),
+    db_url: Optional[str] = typer.Option(None, help="Data source URL; default is a generated SQLite fixture"),
+    tables: int = typer.Option(10, help="SQLite fixture: number of tables"),
+    rows: int = typer.Option(100_000, help="SQLite fixture: rows in the facts table"),
+    result_rows: int = typer.Option(100, help="Rows returned per request by the default fake SQL"),
+    sql: Optional[str] = typer.Option(None, help="SQL the fake provider returns (overrides the default)"),
+    generation_cache: bool = typer.Option(False, help="Reuse generated SQL for repeated questions (off: every request pays the provider latency)"),
+    seed: int = typer.Option(0),
+):
+    """
+    Run the API under uvicorn with fake providers and stubbed auth, as a
+    target for `run --url` (keeps the load generator off the server's CPU).
+    """
+    import uvicorn
+
+    conn_str, fake_sql, _ = _resolve_source(db_url, tables, rows, result_rows, sql, None)
+    with isolated_history():
+        uvicorn.run(prepare_app(conn_str, fake_sql, latency, seed, generation_cache), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,135 @@
+# bench/partitions.py
+
+import json
+import platform
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import typer
+from sqlalchemy import text
+
+from core.db import get_engine
+from core.engine import _apply_profile_policies
+from core.profiles import get_profile
+from generator.generators import DEFAULT_AS_OF
+
+from .stats import git_revision
+
+app = typer.Typer(help="Partition pruning vs flat layout on generated benchmark databases")
+
+# Time-bounded questions the way an LLM tends to write them: literal bounds
+# relative to the data's reference time. {d0} = as-of date.
+QUERIES = {
+    "orders_last_month": (
+        "SELECT COUNT(*), SUM(order_total) FROM orders "
+        "WHERE created_at >= '{m1}' AND created_at < '{m0}'"
+    ),
+    "revenue_by_day_last_week": (
+        "SELECT date_trunc('day', created_at) AS day, SUM(order_total) FROM orders "
+        "WHERE created_at >= '{w1}' AND created_at < '{d0}' GROUP BY 1 ORDER BY 1"
+    ),
+    "top_products_last_quarter": (
+        "SELECT p.category, SUM(oi.quantity * oi.unit_price) AS revenue "
+        "FROM order_items oi JOIN products p ON p.id = oi.product_id "
+        "WHERE oi.created_at >= '{q1}' AND oi.created_at < '{d0}' "
+        "GROUP BY p.category ORDER BY revenue DESC"
+    ),
+    "failed_payments_last_month": (
+        "SELECT payment_method, COUNT(*) FROM payments "
+        "WHERE status = 'failed' AND created_at >= '{m1}' AND created_at < '{m0}' GROUP BY 1"
+    ),
+    "orders_all_time": "SELECT status, COUNT(*) FROM orders GROUP BY 1",
+}
+
+
+def render_queries(as_of: datetime) -> Dict[str, str]:
+    d0 = as_of.date()
+    m0 = d0.replace(day=1)
+    m1 = (m0 - timedelta(days=1)).replace(day=1)
+    bounds = {
+        "d0": d0.isoformat(),
+        "m0": m0.isoformat(),
+        "m1": m1.isoformat(),
+        "w1": (d0 - timedelta(days=7)).isoformat(),
+        "q1": (d0 - timedelta(days=91)).isoformat(),
+    }
+    return {name: sql.format(**bounds) for name, sql in QUERIES.items()}
+
+
+def _scanned(node: Dict[str, Any]) -> List[str]:
+    found = [node["Relation Name"]] if "Relation Name" in node else []
+    for child in node.get("Plans", []):
+        found += _scanned(child)
+    return found
+
+
+def measure(conn_str: str, sql: str, repeat: int) -> Dict[str, Any]:
+    """EXPLAIN ANALYZE `repeat` times; median execution time, last run's buffers and scans."""
+    engine = get_engine(conn_str)
+    timings, plan = [], None
+    with engine.connect() as conn:
+        try:
+            for _ in range(repeat):
+                raw = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql.rstrip(';')}")).scalar()
+                plan = (raw if isinstance(raw, list) else json.loads(raw))[0]
+                timings.append(plan["Execution Time"])
+        finally:
+            conn.rollback()
+    root = plan["Plan"]
+    return {
+        "median_ms": statistics.median(timings),
+        "planning_ms": plan.get("Planning Time"),
+        "shared_blocks": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "relations_scanned": len(_scanned(root)),
+    }
+
+
+@app.command()
+def run(
+    flat_url: str = typer.Option(..., help="Database generated with the flat layout"),
+    partitioned_url: str = typer.Option(..., help="Same data generated with --partition-by"),
+    as_of: datetime = typer.Option(DEFAULT_AS_OF, help="The --as-of both databases were generated with"),
+    profile: str = typer.Option("benchmark-postgres", help="Profile whose policies (auto LIMIT) are applied"),
+    repeat: int = typer.Option(5, help="EXPLAIN ANALYZE runs per query and layout"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Run time-bounded benchmark questions against both layouts and compare
+    execution time, buffers touched and relations scanned (pruning).
+    """
+    prof = get_profile(profile)
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, raw_sql in render_queries(as_of).items():
+        sql = _apply_profile_policies(raw_sql, prof)
+        flat = measure(flat_url, sql, repeat)
+        part = measure(partitioned_url, sql, repeat)
+        speedup = flat["median_ms"] / part["median_ms"] if part["median_ms"] else None
+        results[name] = {"sql": sql, "flat": flat, "partitioned": part, "speedup": speedup}
+        typer.echo(
+            f"   {name}: flat {flat['median_ms']:.1f}ms / {flat['shared_blocks']} blocks, "
+            f"partitioned {part['median_ms']:.1f}ms / {part['shared_blocks']} blocks "
+            f"({part['relations_scanned']} relations scanned)",
+            err=True,
+        )
+
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "profile": prof.name,
+        "as_of": as_of.isoformat(),
+        "queries": results,
+    }
+    text_report = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text_report)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text_report)
+
+
+if __name__ == "__main__":
+    app()
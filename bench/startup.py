@@ -0,0 +1,117 @@
+# bench/startup.py
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+import typer
+
+from .fixtures import FIXTURE_DIR, build_sqlite_fixture
+from .stats import git_revision, summarize
+
+app = typer.Typer(help="CLI startup latency: import, time-to-prompt and time-to-first-result")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WORK_DIR = (FIXTURE_DIR / "startup").resolve()
+
+# One CLI call with the provider chain replaced by a fake (no network)
+_FIRST_RESULT = """
+import sys
+from bench.fakes import FakeProvider, fake_providers
+import main
+with fake_providers(FakeProvider(sql="SELECT * FROM facts LIMIT 10;")):
+    main.app(["Show 10 facts", "--db", sys.argv[1], "--yes"], standalone_mode=False)
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    env["SQLSPEAK_CACHE_DIR"] = str(WORK_DIR / "cache")
+    return env
+
+
+def time_process(args: List[str], stdin: str = "", expect: Optional[str] = None) -> float:
+    """Wall time in ms of one fresh interpreter running `args` (cwd = WORK_DIR, so history stays there)."""
+    started = perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *args], input=stdin, capture_output=True, text=True, cwd=WORK_DIR, env=_env()
+    )
+    elapsed = (perf_counter() - started) * 1000.0
+    if expect is not None and expect not in proc.stdout:
+        raise RuntimeError(f"{' '.join(args[:2])} failed (exit {proc.returncode}): {proc.stderr[-500:]}")
+    return elapsed
+
+
+def bench_case(name: str, runs: int, fn, before=None) -> Dict[str, Any]:
+    latencies = []
+    started = perf_counter()
+    for _ in range(runs):
+        if before:
+            before()
+        latencies.append(fn())
+    return {"case": name, "runs": runs, **summarize(latencies, perf_counter() - started)}
+
+
+@app.command()
+def run(
+    tables: int = typer.Option(200, help="Tables in the SQLite fixture (schema reflection cost grows with it)"),
+    runs: int = typer.Option(10, help="Fresh processes per case"),
+    label: Optional[str] = typer.Option(None, help="Version label recorded in the report (default: git revision)"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Start main.py in fresh interpreters and time import, --help, the query
+    prompt, and a first result with a cold and a warm on-disk schema cache.
+    Compare reports across versions to catch import-time regressions.
+    """
+    WORK_DIR.mkdir(parents=True, exist_ok=True)
+    db = str(build_sqlite_fixture(tables=tables, rows=1_000).resolve())
+    main_py = str(REPO_ROOT / "main.py")
+
+    def clear_cache() -> None:
+        shutil.rmtree(WORK_DIR / "cache", ignore_errors=True)
+
+    results = [
+        bench_case("python", runs, lambda: time_process(["-c", "pass"])),
+        bench_case("import main", runs, lambda: time_process(["-c", "import main"])),
+        bench_case("--help", runs, lambda: time_process([main_py, "--help"], expect="Usage")),
+        # Stdin is closed, so the process exits right after showing the prompt
+        bench_case("time to prompt", runs, lambda: time_process([main_py, "--db", db], expect="Enter your")),
+        bench_case(
+            "time to first result (cold schema cache)", runs,
+            lambda: time_process(["-c", _FIRST_RESULT, db], expect="Query Results"), before=clear_cache,
+        ),
+        bench_case(
+            "time to first result (warm schema cache)", runs,
+            lambda: time_process(["-c", _FIRST_RESULT, db], expect="Query Results"),
+        ),
+    ]
+    for result in results:
+        typer.echo(f"   {result['case']}: p50 {result['p50_ms']:.0f}ms, max {result['max_ms']:.0f}ms", err=True)
+
+    report = {
+        "label": label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tables": tables,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(text)
+
+
+if __name__ == "__main__":
+    app()
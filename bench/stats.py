@@ -0,0 +1,42 @@
+# bench/stats.py
+
+import math
+import subprocess
+from typing import Any, Dict, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies_ms: Sequence[float], elapsed_s: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles for one benchmark case."""
+    count = len(latencies_ms)
+    return {
+        "iterations": count,
+        "throughput_per_s": count / elapsed_s if elapsed_s > 0 else 0.0,
+        "mean_ms": sum(latencies_ms) / count if count else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms) if latencies_ms else 0.0,
+    }
+
+
+def git_revision() -> str:
+    """Short commit id of the tree being measured, or 'unknown'."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return out.stdout.strip() or "unknown"
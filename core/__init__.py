@@ -1,2 +1,22 @@
-from .engine import run_one_shot_query, get_schema_snapshot
-from .models import UserContext, QueryResult, SchemaInfo
+# Re-exports resolve on first access, so importing a light submodule
+# (core.profiles, core.models) doesn't pull in SQLAlchemy via core.engine.
+from importlib import import_module
+
+_EXPORTS = {
+    "run_one_shot_query": "engine",
+    "run_profiled_query": "engine",
+    "get_schema_snapshot": "engine",
+    "prepare_query": "engine",
+    "execute_query": "engine",
+    "UserContext": "models",
+    "QueryResult": "models",
+    "SchemaInfo": "models",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,13 @@
 # core/copilot.py
 
+import logging
 import subprocess
 from typing import Optional
 
+from .logging import verbose_enabled
+
+logger = logging.getLogger(__name__)
+
 def get_sql_from_copilot(user_query: str, schema_context: str) -> Optional[str]:
     prompt = (
         "You are an assistant that ONLY writes valid SQL queries.\n"
@@ -23,8 +28,10 @@ def get_sql_from_copilot(user_query: str, schema_context: str) -> Optional[str]:
         raw_out = result.stdout.strip()
         raw_err = result.stderr.strip()
 
-        print("COPILOT STDOUT:", repr(raw_out))
-        print("COPILOT STDERR:", repr(raw_err))
+        if verbose_enabled(logger):
+            logger.debug(
+                "copilot exit=%s stdout=%r stderr=%r", result.returncode, raw_out, raw_err
+            )
 
         if result.returncode != 0 or not raw_out:
             return None
@@ -45,5 +52,5 @@ def get_sql_from_copilot(user_query: str, schema_context: str) -> Optional[str]:
         cleaned = cleaned.strip().strip('"').strip("'").strip()
         return cleaned
     except subprocess.SubprocessError as e:
-        print(f"Error calling Copilot: {e}")
+        logger.warning("error calling copilot: %s", e)
         return None
@@ -1,10 +1,29 @@
 # core/db.py
 
-from typing import Dict
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.engine import Engine
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine, make_url
+
+from . import generation_cache, schema_cache
+
+# A schema context cached in process is checked against the database's schema
+# version at most this often (0 = on every use); on backends without a schema
+# version it is reflected again after this long
+SCHEMA_CHECK_S = float(os.getenv("SQLSPEAK_SCHEMA_CHECK_S", "5"))
+
+
+@dataclass
+class _CachedSchema:
+    context: str
+    version: Optional[str]
+    checked_at: float
+
 
 _engine_cache: Dict[str, Engine] = {}
+_schema_cache: Dict[str, _CachedSchema] = {}
 
 
 def get_engine(conn_str: str) -> Engine:
@@ -13,12 +32,70 @@ def get_engine(conn_str: str) -> Engine:
     return _engine_cache[conn_str]
 
 
-def get_schema_context(conn_str: str) -> str:
+def warm_engine(conn_str: str) -> Engine:
     """
-    Very simple schema description string for Copilot.
-    Later, you can make this richer (columns, types, sample rows).
+    A new engine with one tested connection already in its pool. Not
+    registered: install_engine() makes it the one get_engine() returns.
+    Raises if the database can't be reached.
     """
-    engine = get_engine(conn_str)
+    engine = create_engine(conn_str, future=True)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        engine.dispose()
+        raise
+    return engine
+
+
+def fill_pool(engine: Engine, connections: int) -> int:
+    """
+    Open up to `connections` connections at once (at most the pool size) and
+    return them to the pool, so the first requests don't pay for connecting.
+    Returns how many were opened.
+    """
+    size = getattr(engine.pool, "size", lambda: connections)()
+    opened = []
+    try:
+        for _ in range(min(connections, size)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+def install_engine(conn_str: str, engine: Engine) -> Engine:
+    """Register `engine` for conn_str unless one is already in use; returns the registered one."""
+    current = _engine_cache.setdefault(conn_str, engine)
+    if current is not engine:
+        engine.dispose()
+    return current
+
+
+def invalidate(conn_str: str) -> Optional[Engine]:
+    """
+    Forget everything cached for one connection string: its engine, its
+    schema context (in process and on disk) and the SQL generated against
+    it. Returns the engine (if any) so
+    the caller decides when to dispose it; connections still checked out
+    keep working until they are returned.
+    """
+    _schema_cache.pop(conn_str, None)
+    schema_cache.drop(conn_str)
+    generation_cache.invalidate(conn_str)
+    return _engine_cache.pop(conn_str, None)
+
+
+def detect_db_type(conn_str: str) -> str:
+    """'sqlite', 'postgres', or the SQLAlchemy backend name for anything else."""
+    backend = make_url(conn_str).get_backend_name()
+    return "postgres" if backend == "postgresql" else backend
+
+
+def _reflect_schema(engine: Engine) -> str:
     insp = inspect(engine)
 
     schema_parts = []
@@ -27,3 +104,42 @@ def get_schema_context(conn_str: str) -> str:
         schema_parts.append(f"Table '{table_name}' ({', '.join(cols)})")
 
     return "; ".join(schema_parts)
+
+
+def get_schema_context(conn_str: str, refresh: bool = False) -> str:
+    """
+    Very simple schema description string for Copilot.
+    Later, you can make this richer (columns, types, sample rows).
+    Cached in process per connection string, and on disk (core.schema_cache),
+    while the database's schema version is unchanged; the version is checked
+    at most every SCHEMA_CHECK_S seconds. `refresh` reflects again.
+    """
+    entry = _schema_cache.get(conn_str)
+    now = time.monotonic()
+    if not refresh and entry is not None and now - entry.checked_at < SCHEMA_CHECK_S:
+        return entry.context
+
+    engine = get_engine(conn_str)
+    with engine.connect() as conn:
+        version = schema_cache.schema_version(conn, detect_db_type(conn_str))
+    if not refresh and version is not None:
+        if entry is not None and entry.version == version:
+            entry.checked_at = now
+            return entry.context
+        cached = schema_cache.load(conn_str, version) if schema_cache.ENABLED else None
+        if cached is not None:
+            _schema_cache[conn_str] = _CachedSchema(cached, version, now)
+            return cached
+
+    context = _reflect_schema(engine)
+    if version and schema_cache.ENABLED:
+        schema_cache.store(conn_str, version, context)
+    _schema_cache[conn_str] = _CachedSchema(context, version, now)
+    return context
+
+
+def clear_schema_cache(conn_str: Optional[str] = None) -> None:
+    if conn_str is None:
+        _schema_cache.clear()
+    else:
+        _schema_cache.pop(conn_str, None)
@@ -1,27 +1,32 @@
 # core/engine.py
 
+import asyncio
+import json
 import logging
-from dataclasses import dataclass
+import os
+import threading
+from dataclasses import asdict, dataclass, replace
+from functools import partial
 from time import perf_counter
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
 
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
-from .db import get_engine, get_schema_context
+from . import generation_cache
+from .db import detect_db_type, get_engine, get_schema_context
+from .export import RowWriter
 from .profiles import get_profile, Profile
-from .logging import log_query, QueryLogEvent
+from .logging import log_query, QueryLogEvent, verbose_enabled
 from .models import UserContext, QueryResult, SchemaInfo
-from .copilot import get_sql_from_copilot
-from core.perplexity_sql import generate_sql as perplexity_generate_sql, PerplexitySQLError
+from .profiler import current_profile, profile_request, should_profile
+from .providers import CopilotError, ProviderError, get_providers  # CopilotError kept importable from here
+from .singleflight import Cancelled, SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
-class CopilotError(Exception):
-    """Wrapper for Copilot-specific failures."""
-    pass
-
 def _apply_profile_policies(sql: str, profile: Profile) -> str:
     sql_stripped = sql.strip().rstrip(";")
     upper = sql_stripped.upper()
@@ -37,136 +42,574 @@ def _apply_profile_policies(sql: str, profile: Profile) -> str:
     return sql_stripped + ";"
 
 
-def _nl_to_sql_via_copilot(nl_query: str, conn_str: str, profile_name: str) -> str:
-    schema_context = get_schema_context(conn_str)
-    print("SCHEMA CONTEXT:", schema_context)
+def _db_type(profile: Profile, conn_str: str) -> str:
+    return detect_db_type(conn_str) if profile.db_type == "auto" else profile.db_type
 
-    sql = get_sql_from_copilot(nl_query, schema_context)
-    print("COPILOT RETURNED (cleaned):", repr(sql))
 
-    if not sql:
-        # treat empty output as an error so we can fall back
-        raise CopilotError("Empty Copilot output")
+def _nl_to_sql(
+    nl_query: str, conn_str: str, profile: Profile, schema_context: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Ask each configured provider in turn (Copilot → Perplexity by default),
+    unless the same question was already answered for this schema (see
+    core.generation_cache). Returns (raw_sql, provider_name); raises the
+    last ProviderError if all fail.
+    """
+    if schema_context is None:
+        schema_context = get_schema_context(conn_str)
+    db_type = _db_type(profile, conn_str)
+    key = generation_cache.make_key(conn_str, profile.name, db_type, schema_context, nl_query)
+    cached = generation_cache.get(key)
+    if cached is not None:
+        return cached
 
-    return sql
+    if verbose_enabled(logger):
+        logger.debug("sql request profile=%s schema_context=%s", profile.name, schema_context)
 
+    last_error: Optional[ProviderError] = None
+    for provider in get_providers():
+        try:
+            sql = provider.generate_sql(nl_query, schema_context, db_type)
+        except ProviderError as e:
+            logger.warning("provider failed, falling back provider=%s error=%s", provider.name, e)
+            last_error = e
+            continue
+        logger.debug("provider returned provider=%s sql=%r", provider.name, sql)
+        generation_cache.put(key, sql, provider.name)
+        return sql, provider.name
 
-def run_one_shot_query(
+    raise last_error or ProviderError("No SQL providers configured")
+
+
+@dataclass
+class PreparedQuery:
+    """SQL generated for a question with profile policies applied, not yet executed."""
+    nl_query: str
+    sql: str
+    provider: str
+    profile: Profile
+    generation_ms: float
+
+
+def prepare_query(
+    nl_query: str, conn_str: str, profile_name: str, schema_context: Optional[str] = None
+) -> PreparedQuery:
+    """
+    Generation half of run_one_shot_query, so a caller (the CLI) can show or
+    confirm the SQL before execute_query(). Raises ProviderError if no
+    provider produced SQL and ValueError if the profile rejects it.
+    `schema_context` replaces the reflected schema (core.session adds the
+    previous turn to it).
+    """
+    profile = get_profile(profile_name)
+    start = perf_counter()
+    raw_sql, provider_name = _nl_to_sql(nl_query, conn_str, profile, schema_context)
+    return PreparedQuery(
+        nl_query=nl_query,
+        sql=_apply_profile_policies(raw_sql, profile),
+        provider=provider_name,
+        profile=profile,
+        generation_ms=(perf_counter() - start) * 1000.0,
+    )
+
+
+def prime_generation_cache(conn_str: str, asked: List[Tuple[str, str, str]]) -> int:
+    """
+    Seed core.generation_cache with SQL that already ran successfully, as
+    (profile_name, nl_query, sql) from query history, keyed by the current
+    schema context, so those questions skip the provider after a restart.
+    Statements other than queries and unknown profiles are skipped.
+    Returns the number of entries added.
+    """
+    schema_context = get_schema_context(conn_str)
+    added = 0
+    for profile_name, nl_query, sql in asked:
+        if not _is_query(sql):
+            continue
+        try:
+            profile = get_profile(profile_name)
+        except ValueError:
+            continue
+        key = generation_cache.make_key(conn_str, profile.name, _db_type(profile, conn_str), schema_context, nl_query)
+        if generation_cache.get(key) is None:
+            generation_cache.put(key, sql, "history")
+            added += 1
+    return added
+
+
+def _log_event(
     user: UserContext,
     data_source: str,
     profile_name: str,
     nl_query: str,
-    conn_str: Optional[str] = None,
+    sql: str,
+    status: str,
+    row_count: Optional[int],
+    duration_ms: float,
+    meta: Optional[Dict[str, Any]] = None,
+) -> None:
+    log_query(
+        QueryLogEvent(
+            timestamp=datetime.utcnow(),
+            user_id=user.id,
+            data_source=data_source,
+            profile=profile_name,
+            nl_query=nl_query,
+            generated_sql=sql,
+            status=status,
+            row_count=row_count,
+            execution_time_ms=duration_ms,
+            meta=meta or {},
+        )
+    )
+
+
+@dataclass
+class QueryPlan:
+    """
+    A statement's plan as display lines, with the planner's top-level cost
+    and row estimates where the backend reports them (Postgres). `analyzed`
+    plans come from the real execution and carry actual times and rows.
+    """
+    lines: List[str]
+    total_cost: Optional[float] = None
+    estimated_rows: Optional[int] = None
+    analyzed: bool = False
+
+    def summary(self) -> str:
+        parts = []
+        if self.total_cost is not None:
+            parts.append(f"estimated cost {self.total_cost:,.2f}")
+        if self.estimated_rows is not None:
+            parts.append(f"~{self.estimated_rows:,} rows")
+        return ", ".join(parts) or "no cost estimates for this backend"
+
+
+def _pg_plan_lines(node: Dict[str, Any], depth: int = 0) -> List[str]:
+    label = node.get("Node Type", "?")
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    line = f"{'      ' * depth}{'->  ' if depth else ''}{label}  " \
+           f"(cost={node.get('Startup Cost', 0):.2f}..{node.get('Total Cost', 0):.2f} rows={node.get('Plan Rows')})"
+    if "Actual Total Time" in node:
+        line += f" (actual time={node['Actual Total Time']:.3f} rows={node.get('Actual Rows')} loops={node.get('Actual Loops')})"
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(_pg_plan_lines(child, depth + 1))
+    return lines
+
+
+def _pg_plan(doc: Dict[str, Any], analyzed: bool = False) -> QueryPlan:
+    """QueryPlan from one EXPLAIN (FORMAT JSON) / auto_explain JSON document."""
+    root = doc["Plan"]
+    return QueryPlan(
+        lines=_pg_plan_lines(root),
+        total_cost=root.get("Total Cost"),
+        estimated_rows=root.get("Plan Rows"),
+        analyzed=analyzed,
+    )
+
+
+def _explain(conn, sql: str, db_type: str) -> QueryPlan:
+    """Plain EXPLAIN: plans the statement without running it."""
+    statement = sql.strip().rstrip(";")
+    if db_type == "postgres":
+        raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        return _pg_plan((raw if isinstance(raw, list) else json.loads(raw))[0])
+
+    if db_type == "sqlite":
+        depth: Dict[int, int] = {}
+        lines = []
+        for node_id, parent, _, detail in conn.execute(text(f"EXPLAIN QUERY PLAN {statement}")):
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append(f"{'   ' * depth[node_id]}{detail}")
+        return QueryPlan(lines=lines)
+
+    rows = conn.execute(text(f"EXPLAIN {statement}"))
+    return QueryPlan(lines=[" | ".join(str(v) for v in row) for row in rows])
+
+
+def explain_plan(conn_str: str, sql: str) -> QueryPlan:
+    """Plan preview for the CLI: plain EXPLAIN, so the statement is not executed."""
+    with get_engine(conn_str).connect() as conn:
+        try:
+            return _explain(conn, sql, detect_db_type(conn_str))
+        finally:
+            conn.rollback()
+
+
+_AUTO_EXPLAIN_SETTINGS = (
+    "auto_explain.log_min_duration = 0",
+    "auto_explain.log_analyze = on",
+    "auto_explain.log_buffers = on",
+    "auto_explain.log_format = json",
+    "client_min_messages = log",  # the plan comes back as a notice on this connection
+)
+
+
+def _enable_auto_explain(conn) -> bool:
+    """
+    Postgres: have auto_explain report the executed plan of the next
+    statement in this transaction. False if the module can't be loaded
+    (LOAD needs superuser unless it is in session_preload_libraries).
+    """
+    try:
+        with conn.begin_nested():
+            conn.execute(text("LOAD 'auto_explain'"))
+    except SQLAlchemyError as e:
+        logger.info("auto_explain unavailable, falling back to EXPLAIN + timing error=%s", e)
+        return False
+    for setting in _AUTO_EXPLAIN_SETTINGS:
+        conn.execute(text(f"SET LOCAL {setting}"))
+    del conn.connection.dbapi_connection.notices[:]
+    return True
+
+
+def _auto_explain_plan(conn) -> Optional[QueryPlan]:
+    for notice in reversed(conn.connection.dbapi_connection.notices):
+        _, marker, body = notice.partition("plan:")
+        if marker:
+            try:
+                return _pg_plan(json.loads(body), analyzed=True)
+            except (ValueError, KeyError):
+                return None
+    return None
+
+
+def _is_query(sql: str) -> bool:
+    return sql.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def _stream_rows(
+    columns: List[str], fetchmany: Callable[[int], Sequence[Any]], writer: RowWriter, chunk_size: int,
+    meta: Dict[str, Any],
+) -> Tuple[int, float]:
+    """
+    Feed chunks from `fetchmany` to `writer`; returns the rows fetched and
+    the milliseconds spent in the writer (formatting, the terminal or pager,
+    the file), which callers keep out of the execution time. Row conversion
+    of a profiled request is that writer time.
+    """
+    writer.start(columns)
+    fetched, complete, output_ms = 0, True, 0.0
+    while True:
+        chunk = fetchmany(chunk_size)
+        if not chunk:
+            break
+        fetched += len(chunk)
+        write_start = perf_counter()
+        more = writer.write(chunk)
+        output_ms += (perf_counter() - write_start) * 1000.0
+        if not more:
+            complete = False
+            break
+    meta.update({"columns": columns, "complete": complete, "output_ms": output_ms})
+    prof = current_profile()
+    if prof is not None:
+        prof.row_conversion_ms = output_ms
+    return fetched, output_ms
+
+
+def execute_query(
+    user: UserContext,
+    data_source: str,
+    prepared: PreparedQuery,
+    conn_str: str,
+    analyze: bool = False,
+    plan: Optional[QueryPlan] = None,
+    writer: Optional[RowWriter] = None,
+    chunk_size: int = 1000,
 ) -> QueryResult:
-    if conn_str is None:
-        raise ValueError("conn_str is required until config wiring is done")
+    """
+    Run prepared SQL on the pooled engine and log it to history. Statements
+    that return no rows are committed and report rows_affected.
 
-    profile = get_profile(profile_name)
+    With `analyze` the statement still runs once: on Postgres auto_explain
+    captures the executed plan (actual rows and times), elsewhere, or without
+    auto_explain, the plain EXPLAIN estimates are kept next to the measured
+    time. `plan` is an earlier preview to record with the run. Timings and
+    the plan go to meta and to the history entry.
 
+    With a `writer`, rows are not collected: they are fetched `chunk_size`
+    at a time (a server-side cursor on Postgres) and handed to the writer
+    until it declines more. meta then has the columns, whether the result
+    was read to the end ("complete") and the time spent in the writer
+    ("output_ms"), which execution_ms and the history entry leave out: a
+    slow terminal or a pager the user is reading is not database time. The
+    Postgres cursor, and its transaction, stay open until the writer
+    declines more rows or the result is read to the end.
+    """
     start = perf_counter()
+    run = _run_sql(prepared, conn_str, analyze, plan, writer, chunk_size)
+    # Reported time covers generation too, as for a one-shot request
+    elapsed_ms = (perf_counter() - start) * 1000.0 - run.meta.get("output_ms", 0.0)
+    return _record(user, data_source, prepared, run, prepared.generation_ms + elapsed_ms)
+
+
+@dataclass
+class _Execution:
+    """Outcome of running prepared SQL, before it is logged for a caller."""
+    status: str
+    sql: str
+    rows: List[Dict[str, Any]]
+    row_count: Optional[int]
+    meta: Dict[str, Any]
+    execution_ms: Optional[float]
+    plan: Optional[QueryPlan]
+
+
+def _run_sql(
+    prepared: PreparedQuery,
+    conn_str: str,
+    analyze: bool = False,
+    plan: Optional[QueryPlan] = None,
+    writer: Optional[RowWriter] = None,
+    chunk_size: int = 1000,
+) -> _Execution:
     status = "success"
+    sql = prepared.sql
     rows: list[Dict[str, Any]] = []
     row_count: Optional[int] = None
+    meta: Dict[str, Any] = {}
+    execution_ms: Optional[float] = None
+    output_ms = 0.0
+    db_type = detect_db_type(conn_str)  # the backend actually executing, not the prompt dialect
 
-    # --- SQL generation (Copilot → Perplexity fallback) ---
-    try:
-        # 1) Try Copilot first
-        try:
-            raw_sql = _nl_to_sql_via_copilot(nl_query, conn_str, profile_name)
-            sql = _apply_profile_policies(raw_sql, profile)
-        except CopilotError as e:
-            # generic Copilot failure – fall back to Perplexity
-            print("COPILOT failed, falling back to Perplexity:", e)
-            raise
-        except Exception as e:
-            msg = str(e)
-            # Only fall back on auth/quota-style issues; other errors bubble up
-            if (
-                "No authentication information found" in msg
-                or "Quota exceeded" in msg
-                or "You have no quota" in msg
-            ):
-                print("COPILOT auth/quota issue, falling back to Perplexity:", msg)
-                raise CopilotError(msg)
-            raise
-
-    except CopilotError:
-        # 2) Copilot unavailable -> use Perplexity
-        schema_context = get_schema_context(conn_str)
-        try:
-            raw_sql = perplexity_generate_sql(
-                schema_context,
-                nl_query=nl_query,
-                db_type=profile.db_type,
-            )
-            sql = _apply_profile_policies(raw_sql, profile)
-        except PerplexitySQLError as e:
-            logger.error(f"Perplexity SQL error: {e}")
-            status = "error"
-            sql = f"-- ERROR in SQL generation: {e}"
-            duration_ms = (perf_counter() - start) * 1000.0
-            log_query(
-                QueryLogEvent(
-                    timestamp=datetime.utcnow(),
-                    user_id=user.id,
-                    data_source=data_source,
-                    profile=profile_name,
-                    nl_query=nl_query,
-                    generated_sql=sql,
-                    status=status,
-                    row_count=0,
-                    execution_time_ms=duration_ms,
-                    meta={},
-                )
-            )
-            return QueryResult(
-                sql=sql,
-                rows=[],
-                meta={
-                    "profile": profile_name,
-                    "status": status,
-                    "execution_time_ms": duration_ms,
-                    "row_count": 0,
-                },
-            )
-
-    # --- Execute SQL ---
     try:
         engine = get_engine(conn_str)
         with engine.connect() as conn:
-            result = conn.execute(text(sql))
-            rows = [dict(r._mapping) for r in result]
-            row_count = len(rows)
+            instrumented = analyze and db_type == "postgres" and _enable_auto_explain(conn)
+            exec_start = perf_counter()
+            stream = writer is not None and db_type == "postgres" and _is_query(sql)
+            result = conn.execute(text(sql), execution_options={"stream_results": stream, "max_row_buffer": chunk_size})
+            if not result.returns_rows:
+                meta["rows_affected"] = result.rowcount
+                conn.commit()
+                row_count = 0
+            elif writer is not None:
+                row_count, output_ms = _stream_rows(list(result.keys()), result.fetchmany, writer, chunk_size, meta)
+            else:
+                prof = current_profile()
+                if prof is None:
+                    rows = [dict(r._mapping) for r in result]
+                else:
+                    convert_start = perf_counter()
+                    rows = [dict(r._mapping) for r in result]
+                    prof.row_conversion_ms = (perf_counter() - convert_start) * 1000.0
+                row_count = len(rows)
+            execution_ms = (perf_counter() - exec_start) * 1000.0 - output_ms
+            if analyze:
+                plan = (_auto_explain_plan(conn) if instrumented else None) or _explain(conn, sql, db_type)
     except Exception as exc:
         status = "error"
         rows = []
         row_count = 0
         sql = f"-- ERROR: {exc}"
+        meta["error"] = str(exc)
 
-    duration_ms = (perf_counter() - start) * 1000.0
+    return _Execution(status, sql, rows, row_count, meta, execution_ms, plan)
 
-    log_query(
-        QueryLogEvent(
-            timestamp=datetime.utcnow(),
-            user_id=user.id,
-            data_source=data_source,
-            profile=profile_name,
-            nl_query=nl_query,
-            generated_sql=sql,
-            status=status,
-            row_count=row_count,
-            execution_time_ms=duration_ms,
-            meta={},
-        )
+
+def _record(
+    user: UserContext, data_source: str, prepared: PreparedQuery, run: _Execution, duration_ms: float
+) -> QueryResult:
+    """Log `run` to history for this caller and build its result (`run` itself is not modified)."""
+    history_meta: Dict[str, Any] = {"generation_ms": prepared.generation_ms, "execution_ms": run.execution_ms}
+    if "output_ms" in run.meta:
+        history_meta["output_ms"] = run.meta["output_ms"]
+    if run.plan is not None:
+        history_meta["plan"] = asdict(run.plan)
+    _log_event(
+        user, data_source, prepared.profile.name, prepared.nl_query, run.sql, run.status, run.row_count,
+        duration_ms, history_meta,
     )
 
-    meta = {
-        "profile": profile_name,
-        "status": status,
+    meta = dict(run.meta)
+    meta.update({
+        "profile": prepared.profile.name,
+        "provider": prepared.provider,
+        "status": run.status,
         "execution_time_ms": duration_ms,
-        "row_count": row_count,
-    }
-    return QueryResult(sql=sql, rows=rows, meta=meta)
+        "row_count": run.row_count,
+        **history_meta,
+    })
+    return QueryResult(sql=run.sql, rows=list(run.rows), meta=meta)
+
+
+def log_cancelled(
+    user: UserContext, data_source: str, prepared: PreparedQuery, plan: Optional[QueryPlan] = None
+) -> None:
+    """History entry for generated SQL the user chose not to run (with the plan they saw)."""
+    _log_event(
+        user, data_source, prepared.profile.name, prepared.nl_query,
+        prepared.sql, "cancelled", 0, prepared.generation_ms,
+        {"generation_ms": prepared.generation_ms, "plan": asdict(plan)} if plan else None,
+    )
+
+
+# Threads generating and running the questions in flight (shared by identical ones)
+QUERY_WORKERS = int(os.getenv("SQLSPEAK_QUERY_WORKERS", "40"))
+
+# Identical questions in flight at the same time share one generation and run
+_in_flight = SingleFlight(max_workers=QUERY_WORKERS)
+
+
+def _flight_key(data_source: str, conn_str: str, profile_name: str, nl_query: str) -> Tuple[str, ...]:
+    return (data_source, conn_str, profile_name, generation_cache.normalize_question(nl_query))
+
+
+def _generate_and_run(nl_query: str, conn_str: str, profile_name: str) -> Tuple[PreparedQuery, Optional[_Execution]]:
+    """
+    The part of a one-shot query that identical concurrent requests share.
+    Only queries are run here; a statement with effects is returned
+    unexecuted, so each caller runs it as it would have without coalescing.
+    """
+    prepared = prepare_query(nl_query, conn_str, profile_name)
+    if not _is_query(prepared.sql):
+        return prepared, None
+    return prepared, _run_sql(prepared, conn_str)
+
+
+def _generation_failed(
+    user: UserContext, data_source: str, profile_name: str, nl_query: str, error: Exception, start: float
+) -> QueryResult:
+    logger.error("sql generation failed error=%s", error)
+    status = "error"
+    sql = f"-- ERROR in SQL generation: {error}"
+    duration_ms = (perf_counter() - start) * 1000.0
+    _log_event(user, data_source, profile_name, nl_query, sql, status, 0, duration_ms)
+    return QueryResult(
+        sql=sql,
+        rows=[],
+        meta={
+            "profile": profile_name,
+            "status": status,
+            "execution_time_ms": duration_ms,
+            "row_count": 0,
+        },
+    )
+
+
+def _cancelled(user: UserContext, data_source: str, profile_name: str, nl_query: str, start: float) -> QueryResult:
+    duration_ms = (perf_counter() - start) * 1000.0
+    sql = "-- cancelled by the caller before the result was ready"
+    _log_event(user, data_source, profile_name, nl_query, sql, "cancelled", 0, duration_ms)
+    return QueryResult(
+        sql=sql,
+        rows=[],
+        meta={"profile": profile_name, "status": "cancelled", "execution_time_ms": duration_ms, "row_count": 0},
+    )
+
+
+def _finish(
+    user: UserContext,
+    data_source: str,
+    nl_query: str,
+    conn_str: str,
+    outcome: Tuple[PreparedQuery, Optional[_Execution]],
+    shared: bool,
+    start: float,
+) -> QueryResult:
+    """
+    This caller's history entry and result for a (possibly shared) outcome.
+    The rows are copied per caller, so one caller changing its rows doesn't
+    change another's.
+    """
+    prepared, run = outcome
+    prepared = replace(prepared, nl_query=nl_query)  # the caller's wording, not the first caller's
+    if run is None:
+        return execute_query(user, data_source, prepared, conn_str)
+    run = replace(run, rows=[dict(r) for r in run.rows])
+    result = _record(user, data_source, prepared, run, (perf_counter() - start) * 1000.0)
+    if shared:
+        result.meta["coalesced"] = True
+    return result
+
+
+def run_one_shot_query(
+    user: UserContext,
+    data_source: str,
+    profile_name: str,
+    nl_query: str,
+    conn_str: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+) -> QueryResult:
+    """
+    Generate SQL for the question and run it. Concurrent calls with the same
+    data source, profile and question share one generation and execution
+    (see core.singleflight); each still gets its own history entry, and its
+    meta says "coalesced" when it reused another call's work. Any caller,
+    the first included, stops waiting once its `cancel` is set (status
+    "cancelled"); the work goes on for the others. A profiled request runs
+    its own work inline and to the end.
+    """
+    if conn_str is None:
+        raise ValueError("conn_str is required until config wiring is done")
+
+    start = perf_counter()
+    work = partial(_generate_and_run, nl_query, conn_str, profile_name)
+
+    # --- SQL generation (provider chain, Copilot → Perplexity by default) and execution ---
+    try:
+        if current_profile() is not None:
+            outcome, shared = work(), False  # a profiled request measures its own work
+        else:
+            outcome, shared = _in_flight.do(_flight_key(data_source, conn_str, profile_name, nl_query), work, cancel)
+    except ProviderError as e:
+        return _generation_failed(user, data_source, profile_name, nl_query, e, start)
+    except Cancelled:
+        return _cancelled(user, data_source, profile_name, nl_query, start)
+
+    return _finish(user, data_source, nl_query, conn_str, outcome, shared, start)
+
+
+async def run_one_shot_query_async(
+    user: UserContext,
+    data_source: str,
+    profile_name: str,
+    nl_query: str,
+    conn_str: Optional[str] = None,
+) -> QueryResult:
+    """
+    run_one_shot_query for asyncio callers; joins the same in-flight work as
+    threaded callers. Cancelling the awaiting task logs a "cancelled" entry
+    for this caller only and re-raises.
+    """
+    if conn_str is None:
+        raise ValueError("conn_str is required until config wiring is done")
+
+    start = perf_counter()
+    key = _flight_key(data_source, conn_str, profile_name, nl_query)
+    try:
+        outcome, shared = await _in_flight.do_async(key, partial(_generate_and_run, nl_query, conn_str, profile_name))
+    except ProviderError as e:
+        return await asyncio.to_thread(_generation_failed, user, data_source, profile_name, nl_query, e, start)
+    except asyncio.CancelledError:
+        # Off the loop like the other history writes; shielded so the entry is written
+        await asyncio.shield(asyncio.to_thread(_cancelled, user, data_source, profile_name, nl_query, start))
+        raise
+
+    return await asyncio.to_thread(_finish, user, data_source, nl_query, conn_str, outcome, shared, start)
+
+
+def run_profiled_query(profile_requested: bool = False, **kwargs: Any) -> QueryResult:
+    """
+    run_one_shot_query, optionally under cProfile + tracemalloc.
+
+    Profiling happens when the caller asks for it (header/flag) or the request
+    falls inside SQLSPEAK_PROFILE_SAMPLE_RATE; otherwise this is a plain call.
+    Profiled results carry peak memory and row-conversion cost in meta["profiling"].
+    """
+    if not should_profile(profile_requested):
+        return run_one_shot_query(**kwargs)
+
+    with profile_request(kwargs.get("data_source", "query")) as prof:
+        result = run_one_shot_query(**kwargs)
+    if prof is not None:
+        result.meta["profiling"] = prof.as_meta()
+    return result
 
 
 def get_schema_snapshot(
@@ -0,0 +1,327 @@
+# core/export.py
+#
+# Row writers for streamed query results. Each receives the column names
+# once, then chunks of rows as the cursor yields them, so memory stays
+# bounded by the chunk size however large the result is.
+
+import csv
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, TextIO
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+# Widest a terminal column gets; longer values are cut with "…"
+MAX_COLUMN_WIDTH = 40
+
+
+class RowWriter:
+    def start(self, columns: Sequence[str]) -> None:
+        self.columns = list(columns)
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bool:
+        """Write one chunk; False once the writer wants no more rows."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def discard(self) -> None:
+        """Close after a failed result; file writers remove what they wrote."""
+        self.close()
+
+
+# ---------------------------------------------------------------
+# Terminal
+# ---------------------------------------------------------------
+
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class TableWriter(RowWriter):
+    """
+    Grid table printed as rows arrive. Column widths come from the first
+    chunk (capped at MAX_COLUMN_WIDTH); later wider values are truncated
+    rather than re-flowing what is already on screen. Stops after
+    `max_rows` (None = no limit) or once `stopped()` (e.g. the pager quit).
+    """
+
+    def __init__(
+        self,
+        out: Callable[[str], None],
+        max_rows: Optional[int] = None,
+        stopped: Callable[[], bool] = lambda: False,
+        on_start: Callable[[], None] = lambda: None,
+    ):
+        self.out = out
+        self.max_rows = max_rows
+        self.stopped = stopped
+        self.on_start = on_start
+        self.rows = 0
+        self.truncated = False
+        self.widths: List[int] = []
+        self.numeric: List[bool] = []
+
+    def start(self, columns) -> None:
+        super().start(columns)
+        self.on_start()
+
+    def _line(self, values: Sequence[str]) -> str:
+        cells = []
+        for value, width, numeric in zip(values, self.widths, self.numeric):
+            value = value.replace("\n", " ")
+            if len(value) > width:
+                value = value[: width - 1] + "…"
+            cells.append(value.rjust(width) if numeric else value.ljust(width))
+        return "| " + " | ".join(cells) + " |"
+
+    def _rule(self, char: str = "-") -> str:
+        return "+" + "+".join(char * (w + 2) for w in self.widths) + "+"
+
+    def write(self, rows) -> bool:
+        if not self.widths:
+            self.widths = [
+                min(MAX_COLUMN_WIDTH, max([len(c)] + [len(_cell(r[i])) for r in rows]))
+                for i, c in enumerate(self.columns)
+            ]
+            # Right-align columns whose sampled values are all numbers
+            self.numeric = [
+                all(isinstance(r[i], (int, float, Decimal)) and not isinstance(r[i], bool)
+                    for r in rows if r[i] is not None)
+                for i in range(len(self.columns))
+            ]
+            self.out(self._rule())
+            self.out(self._line(self.columns))
+            self.out(self._rule("="))
+        for row in rows:
+            if self.max_rows is not None and self.rows >= self.max_rows:
+                self.truncated = True
+                return False
+            self.out(self._line([_cell(v) for v in row]))
+            self.rows += 1
+        return not self.stopped()
+
+    def close(self) -> None:
+        if self.widths:
+            self.out(self._rule())
+
+
+class Pager:
+    """
+    Lines piped to $PAGER. Quitting the pager closes the pipe; out() then
+    reports it through `closed` so the caller stops fetching.
+    """
+
+    def __init__(self, command: str):
+        import subprocess
+
+        self.proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, text=True)
+        self.closed = False
+
+    def out(self, line: str) -> None:
+        if self.closed:
+            return
+        try:
+            self.proc.stdin.write(line + "\n")
+        except (BrokenPipeError, OSError):
+            self.closed = True
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.proc.wait()
+
+
+# ---------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return value
+
+
+class CsvWriter(RowWriter):
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+        self._file: Optional[TextIO] = None
+
+    def start(self, columns) -> None:
+        super().start(columns)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(self.columns)
+
+    def write(self, rows) -> bool:
+        self._csv.writerows(rows)
+        self.rows += len(rows)
+        return True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def discard(self) -> None:
+        self.close()
+        if self._file is not None:
+            self.path.unlink(missing_ok=True)
+
+
+class NdjsonWriter(CsvWriter):
+    def start(self, columns) -> None:
+        RowWriter.start(self, columns)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, rows) -> bool:
+        self._file.writelines(
+            json.dumps({c: _json_value(v) for c, v in zip(self.columns, row)}, default=str) + "\n"
+            for row in rows
+        )
+        self.rows += len(rows)
+        return True
+
+
+class ParquetWriter(RowWriter):
+    """
+    One row group per chunk (needs pyarrow). Arrays are built from the
+    driver's values, so Decimal, datetime and date columns keep decimal128,
+    timestamp and date32 types. Column types are inferred from the first
+    chunk; a later chunk that doesn't fit them widens the column (integers
+    to float64, decimals to enough digits for both, anything else to text)
+    and the row groups already written are rewritten with the wider schema.
+    Values are only ever cast safely, so a type is never narrowed on the way in.
+    """
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.rows = 0
+        self._writer = None
+        self.schema = None
+
+    def _infer(self, values):
+        pa = self.pa
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return self._text(values)  # mixed Python types: text
+        # All-NULL columns are written as text
+        return array if not pa.types.is_null(array.type) else pa.array(values, pa.string())
+
+    def _text(self, values):
+        # Booleans as Arrow casts them, so rewritten and new row groups agree
+        return self.pa.array(
+            [None if v is None else str(v).lower() if isinstance(v, bool) else str(_json_value(v)) for v in values],
+            self.pa.string(),
+        )
+
+    def _numeric(self, t) -> bool:
+        return self.pa.types.is_integer(t) or self.pa.types.is_floating(t)
+
+    def _wider(self, current, incoming):
+        """Narrowest type holding values of both, or None when only text does."""
+        pa = self.pa
+        if pa.types.is_decimal(current) or pa.types.is_decimal(incoming):
+            digits, scale = 0, 0
+            for t in (current, incoming):
+                if pa.types.is_decimal(t):
+                    digits, scale = max(digits, t.precision - t.scale), max(scale, t.scale)
+                elif pa.types.is_integer(t):
+                    digits = max(digits, 19)  # any int64
+                else:
+                    return None
+            if digits + scale <= 38:
+                return pa.decimal128(digits + scale, scale)
+            return pa.decimal256(digits + scale, scale) if digits + scale <= 76 else None
+        if self._numeric(current) and self._numeric(incoming):
+            return pa.float64()
+        return None
+
+    def _column(self, values, field):
+        """(array, widened type or None) for one column of a later chunk."""
+        pa = self.pa
+        if pa.types.is_string(field.type):
+            return self._text(values), None
+        if all(v is None for v in values):
+            return pa.array(values, field.type), None
+        array = self._infer(values)
+        if pa.types.is_decimal(field.type) and pa.types.is_integer(array.type):
+            array = pa.array([None if v is None else Decimal(v) for v in values])  # their digits, not int64's
+        if array.type == field.type:
+            return array, None
+        wider = self._wider(field.type, array.type)
+        if wider is None:
+            return self._text(values), pa.string()
+        try:
+            return array.cast(field.type, safe=True), None  # e.g. 2.0 into an integer column
+        except pa.ArrowInvalid:
+            return array.cast(wider, safe=True), wider
+
+    def _widen(self, schema) -> None:
+        """Rewrite the row groups written so far with `schema`, one at a time."""
+        self._writer.close()
+        old = self.path.with_name(self.path.name + ".widening")
+        self.path.replace(old)
+        try:
+            self._writer = self.pq.ParquetWriter(self.path, schema, compression="zstd")
+            written = self.pq.ParquetFile(old)
+            for i in range(written.num_row_groups):
+                self._writer.write_table(written.read_row_group(i).cast(schema, safe=True))
+        finally:
+            old.unlink()
+        self.schema = schema
+
+    def write(self, rows) -> bool:
+        columns = [
+            [bytes(v) if isinstance(v, memoryview) else v for v in values] for values in zip(*rows)
+        ] if rows else [[] for _ in self.columns]
+        if self._writer is None:
+            arrays = [self._infer(values) for values in columns]
+            self.schema = self.pa.schema([self.pa.field(c, a.type) for c, a in zip(self.columns, arrays)])
+            self._writer = self.pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        else:
+            arrays, schema = [], self.schema
+            for i, (values, field) in enumerate(zip(columns, self.schema)):
+                array, wider = self._column(values, field)
+                if wider is not None:
+                    schema = schema.set(i, self.pa.field(field.name, wider))
+                arrays.append(array)
+            if schema is not self.schema:
+                self._widen(schema)
+        self._writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(rows)
+        return True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def discard(self) -> None:
+        self.close()
+        if self._writer is not None:
+            self.path.unlink(missing_ok=True)
+
+
+def file_writer(fmt: str, path: Path) -> RowWriter:
+    if fmt == "csv":
+        return CsvWriter(path)
+    if fmt == "ndjson":
+        return NdjsonWriter(path)
+    if fmt == "parquet":
+        return ParquetWriter(path)
+    raise ValueError(f"Unknown output format {fmt!r}; choose one of: {', '.join(EXPORT_FORMATS)}")
+
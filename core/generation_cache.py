@@ -0,0 +1,82 @@
+# core/generation_cache.py
+#
+# Generated SQL by (connection, profile, dialect, schema context, question),
+# so asking the same question against an unchanged schema skips the
+# provider round trip. The schema context is part of the key: a schema
+# change, or a follow-up whose context carries the previous turn, never
+# reuses an answer generated for something else.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+MAX_ENTRIES = int(os.getenv("SQLSPEAK_GENERATION_CACHE_SIZE", "1000"))
+
+Key = Tuple[str, str, str, str, str]
+
+_max_entries = MAX_ENTRIES
+_entries: "OrderedDict[Key, Tuple[str, str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize_question(nl_query: str) -> str:
+    """Case and whitespace don't make a different question."""
+    return " ".join(nl_query.split()).casefold()
+
+
+def make_key(conn_str: str, profile_name: str, db_type: str, schema_context: str, nl_query: str) -> Key:
+    digest = hashlib.sha256(schema_context.encode("utf-8")).hexdigest()
+    return (conn_str, profile_name, db_type, digest, normalize_question(nl_query))
+
+
+def get(key: Key) -> Optional[Tuple[str, str]]:
+    """(raw_sql, provider_name) generated earlier for this key, if any."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def put(key: Key, raw_sql: str, provider_name: str) -> None:
+    if _max_entries <= 0:
+        return
+    with _lock:
+        _entries[key] = (raw_sql, provider_name)
+        _entries.move_to_end(key)
+        while len(_entries) > _max_entries:
+            _entries.popitem(last=False)
+
+
+def set_max_entries(max_entries: int) -> int:
+    """
+    Resize the cache (0 turns it off and empties it). Returns the previous
+    size so benchmarks that time the provider round trip can restore it.
+    """
+    global _max_entries
+    previous = _max_entries
+    with _lock:
+        _max_entries = max_entries
+        while len(_entries) > max(max_entries, 0):
+            _entries.popitem(last=False)
+    return previous
+
+
+def invalidate(conn_str: str) -> int:
+    """Drop the entries of one connection string; returns how many there were."""
+    with _lock:
+        stale = [k for k in _entries if k[0] == conn_str]
+        for k in stale:
+            del _entries[k]
+        return len(stale)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> Dict[str, int]:
+    return {"entries": len(_entries), "max_entries": _max_entries}
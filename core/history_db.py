@@ -1,13 +1,20 @@
 # core/history_db.py
 
+import json
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Optional, Tuple
 
 from .logging import QueryLogEvent
 
 LOG_DB_PATH = Path("sqlspeak_logs.db")
 
+# Writers in this process take turns here rather than in SQLite's busy
+# handler, whose sleeps add up when many requests finish at once (e.g. a
+# burst of coalesced requests, see core.singleflight)
+_write_lock = threading.Lock()
+
 
 def init_history_db() -> None:
     conn = sqlite3.connect(LOG_DB_PATH)
@@ -24,16 +31,31 @@ def init_history_db() -> None:
                 generated_sql TEXT NOT NULL,
                 status TEXT NOT NULL,
                 row_count INTEGER,
-                execution_time_ms REAL
+                execution_time_ms REAL,
+                meta TEXT
             )
             """
         )
+        _migrate(conn)
         conn.commit()
     finally:
         conn.close()
 
 
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Bring history files created by older versions up to the current columns."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(query_history)")}
+    if "meta" not in columns:
+        # JSON: timings (generation_ms, execution_ms) and the plan, if one was taken
+        conn.execute("ALTER TABLE query_history ADD COLUMN meta TEXT")
+
+
 def insert_history_event(event: QueryLogEvent) -> None:
+    with _write_lock:
+        _insert(event)
+
+
+def _insert(event: QueryLogEvent) -> None:
     conn = sqlite3.connect(LOG_DB_PATH)
     try:
         conn.execute(
@@ -41,8 +63,8 @@ def insert_history_event(event: QueryLogEvent) -> None:
             INSERT INTO query_history (
                 timestamp, user_id, data_source, profile,
                 nl_query, generated_sql, status, row_count,
-                execution_time_ms
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                execution_time_ms, meta
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 event.timestamp.isoformat(),
@@ -54,6 +76,7 @@ def insert_history_event(event: QueryLogEvent) -> None:
                 event.status,
                 event.row_count,
                 event.execution_time_ms,
+                json.dumps(event.meta, default=str) if event.meta else None,
             ),
         )
         conn.commit()
@@ -69,7 +92,7 @@ def load_user_history(user_id: str, limit: int = 50) -> Iterable[QueryLogEvent]:
             SELECT
                 timestamp, user_id, data_source, profile,
                 nl_query, generated_sql, status, row_count,
-                execution_time_ms
+                execution_time_ms, meta
             FROM query_history
             WHERE user_id = ?
             ORDER BY id DESC
@@ -94,6 +117,7 @@ def load_user_history(user_id: str, limit: int = 50) -> Iterable[QueryLogEvent]:
         status,
         row_count,
         execution_time_ms,
+        meta,
     ) in rows:
         events.append(
             QueryLogEvent(
@@ -106,7 +130,68 @@ def load_user_history(user_id: str, limit: int = 50) -> Iterable[QueryLogEvent]:
                 status=status,
                 row_count=row_count,
                 execution_time_ms=execution_time_ms,
-                meta={},
+                meta=json.loads(meta) if meta else {},
             )
         )
     return events
+
+
+def load_successful_sql(
+    data_source: Optional[str] = None,
+    since: Optional[str] = None,
+) -> List[Tuple[str, str, str, Optional[float]]]:
+    """
+    (timestamp, data_source, generated_sql, execution_time_ms) for every
+    successful query, oldest first. Error placeholders ("-- ERROR ...") are skipped.
+    """
+    clauses = ["status = 'success'", "generated_sql NOT LIKE '--%'"]
+    params: list = []
+    if data_source is not None:
+        clauses.append("data_source = ?")
+        params.append(data_source)
+    if since is not None:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+
+    conn = sqlite3.connect(LOG_DB_PATH)
+    try:
+        cur = conn.execute(
+            f"""
+            SELECT timestamp, data_source, generated_sql, execution_time_ms
+            FROM query_history
+            WHERE {" AND ".join(clauses)}
+            ORDER BY id
+            """,
+            params,
+        )
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def load_frequent_questions(limit: int = 50) -> List[Tuple[str, str, str, str, int]]:
+    """
+    (data_source, profile, nl_query, generated_sql, times_asked) for the most
+    asked questions that last succeeded, most asked first. The SQL is the one
+    from the latest successful run.
+    """
+    conn = sqlite3.connect(LOG_DB_PATH)
+    try:
+        cur = conn.execute(
+            """
+            SELECT h.data_source, h.profile, h.nl_query, h.generated_sql, f.asked
+            FROM (
+                SELECT MAX(id) AS last_id, COUNT(*) AS asked
+                FROM query_history
+                WHERE status = 'success' AND generated_sql NOT LIKE '--%'
+                GROUP BY data_source, profile, nl_query
+            ) f
+            JOIN query_history h ON h.id = f.last_id
+            ORDER BY f.asked DESC, f.last_id DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        return cur.fetchall()
+    finally:
+        conn.close()
@@ -1,10 +1,27 @@
 # core/logging.py
 
+import atexit
+import logging
+import os
+import queue
+import random
 from dataclasses import dataclass
 from datetime import datetime
 from collections import defaultdict, deque
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional, Dict as TDict, Deque, List
 
+logger = logging.getLogger(__name__)
+
+# Loggers owned by SQL-Speak; everything created via logging.getLogger(__name__)
+# in these packages inherits the queue handler configured below.
+_APP_LOGGERS = ("core", "api", "generator")
+_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+_listener: Optional[QueueListener] = None
+_verbose_sample_rate: float = 1.0
+
+
 @dataclass
 class QueryLogEvent:
     timestamp: datetime
@@ -19,6 +36,72 @@ class QueryLogEvent:
     meta: Dict[str, Any]
 
 
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+
+    The stock handler renders the message in the calling thread; we only pass
+    immutable values (str/int/float) as log args, so formatting can safely be
+    left to the listener thread and the request path only pays for a put().
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+) -> None:
+    """
+    Route SQL-Speak logs through a non-blocking queue to stderr.
+
+    - level: LOG_LEVEL env var, default INFO. DEBUG enables schema/prompt dumps.
+    - sample_rate: SQLSPEAK_LOG_SAMPLE_RATE env var (0..1), default 1.0.
+      Fraction of requests for which verbose (debug) dumps are emitted.
+    Safe to call more than once; later calls only update level and sampling.
+    """
+    global _listener, _verbose_sample_rate
+
+    level_name = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_level = logging.getLevelName(level_name)
+    if not isinstance(log_level, int):
+        log_level = logging.INFO
+
+    if sample_rate is None:
+        sample_rate = float(os.getenv("SQLSPEAK_LOG_SAMPLE_RATE", "1.0"))
+    _verbose_sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    for name in _APP_LOGGERS:
+        logging.getLogger(name).setLevel(log_level)
+
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    for name in _APP_LOGGERS:
+        app_logger = logging.getLogger(name)
+        app_logger.addHandler(queue_handler)
+        app_logger.propagate = False
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def verbose_enabled(log: logging.Logger) -> bool:
+    """
+    True when `log` is at DEBUG and this call falls inside the sampling rate.
+    Guard large dumps (schema context, prompts, raw provider output) with it.
+    """
+    if not log.isEnabledFor(logging.DEBUG):
+        return False
+    return _verbose_sample_rate >= 1.0 or random.random() < _verbose_sample_rate
+
+
 _HISTORY_LIMIT = 50
 _user_history: TDict[str, Deque[QueryLogEvent]] = defaultdict(
     lambda: deque(maxlen=_HISTORY_LIMIT)
@@ -27,11 +110,15 @@ _user_history: TDict[str, Deque[QueryLogEvent]] = defaultdict(
 def log_query(event: QueryLogEvent) -> None:
     from .history_db import insert_history_event  # lazy import to avoid cycles
 
-    print(
-        f"[QUERY] {event.timestamp.isoformat()} | user={event.user_id} "
-        f"ds={event.data_source} profile={event.profile} "
-        f"status={event.status} rows={event.row_count} "
-        f"time_ms={event.execution_time_ms}"
+    logger.info(
+        "query ts=%s user=%s ds=%s profile=%s status=%s rows=%s time_ms=%s",
+        event.timestamp,
+        event.user_id,
+        event.data_source,
+        event.profile,
+        event.status,
+        event.row_count,
+        event.execution_time_ms,
     )
     _user_history[event.user_id].appendleft(event)
     insert_history_event(event)
@@ -1,10 +1,9 @@
 # core/perplexity_sql.py
 
 import os
+import threading
 from typing import Optional
 
-import requests
-
 
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
@@ -15,6 +14,29 @@ class PerplexitySQLError(Exception):
     pass
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """One requests.Session per process, so calls reuse the TLS connection."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests  # deferred: only needed when Perplexity is actually called
+
+                _session = requests.Session()
+    return _session
+
+
+def warm() -> None:
+    """Open the HTTPS connection to the API ahead of the first question (no-op without a key)."""
+    if not PERPLEXITY_API_KEY:
+        return
+    _get_session().head(PERPLEXITY_API_URL, timeout=5)
+
+
 def generate_sql(schema_context: str, nl_query: str, db_type: str = "postgres") -> str:
     """
     Call Perplexity to generate a single SQL statement for the given schema + NL query.
@@ -60,7 +82,7 @@ Rules:
         "max_tokens": 512,
     }
 
-    resp = requests.post(PERPLEXITY_API_URL, json=payload, headers=headers, timeout=30)
+    resp = _get_session().post(PERPLEXITY_API_URL, json=payload, headers=headers, timeout=30)
     if resp.status_code != 200:
         raise PerplexitySQLError(
             f"Perplexity API error {resp.status_code}: {resp.text[:500]}"
@@ -0,0 +1,147 @@
+# core/profiler.py
+
+import cProfile
+import logging
+import os
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("SQLSPEAK_PROFILE_DIR", "profiles"))
+PROFILE_KEEP = int(os.getenv("SQLSPEAK_PROFILE_KEEP", "50"))
+PROFILE_SAMPLE_RATE = float(os.getenv("SQLSPEAK_PROFILE_SAMPLE_RATE", "0"))
+
+# tracemalloc is process-wide, so only one request is profiled at a time.
+_profile_lock = threading.Lock()
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "sqlspeak_request_profile", default=None
+)
+
+
+@dataclass
+class RequestProfile:
+    label: str
+    wall_ms: float = 0.0
+    row_conversion_ms: float = 0.0
+    peak_memory_bytes: int = 0
+    profile_path: Optional[str] = None
+    _profiler: Optional[cProfile.Profile] = field(default=None, repr=False)
+    _paused_ms: float = field(default=0.0, repr=False)
+
+    def as_meta(self) -> Dict[str, Any]:
+        return {
+            "wall_ms": self.wall_ms,
+            "row_conversion_ms": self.row_conversion_ms,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "profile_path": self.profile_path,
+        }
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """The profile of the request running in this context, if any."""
+    return _active.get()
+
+
+@contextmanager
+def paused() -> Iterator[None]:
+    """
+    Leave the block out of the current profile, cProfile and wall time
+    alike (e.g. a prompt waiting for the user). No-op when not profiling.
+    """
+    prof = _active.get()
+    if prof is None or prof._profiler is None:
+        yield
+        return
+    prof._profiler.disable()
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        prof._paused_ms += (perf_counter() - start) * 1000.0
+        prof._profiler.enable()
+
+
+def should_profile(requested: bool = False) -> bool:
+    if requested:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _safe_label(label: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in label)[:40]
+
+
+def _write_profile(profiler: cProfile.Profile, label: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    path = PROFILE_DIR / f"{stamp}-{_safe_label(label)}.prof"
+    profiler.dump_stats(str(path))
+
+    # Rotate: keep only the newest PROFILE_KEEP dumps
+    dumps = sorted(PROFILE_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    if PROFILE_KEEP > 0:
+        for old in dumps[:-PROFILE_KEEP]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    return path
+
+
+@contextmanager
+def profile_request(label: str) -> Iterator[Optional[RequestProfile]]:
+    """
+    Run the block under cProfile and tracemalloc.
+
+    Yields the RequestProfile being filled in, or None when another request is
+    already being profiled (the block then runs unprofiled).
+    The .prof dump is written to PROFILE_DIR and can be opened with pstats/snakeviz.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.info("profiling skipped label=%s reason=busy", label)
+        yield None
+        return
+
+    prof = RequestProfile(label=label)
+    token = _active.set(prof)
+    already_tracing = tracemalloc.is_tracing()
+    if already_tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    prof._profiler = profiler
+    start = perf_counter()
+    profiler.enable()
+    try:
+        yield prof
+    finally:
+        profiler.disable()
+        prof.wall_ms = (perf_counter() - start) * 1000.0 - prof._paused_ms
+        prof._profiler = None
+        _, prof.peak_memory_bytes = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        _active.reset(token)
+        try:
+            prof.profile_path = str(_write_profile(profiler, label))
+        except OSError as exc:
+            logger.warning("could not write profile label=%s error=%s", label, exc)
+        finally:
+            _profile_lock.release()
+        logger.info(
+            "profiled label=%s wall_ms=%.1f peak_bytes=%s path=%s",
+            label,
+            prof.wall_ms,
+            prof.peak_memory_bytes,
+            prof.profile_path,
+        )
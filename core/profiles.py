@@ -7,9 +7,17 @@ class Profile:
     read_only: bool = True
     auto_limit: Optional[int] = 100
     explain: bool = False
-    db_type: str = "sqlite"
+    db_type: str = "sqlite"  # "auto": detected from the connection string
 
 _PROFILES: Dict[str, Profile] = {
+    # CLI default: no policies, dialect taken from --db
+    "default": Profile(
+        name="default",
+        read_only=False,
+        auto_limit=None,
+        explain=False,
+        db_type="auto",
+    ),
     "sqlite-dev": Profile(
         name="sqlite-dev",
         read_only=False,
@@ -27,7 +35,7 @@ _PROFILES: Dict[str, Profile] = {
     # NEW: benchmark-postgres profile
     "benchmark-postgres": Profile(
         name="benchmark-postgres",
-        read_only=False,
+        read_only=True,
         auto_limit=100,
         explain=True,
         db_type="postgres",
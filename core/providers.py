@@ -0,0 +1,92 @@
+# core/providers.py
+
+from typing import List, Sequence
+
+from . import generation_cache
+from .copilot import get_sql_from_copilot
+from .perplexity_sql import generate_sql as perplexity_generate_sql, warm as perplexity_warm, PerplexitySQLError
+
+
+class ProviderError(Exception):
+    """A provider could not produce SQL; the engine falls back to the next one."""
+    pass
+
+
+class CopilotError(ProviderError):
+    """Wrapper for Copilot-specific failures."""
+    pass
+
+
+# Copilot exceptions worth falling back on; anything else bubbles up
+_COPILOT_FALLBACK_MARKERS = (
+    "No authentication information found",
+    "Quota exceeded",
+    "You have no quota",
+)
+
+
+class SQLProvider:
+    """
+    Text-to-SQL backend. Implementations return raw SQL (profile policies are
+    applied by the engine) or raise ProviderError to hand over to the next one.
+    """
+
+    name = "provider"
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        raise NotImplementedError
+
+    def warm(self) -> None:
+        """Open clients/connections ahead of the first request (API warm-up); best effort."""
+        pass
+
+
+class CopilotProvider(SQLProvider):
+    name = "copilot"
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        try:
+            sql = get_sql_from_copilot(nl_query, schema_context)
+        except Exception as e:
+            msg = str(e)
+            if any(marker in msg for marker in _COPILOT_FALLBACK_MARKERS):
+                raise CopilotError(msg) from e
+            raise
+
+        if not sql:
+            # treat empty output as an error so we can fall back
+            raise CopilotError("Empty Copilot output")
+        return sql
+
+
+class PerplexityProvider(SQLProvider):
+    name = "perplexity"
+
+    def generate_sql(self, nl_query: str, schema_context: str, db_type: str) -> str:
+        try:
+            return perplexity_generate_sql(schema_context, nl_query=nl_query, db_type=db_type)
+        except PerplexitySQLError as e:
+            raise ProviderError(str(e)) from e
+
+    def warm(self) -> None:
+        perplexity_warm()
+
+
+_providers: List[SQLProvider] = [CopilotProvider(), PerplexityProvider()]
+
+
+def get_providers() -> List[SQLProvider]:
+    return list(_providers)
+
+
+def set_providers(providers: Sequence[SQLProvider]) -> List[SQLProvider]:
+    """
+    Replace the provider chain (tried in order). Returns the previous chain so
+    benchmarks and evaluation harnesses can restore it. SQL cached from the
+    previous chain is dropped.
+    """
+    global _providers
+    previous = _providers
+    _providers = list(providers)
+    generation_cache.clear()
+    return previous
@@ -0,0 +1,80 @@
+# core/schema_cache.py
+#
+# On-disk cache of schema contexts, so a fresh process (each CLI call) can
+# skip reflection. Entries are keyed by a hash of the connection string and
+# only reused while the database reports the same schema version.
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("SQLSPEAK_CACHE_DIR", str(Path.home() / ".cache" / "sql-speak")))
+ENABLED = os.getenv("SQLSPEAK_SCHEMA_CACHE", "1") not in ("0", "false", "no")
+
+# Changes whenever a user table, column or type changes
+_PG_FINGERPRINT = """
+    SELECT md5(COALESCE(string_agg(
+        c.oid::text || ':' || c.relname || ':' || a.attname || ':' || a.atttypid::text,
+        ',' ORDER BY c.oid, a.attnum), ''))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid
+    WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg_toast%'
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND a.attnum > 0 AND NOT a.attisdropped
+"""
+
+
+def schema_version(conn, db_type: str) -> Optional[str]:
+    """
+    Cheap schema version: SQLite's PRAGMA schema_version (bumped by every
+    DDL), a catalog fingerprint on Postgres, None where unsupported.
+    """
+    from sqlalchemy import text
+
+    if db_type == "sqlite":
+        return str(conn.execute(text("PRAGMA schema_version")).scalar())
+    if db_type == "postgres":
+        return conn.execute(text(_PG_FINGERPRINT)).scalar()
+    return None
+
+
+def _path(conn_str: str) -> Path:
+    return CACHE_DIR / f"schema-{hashlib.sha256(conn_str.encode()).hexdigest()[:32]}.json"
+
+
+def load(conn_str: str, version: str) -> Optional[str]:
+    try:
+        entry = json.loads(_path(conn_str).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != version:
+        return None
+    return entry.get("context")
+
+
+def store(conn_str: str, version: str, context: str) -> None:
+    """Best effort: an unwritable cache directory only costs the next reflection."""
+    path = _path(conn_str)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({"version": version, "context": context}), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("schema cache not written path=%s error=%s", path, e)
+
+
+def drop(conn_str: str) -> None:
+    try:
+        _path(conn_str).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("schema cache not removed conn=%s error=%s", _path(conn_str).name, e)
@@ -0,0 +1,314 @@
+# core/session.py
+#
+# Multi-turn conversations. A session keeps the pooled engine, the schema
+# context and the previous turn, so a follow-up ("now only 2025") sends the
+# provider the schema plus one short summary of the last turn instead of the
+# whole transcript. On SQLite sources the previous result is kept in an
+# in-memory SQLite table (_prev) and follow-ups that only read _prev are
+# answered locally. Anything else, and every follow-up on other databases
+# (whose SQL dialect SQLite would run with different semantics: LIKE case,
+# NULL ordering, numeric and timestamp types), runs on the database with
+# _prev expanded as a CTE.
+
+import logging
+import os
+import re
+import sqlite3
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, time
+from decimal import Decimal
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set
+
+from .db import detect_db_type, get_schema_context
+from .engine import (
+    PreparedQuery, QueryPlan, _is_query, _log_event, _stream_rows, execute_query, explain_plan, log_cancelled,
+    prepare_query,
+)
+from .export import RowWriter
+from .models import QueryResult, UserContext
+
+logger = logging.getLogger(__name__)
+
+PREV = "_prev"
+
+# Larger results are not copied into the session cache (follow-ups then use the CTE)
+MAX_CACHED_ROWS = int(os.getenv("SQLSPEAK_SESSION_CACHE_ROWS", "50000"))
+
+# Rows per fetchmany() when a local answer is streamed
+CHUNK_ROWS = 1000
+
+# Above this size, follow-up prompts list untouched tables by name only
+COMPACT_SCHEMA_CHARS = 4000
+
+_SCHEMA_ENTRY = re.compile(r"Table '([^']+)' \(([^)]*)\)")
+
+
+@dataclass
+class Turn:
+    """What the next prompt needs to know about the last answered question."""
+    question: str
+    sql: str           # as generated (may read _prev)
+    database_sql: str  # runnable on the database (_prev expanded)
+    columns: List[str]
+    row_count: int
+
+
+def _sqlite_value(value: Any) -> Any:
+    """Values sqlite3 can bind; dates stay ISO strings so comparisons with literals still work."""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return str(value)
+
+
+def _new_cache(columns: List[str]) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    quoted = ", ".join('"' + c.replace('"', '""') + '"' for c in columns)
+    conn.execute(f"CREATE TABLE {PREV} ({quoted})")
+    return conn
+
+
+def _cache_rows(conn: sqlite3.Connection, width: int, rows) -> None:
+    conn.executemany(
+        f"INSERT INTO {PREV} VALUES ({', '.join('?' * width)})",
+        ([_sqlite_value(v) for v in row] for row in rows),
+    )
+
+
+class _CachingWriter(RowWriter):
+    """Passes streamed chunks on and copies them into a new _prev table while it stays small enough."""
+
+    def __init__(self, inner: RowWriter, max_rows: int):
+        self.inner = inner
+        self.max_rows = max_rows
+        self.columns = None
+        self._cache: Optional[sqlite3.Connection] = None
+        self._cached = 0
+
+    def start(self, columns) -> None:
+        super().start(columns)
+        self.inner.start(columns)
+        self._cache = _new_cache(self.columns)
+
+    def write(self, rows) -> bool:
+        if self._cache is not None:
+            if self._cached + len(rows) > self.max_rows:
+                self._cache.close()
+                self._cache = None
+            else:
+                _cache_rows(self._cache, len(self.columns), rows)
+                self._cached += len(rows)
+        return self.inner.write(rows)
+
+    def take_cache(self) -> Optional[sqlite3.Connection]:
+        cache, self._cache = self._cache, None
+        return cache
+
+
+class ConversationSession:
+    """One CLI conversation against one database and profile."""
+
+    def __init__(
+        self,
+        conn_str: str,
+        profile_name: str,
+        user: UserContext,
+        data_source: str,
+        max_cached_rows: int = MAX_CACHED_ROWS,
+    ):
+        self.conn_str = conn_str
+        self.profile_name = profile_name
+        self.user = user
+        self.data_source = data_source
+        self.max_cached_rows = max_cached_rows
+        # Only SQL written for SQLite means the same on the local copy of _prev
+        self.local_followups = detect_db_type(conn_str) == "sqlite"
+        self.last: Optional[Turn] = None
+        self._cache: Optional[sqlite3.Connection] = None  # holds _prev for the last turn
+
+    # ---- prompt context ----
+
+    def _tables(self, schema: str) -> Dict[str, str]:
+        return {m.group(1): m.group(0) for m in _SCHEMA_ENTRY.finditer(schema)}
+
+    def _referenced(self, sql: str, tables) -> Set[str]:
+        return {t for t in tables if re.search(rf"\b{re.escape(t)}\b", sql, re.IGNORECASE)}
+
+    def context(self) -> str:
+        """Schema context for the next question: the schema, plus the last turn if there is one."""
+        schema = get_schema_context(self.conn_str)
+        if self.last is None:
+            return schema
+
+        tables = self._tables(schema)
+        if len(schema) > COMPACT_SCHEMA_CHARS:
+            used = self._referenced(self.last.database_sql, tables)
+            others = sorted(set(tables) - used)
+            schema = "; ".join(tables[t] for t in sorted(used))
+            if others:
+                schema += f"\nOther tables (ask about them by name): {', '.join(others)}"
+
+        lines = [
+            schema,
+            "",
+            f"Previous question: {self.last.question}",
+            f"Previous SQL: {self.last.sql}",
+            f"Table '{PREV}' ({', '.join(self.last.columns)}) holds the previous result "
+            f"({self.last.row_count} rows). If the request refines that result "
+            f"(filter, sort, group, limit), select from {PREV}.",
+        ]
+        return "\n".join(lines)
+
+    # ---- turns ----
+
+    def prepare(self, question: str) -> PreparedQuery:
+        """Generate SQL for the next question. Raises like engine.prepare_query."""
+        return prepare_query(question, self.conn_str, self.profile_name, schema_context=self.context())
+
+    def reads_previous(self, sql: str) -> bool:
+        return self.last is not None and re.search(rf"\b{PREV}\b", sql) is not None
+
+    def answers_locally(self, sql: str) -> bool:
+        """True if the SQL is a query over _prev only, so the cached result is enough."""
+        if self._cache is None or not self.reads_previous(sql) or not _is_query(sql):
+            return False
+        return not self._referenced(sql, self._tables(get_schema_context(self.conn_str)))
+
+    def database_sql(self, sql: str) -> str:
+        """The SQL with _prev expanded into a CTE of the previous turn's SQL."""
+        if not self.reads_previous(sql):
+            return sql
+        prev = f"{PREV} AS ({self.last.database_sql.strip().rstrip(';')})"
+        stripped = sql.lstrip()
+        if stripped.upper().startswith("WITH "):
+            return f"WITH {prev}, {stripped[5:]}"
+        return f"WITH {prev} {stripped}"
+
+    def _local_plan(self, sql: str) -> QueryPlan:
+        rows = self._cache.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")
+        return QueryPlan(lines=[f"(previous result, in memory) {row[-1]}" for row in rows])
+
+    def explain(self, prepared: PreparedQuery) -> QueryPlan:
+        if self.answers_locally(prepared.sql):
+            try:
+                return self._local_plan(prepared.sql)
+            except sqlite3.Error:
+                pass  # run() will fall back to the database as well
+        return explain_plan(self.conn_str, self.database_sql(prepared.sql))
+
+    def cancel(self, prepared: PreparedQuery, plan: Optional[QueryPlan] = None) -> None:
+        log_cancelled(self.user, self.data_source, prepared, plan)
+
+    def run(
+        self,
+        prepared: PreparedQuery,
+        analyze: bool = False,
+        plan: Optional[QueryPlan] = None,
+        writer: Optional[RowWriter] = None,
+    ) -> QueryResult:
+        """
+        Execute a prepared turn: from the cached previous result when it only
+        reads _prev (falling back to the database if SQLite can't run it),
+        otherwise on the database. Updates the session state. `analyze`,
+        `plan` and `writer` are passed on to engine.execute_query; on SQLite
+        sources streamed rows are copied into the next _prev as they pass.
+        """
+        tee = _CachingWriter(writer, self.max_cached_rows) if writer is not None and self.local_followups else None
+        if self.answers_locally(prepared.sql):
+            try:
+                result = self._run_local(prepared, analyze, plan, tee)
+            except sqlite3.Error as e:
+                logger.info("local follow-up failed, using the database error=%s", e)
+                if tee is not None and tee.columns is not None:
+                    raise  # rows were already written; don't write them twice
+            else:
+                self._remember(prepared, result, tee)
+                return result
+
+        result = execute_query(
+            self.user, self.data_source, replace(prepared, sql=self.database_sql(prepared.sql)), self.conn_str,
+            analyze=analyze, plan=plan, writer=tee if tee is not None else writer,
+        )
+        self._remember(prepared, result, tee)
+        return result
+
+    def _run_local(
+        self, prepared: PreparedQuery, analyze: bool, plan: Optional[QueryPlan], writer: Optional[RowWriter]
+    ) -> QueryResult:
+        start = perf_counter()
+        cursor = self._cache.execute(prepared.sql.strip().rstrip(";"))
+        columns = [d[0] for d in cursor.description]
+        meta: Dict[str, Any] = {"columns": columns}
+        rows: List[Dict[str, Any]] = []
+        if writer is None:
+            rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+            row_count = len(rows)
+        else:
+            row_count, _ = _stream_rows(columns, cursor.fetchmany, writer, CHUNK_ROWS, meta)
+        execution_ms = (perf_counter() - start) * 1000.0 - meta.get("output_ms", 0.0)
+        if analyze:
+            plan = self._local_plan(prepared.sql)
+        timings = {"generation_ms": prepared.generation_ms, "execution_ms": execution_ms, "source": "session_cache"}
+        if "output_ms" in meta:
+            timings["output_ms"] = meta["output_ms"]
+        if plan is not None:
+            timings["plan"] = asdict(plan)
+        duration_ms = prepared.generation_ms + execution_ms
+        # History keeps the database form so replays don't depend on the session
+        _log_event(
+            self.user, self.data_source, prepared.profile.name, prepared.nl_query,
+            self.database_sql(prepared.sql), "success", row_count, duration_ms, timings,
+        )
+        meta.update({
+            "profile": prepared.profile.name,
+            "provider": prepared.provider,
+            "status": "success",
+            "execution_time_ms": duration_ms,
+            "row_count": row_count,
+            **timings,
+        })
+        return QueryResult(sql=prepared.sql, rows=rows, meta=meta)
+
+    def _remember(self, prepared: PreparedQuery, result: QueryResult, tee: Optional["_CachingWriter"]) -> None:
+        streamed_cache = tee.take_cache() if tee is not None else None
+        if result.meta["status"] != "success":
+            return  # keep the previous turn; the user will likely rephrase
+        if "rows_affected" in result.meta:
+            # Data changed: the previous result no longer reflects the database
+            self.last = None
+            self._drop_cache()
+            return
+
+        columns = result.meta.get("columns") or (list(result.rows[0]) if result.rows else [])
+        self.last = Turn(
+            question=prepared.nl_query,
+            sql=prepared.sql,
+            database_sql=self.database_sql(prepared.sql),
+            columns=columns,
+            row_count=result.meta["row_count"] or 0,
+        )
+        self._drop_cache()
+        if not self.local_followups:
+            return
+        if tee is not None:
+            # Only a result read to the end may stand in for the query
+            if streamed_cache is not None and result.meta.get("complete"):
+                self._cache = streamed_cache
+            elif streamed_cache is not None:
+                streamed_cache.close()
+        elif columns and len(result.rows) <= self.max_cached_rows:
+            self._cache = _new_cache(columns)
+            _cache_rows(self._cache, len(columns), ([row.get(c) for c in columns] for row in result.rows))
+
+    def _drop_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def close(self) -> None:
+        self._drop_cache()
+        self.last = None
@@ -0,0 +1,102 @@
+# core/singleflight.py
+#
+# Request coalescing: while a call for a key is in flight, callers asking
+# for the same key wait for it and share its result instead of repeating
+# the work. Nothing is kept once the call returns (that is a cache's job),
+# so a caller arriving afterwards starts a new call.
+#
+# Threads and asyncio tasks can join the same call: the first caller's fn
+# runs on the flight's own thread pool and the result is held in a
+# concurrent.futures.Future, which threads wait on and tasks await. Every
+# caller, the first included, waits the same way, so any of them can give
+# up (cancel event, task cancellation): that only detaches the caller, and
+# the call finishes for everyone else.
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# How often a waiting thread checks its cancel event
+_POLL_S = 0.05
+
+
+class Cancelled(Exception):
+    """The caller stopped waiting for a shared call (the call itself goes on)."""
+    pass
+
+
+class _Call:
+    def __init__(self):
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()  # waiters can't cancel it for the others
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, max_workers: Optional[int] = None):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="singleflight")
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> None:
+        try:
+            result = fn()
+        except BaseException as e:
+            error = e
+        else:
+            error = None
+        # Forget the call before publishing: later arrivals start afresh
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        if error is None:
+            call.future.set_result(result)
+        else:
+            call.future.set_exception(error)
+
+    def _start(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> None:
+        # fn sees the first caller's context variables, as it would inline
+        self._executor.submit(contextvars.copy_context().run, self._run, key, call, fn)
+
+    def do(
+        self, key: Hashable, fn: Callable[[], Any], cancel: Optional[threading.Event] = None
+    ) -> Tuple[Any, bool]:
+        """
+        fn()'s result, and whether it was shared with an earlier caller.
+        The first caller starts fn on the flight's thread pool; every caller
+        then blocks until it is done, or raises Cancelled once its `cancel`
+        is set. Exceptions from fn reach every caller.
+        """
+        call, leader = self._join(key)
+        if leader:
+            self._start(key, call, fn)
+        if cancel is None:
+            return call.future.result(), not leader
+        while True:
+            try:
+                return call.future.result(timeout=_POLL_S), not leader
+            except FutureTimeout:
+                if cancel.is_set():
+                    raise Cancelled(f"stopped waiting for {key!r}")
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """do() for asyncio tasks; cancelling the awaiting task detaches only that task."""
+        call, leader = self._join(key)
+        if leader:
+            self._start(key, call, fn)
+        result = await asyncio.shield(asyncio.wrap_future(call.future))
+        return result, not leader
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,62 @@
+# generator/checkpoints.py
+#
+# Load progress per seed block, written in the same transaction as the
+# block's rows: a block is either fully loaded and checkpointed, or neither.
+
+from typing import Dict, Set
+
+TABLE = "generator_checkpoints"
+
+
+def ensure_table(conn, unlogged: bool = False) -> None:
+    """
+    Create the state table. Under --fast-load it is UNLOGGED like the data
+    tables, so a crash that empties them also forgets their checkpoints.
+    """
+    kind = "UNLOGGED TABLE" if unlogged else "TABLE"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE {kind} IF NOT EXISTS {TABLE} (
+                table_name TEXT NOT NULL,
+                block_start BIGINT NOT NULL,
+                row_count BIGINT NOT NULL,
+                run_key TEXT NOT NULL,
+                loaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (table_name, block_start)
+            )
+            """
+        )
+    conn.commit()
+
+
+def reset(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {TABLE}")
+    conn.commit()
+
+
+def completed_blocks(conn, run_key: str) -> Dict[str, Set[int]]:
+    """Loaded block starts per table; refuses progress recorded under other settings."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT DISTINCT run_key FROM {TABLE}")
+        keys = {row[0] for row in cur.fetchall()}
+        if keys - {run_key}:
+            raise ValueError(
+                f"Checkpoints were written by a different run ({', '.join(sorted(keys - {run_key}))}); "
+                "resume with the same --seed/--scale/--engine/--as-of, or start over without --resume"
+            )
+        cur.execute(f"SELECT table_name, block_start FROM {TABLE}")
+        done: Dict[str, Set[int]] = {}
+        for table, block_start in cur.fetchall():
+            done.setdefault(table, set()).add(block_start)
+    return done
+
+
+def record(conn, table: str, block_start: int, row_count: int, run_key: str) -> None:
+    """Mark a block loaded; takes effect with the caller's next commit."""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {TABLE} (table_name, block_start, row_count, run_key) VALUES (%s, %s, %s, %s)",
+            (table, block_start, row_count, run_key),
+        )
@@ -1,17 +1,32 @@
+import json
+import platform
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional
+
 import typer
 import psycopg2
 from psycopg2.extras import execute_values
 from .generators import customers, products, orders, order_items, payments
+from .parallel import SEED_BLOCK, TableJob, reset_sequences, run_stages
+from .partitions import GRANULARITIES, PartitionRouter, partition_layout
+from . import checkpoints, hospital, metrics, schema, vectorized
+from .distributions import ITEMS_PER_ORDER, UNIFORM, Distributions
+from .generators import DEFAULT_AS_OF
+from .postgres import CopyLoader
+from .sinks import SINKS, PostgresSink, make_sink
 
 app = typer.Typer(help="SQL-Speak benchmark data generator (10M+ rows)")
 
 BATCH_SIZE = 100_000  # Adjust for memory/performance tradeoff
 
 
-def copy_rows(conn, table_name, columns, data_gen):
+def copy_rows(conn, table_name, columns, data_gen, batch_size=BATCH_SIZE):
     """
-    Bulk insert rows into Postgres using COPY-like efficiency via execute_values.
-    Commits in batches to avoid huge transactions.
+    Bulk insert rows with multi-row INSERTs via execute_values (--loader insert).
+    Doesn't commit: generator.parallel commits per seed block with its checkpoint.
     """
     cursor = conn.cursor()
     cols_str = ", ".join(columns)
@@ -19,22 +34,35 @@ def copy_rows(conn, table_name, columns, data_gen):
     batch = []
     for row in data_gen:
         batch.append(row)
-        if len(batch) >= BATCH_SIZE:
+        if len(batch) >= batch_size:
             execute_values(cursor,
                            f"INSERT INTO {table_name} ({cols_str}) VALUES %s",
                            batch)
-            conn.commit()
             batch.clear()
 
     if batch:
         execute_values(cursor,
                        f"INSERT INTO {table_name} ({cols_str}) VALUES %s",
                        batch)
-        conn.commit()
 
     cursor.close()
 
 
+def copy_batches(conn, table_name, columns, batches, batch_size=10_000):
+    """
+    Loader for --engine numpy: each column batch becomes one execute_values
+    call (`batch_size` rows per INSERT), so rows are never re-batched in
+    Python. Doesn't commit.
+    """
+    cols_str = ", ".join(columns)
+    with conn.cursor() as cursor:
+        for batch in batches:
+            execute_values(cursor,
+                           f"INSERT INTO {table_name} ({cols_str}) VALUES %s",
+                           vectorized.batch_rows(batch),
+                           page_size=batch_size)
+
+
 def truncate_tables(conn):
     """
     Safely truncate all benchmark tables and reset sequences.
@@ -56,69 +84,411 @@ def truncate_all(conn):
         conn.commit()
         typer.echo("🗑️  All tables truncated successfully!")
 
+TABLE_COLUMNS = {
+    "customers": ("id", "email", "full_name", "country", "created_at"),
+    "products": ("id", "name", "category", "price", "created_at"),
+    "orders": ("id", "customer_id", "order_total", "status", "created_at"),
+    "order_items": ("id", "order_id", "product_id", "quantity", "unit_price", "created_at"),
+    "payments": ("id", "order_id", "amount", "payment_method", "status", "created_at"),
+}
+
+# Postgres types per column, for binary COPY
+COLUMN_TYPES = {
+    "customers": ("int8", "text", "text", "text", "timestamptz"),
+    "products": ("int8", "text", "text", "numeric", "timestamptz"),
+    "orders": ("int8", "int8", "numeric", "text", "timestamptz"),
+    "order_items": ("int8", "int8", "int8", "int4", "numeric", "timestamptz"),
+    "payments": ("int8", "int8", "numeric", "text", "text", "timestamptz"),
+}
+
+LOADERS = ("insert", "copy", "copy-binary")
+
+TABLE_LABELS = {
+    "customers": "🚀 customers",
+    "products": "📦 products",
+    "orders": "🧾 orders",
+    "order_items": "📦 order_items",
+    "payments": "💳 payments",
+}
+
+
+ENGINES = {
+    "faker": {
+        "customers": customers.generate,
+        "products": products.generate,
+        "orders": orders.generate,
+        "order_items": order_items.generate,
+        "payments": payments.generate,
+    },
+    "numpy": {
+        "customers": vectorized.customers,
+        "products": vectorized.products,
+        "orders": vectorized.orders,
+        "order_items": vectorized.order_items,
+        "payments": vectorized.payments,
+    },
+}
+
+
+def make_loader(loader: str, engine: str, prefetch: bool = True, batch_size: Optional[int] = None):
+    """Picklable Postgres loader for --loader; `batch_size` sets rows per INSERT (insert only)."""
+    if loader == "insert":
+        load = copy_batches if engine == "numpy" else copy_rows
+        return partial(load, batch_size=batch_size) if batch_size else load
+    return CopyLoader(
+        fmt="binary" if loader == "copy-binary" else "text",
+        types=COLUMN_TYPES,
+        prefetch=prefetch,
+        batches=engine == "numpy",
+    )
+
+
+def build_stages(
+    scale: float,
+    engine: str = "faker",
+    as_of: datetime = DEFAULT_AS_OF,
+    seed: int = 0,
+    dist: Distributions = UNIFORM,
+):
+    """
+    Table jobs grouped into stages: tables in one stage are independent and
+    can load concurrently; each stage only references earlier ones.
+    """
+    base_customers = max(1, int(1_000_000 * scale))
+    base_products = 50_000
+    base_orders = max(1, int(10_000_000 * scale))
+    base_payments = base_orders
+
+    # Values shared across tables (order lines, totals, timestamps) derive from `seed` alone
+    gen = {table: partial(fn, as_of=as_of) for table, fn in ENGINES[engine].items()}
+    for table in ("products", "orders", "order_items", "payments"):
+        gen[table] = partial(gen[table], key_seed=seed)
+    for table in ("orders", "order_items", "payments"):
+        gen[table] = partial(gen[table], dist=dist, max_product_id=base_products)
+
+    return [
+        [
+            TableJob("customers", TABLE_COLUMNS["customers"], gen["customers"], base_customers),
+            TableJob("products", TABLE_COLUMNS["products"], gen["products"], base_products),
+        ],
+        [
+            TableJob(
+                "orders",
+                TABLE_COLUMNS["orders"],
+                partial(gen["orders"], num_customers=base_customers),
+                base_orders,
+            ),
+        ],
+        [
+            TableJob(
+                "order_items",
+                TABLE_COLUMNS["order_items"],
+                partial(gen["order_items"], max_order_id=base_orders),
+                base_orders * ITEMS_PER_ORDER,
+            ),
+            TableJob("payments", TABLE_COLUMNS["payments"], gen["payments"], base_payments),
+        ],
+    ]
+
+
+def echo_table_stats(stats: metrics.LoadStats) -> None:
+    typer.echo(
+        f"   {TABLE_LABELS[stats.table]}: {stats.rows:,} rows in {stats.partitions} partition(s), "
+        f"{stats.seconds:.1f}s ({stats.rows_per_s:,.0f} rows/s; "
+        f"generate {stats.gen_seconds:.1f}s, load {stats.load_seconds:.1f}s, {stats.commits} commits)"
+    )
+
+
 @app.command()
 def generate(
-    db: str = typer.Option(..., help="PostgreSQL connection string"),
-    scale: int = typer.Option(1, help="Scale factor (1 = ~10M orders)"),
+    db: Optional[str] = typer.Option(None, help="PostgreSQL connection string (required for --sink postgres)"),
+    scale: float = typer.Option(1.0, help="Scale factor (1 = ~10M orders; fractions for quick runs)"),
     truncate: bool = typer.Option(False, help="Truncate existing tables before generating"),
+    workers: int = typer.Option(1, help="Worker processes; each table's id range is split across them"),
+    seed: int = typer.Option(0, help="Base seed; every partition derives its own seed from it"),
+    engine: str = typer.Option("faker", help="faker (row by row) | numpy (vectorized column batches)"),
+    loader: str = typer.Option("copy", help="insert (execute_values) | copy | copy-binary (streaming COPY FROM STDIN)"),
+    commit_every: int = typer.Option(1_000_000, help="Rows per commit/checkpoint (whole 100k-row seed blocks)"),
+    prefetch: bool = typer.Option(True, help="COPY loaders: encode the next chunk while the current one is sent"),
+    create_schema: bool = typer.Option(False, help="Drop and recreate the benchmark tables (generator/schema.py) first"),
+    fast_load: bool = typer.Option(
+        False,
+        help="Recreate tables UNLOGGED without keys/indexes/FKs, load, then build indexes, "
+             "validate FKs, SET LOGGED and ANALYZE",
+    ),
+    index_jobs: int = typer.Option(4, help="--fast-load: concurrent index builds"),
+    as_of: datetime = typer.Option(DEFAULT_AS_OF, help="Reference 'now' for generated timestamps"),
+    resume: bool = typer.Option(False, help="Continue an interrupted run from its checkpoints (same settings)"),
+    customer_skew: float = typer.Option(0.0, help="Zipf exponent for orders per customer (0 = uniform, ~1.1 realistic)"),
+    product_skew: float = typer.Option(0.0, help="Zipf exponent for product popularity in order lines (0 = uniform)"),
+    seasonal: bool = typer.Option(False, help="Order timestamps follow yearly/weekly/daily activity curves and growth"),
+    partition_by: str = typer.Option(
+        "none",
+        help="Range-partition orders/order_items/payments on created_at: none | month | quarter | year "
+             "(with --create-schema or --fast-load)",
+    ),
+    sink: str = typer.Option("postgres", help="Output: postgres | csv | parquet | sqlite"),
+    out: Optional[str] = typer.Option(None, help="File sinks: output directory (csv, parquet) or database file (sqlite)"),
+    shard_rows: int = typer.Option(1_000_000, help="--sink csv: rows per gzip shard (rolled on 100k-row block boundaries)"),
+    row_group_rows: int = typer.Option(100_000, help="--sink parquet: rows per row group"),
+    progress: bool = typer.Option(True, help="Print rows/s and ETA per table while loading"),
+    report: Optional[Path] = typer.Option(
+        None, help="Write a JSON report (generation vs load time, bytes, commits, peak RSS per table)"
+    ),
 ):
     """
     Generate benchmark data for SQL-Speak:
     customers, products, orders, order_items, payments
     """
+    if engine not in ENGINES:
+        raise typer.BadParameter("engine must be 'faker' or 'numpy'")
+    if loader not in LOADERS:
+        raise typer.BadParameter(f"loader must be one of: {', '.join(LOADERS)}")
+    if partition_by != "none" and partition_by not in GRANULARITIES:
+        raise typer.BadParameter("partition-by must be none, month, quarter or year")
+    if sink not in SINKS:
+        raise typer.BadParameter(f"sink must be one of: {', '.join(SINKS)}")
+    if sink == "postgres" and not db:
+        raise typer.BadParameter("--db is required for --sink postgres")
+    if sink != "postgres":
+        pg_only = {"--truncate": truncate, "--create-schema": create_schema, "--fast-load": fast_load,
+                   "--resume": resume, "--partition-by": partition_by != "none"}
+        used = [flag for flag, on in pg_only.items() if on]
+        if used:
+            raise typer.BadParameter(f"{', '.join(used)} can only be used with --sink postgres")
+        if not out:
+            raise typer.BadParameter(f"--out is required for --sink {sink}")
+    layout = partition_layout(partition_by, as_of)
+    if layout.partitioned and not (create_schema or fast_load or resume):
+        raise typer.BadParameter("--partition-by needs --create-schema or --fast-load to create the partitions")
+    if engine == "numpy":
+        try:
+            vectorized.require_numpy()
+        except RuntimeError as e:
+            typer.secho(f"❌ {e}", fg=typer.colors.RED)
+            raise typer.Exit(1)
 
-    conn = psycopg2.connect(db)
+    conn = psycopg2.connect(db) if sink == "postgres" else None
+    phases = {}
 
-    if truncate:
-        truncate_tables(conn)
+    def phase(name, fn, *args, **kwargs):
+        started = perf_counter()
+        result = fn(*args, **kwargs)
+        phases[name] = perf_counter() - started
+        typer.echo(f"⏱  {name}: {phases[name]:.1f}s")
+        return result
 
-    base_customers = 1_000_000 * scale
-    base_products = 50_000
-    base_orders = 10_000_000 * scale
-    base_payments = base_orders
-
-    typer.echo("🚀 Generating customers...")
-    copy_rows(
-        conn,
-        "customers",
-        ("email", "full_name", "country", "created_at"),
-        customers.generate(base_customers),
+    # Everything that changes the generated rows; resume refuses a mismatch
+    dist = Distributions(customer_skew=customer_skew, product_skew=product_skew, seasonal=seasonal)
+    run_key = (
+        f"seed={seed};scale={scale:g};engine={engine};as_of={as_of.isoformat()};"
+        f"partition_by={partition_by};dist={customer_skew},{product_skew},{int(seasonal)}"
     )
+    done = {}
 
-    typer.echo("📦 Generating products...")
-    copy_rows(
-        conn,
-        "products",
-        ("name", "category", "price", "created_at"),
-        products.generate(base_products),
-    )
+    if resume:
+        checkpoints.ensure_table(conn, unlogged=fast_load)
+        try:
+            done = checkpoints.completed_blocks(conn, run_key)
+        except ValueError as e:
+            typer.secho(f"❌ {e}", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        typer.echo(f"⏩ Resuming: {sum(len(b) for b in done.values())} block(s) already loaded")
+    elif conn is not None:
+        if fast_load:
+            phase("create (unlogged, no indexes)", schema.create_tables, conn,
+                  unlogged=True, deferred=True, layout=layout)
+        elif create_schema:
+            phase("create", schema.create_tables, conn, layout=layout)
+        elif truncate:
+            truncate_tables(conn)
+        checkpoints.ensure_table(conn, unlogged=fast_load)
+        checkpoints.reset(conn)
 
-    typer.echo("🧾 Generating orders...")
-    copy_rows(
-        conn,
-        "orders",
-        ("customer_id", "order_total", "status", "created_at"),
-        orders.generate(base_orders, base_customers),
-    )
-    typer.echo("📦 Generating order_items...")
-    copy_rows(
-    conn,
-    "order_items",
-    ("order_id", "product_id", "quantity", "unit_price", "created_at"),
-    order_items.generate(base_orders * 3, base_orders, base_products),  # 3 items per order
-)
-    typer.echo("💳 Generating payments...")
-    copy_rows(
-        conn,
-        "payments",
-        ("order_id", "amount", "payment_method", "status", "created_at"),
-        payments.generate(base_payments),
+    def on_stage_start(stage):
+        names = ", ".join(TABLE_LABELS[job.table] for job in stage)
+        typer.echo(f"Generating {names} ({workers} worker{'s' if workers > 1 else ''})...")
+
+    if conn is not None:
+        load = make_loader(loader, engine, prefetch)
+        if layout.partitioned:
+            load = PartitionRouter(load, layout, batches=engine == "numpy")
+            typer.echo(f"🗂  Partitioned by {partition_by}: {len(layout.bounds)} ranges + default per fact table")
+        target = PostgresSink(db, load)
+    else:
+        target = make_sink(
+            sink,
+            out,
+            columns=TABLE_COLUMNS,
+            types=COLUMN_TYPES,
+            shard_rows=shard_rows,
+            row_group_rows=row_group_rows,
+            foreign_keys=tuple(schema.FOREIGN_KEYS),
+            unique=tuple((t, name, cols) for t, name, cols, kind in schema.UNIQUE_KEYS if kind == "UNIQUE"),
+            indexes=tuple(schema.INDEXES),
+            batches=engine == "numpy",
+        )
+        try:
+            target.prepare(list(TABLE_COLUMNS))
+        except ImportError as e:
+            typer.secho(f"❌ --sink {sink} needs an optional dependency: {e}", fg=typer.colors.RED)
+            raise typer.Exit(1)
+
+    stats = phase(
+        "load",
+        run_stages,
+        target,
+        build_stages(scale, engine, as_of, seed, dist),
+        workers=max(1, workers),
+        base_seed=seed,
+        on_stage_start=on_stage_start,
+        on_table_done=echo_table_stats,
+        run_key=run_key if conn is not None else None,
+        done=done,
+        commit_rows=max(commit_every, SEED_BLOCK),
+        progress=metrics.Progress(typer.echo, labels=TABLE_LABELS) if progress else None,
     )
 
+    def write_report():
+        if report:
+            settings = {"sink": sink, "engine": engine, "loader": loader, "workers": workers, "scale": scale,
+                        "seed": seed, "commit_every": commit_every, "prefetch": prefetch,
+                        "fast_load": fast_load, "partition_by": partition_by, "python": platform.python_version()}
+            metrics.write_report(report, metrics.build_report(settings, stats, phases))
+            typer.secho(f"📄 Report written to {report}", fg=typer.colors.GREEN)
+
+    if conn is None:
+        phase(f"finish ({sink})", target.finish, list(TABLE_COLUMNS))
+        write_report()
+        typer.echo(f"✅ Done generating all benchmark data into {out}")
+        return
+    reset_sequences(conn, TABLE_COLUMNS)
+
+    if fast_load:
+        phase("build indexes", schema.build_indexes, db, index_jobs, layout=layout)
+        phase("attach keys", schema.attach_keys, conn, layout)
+        phase("add foreign keys (NOT VALID)", schema.add_foreign_keys, conn, validate=False, layout=layout)
+        phase("validate foreign keys", schema.validate_foreign_keys, conn, layout)
+        phase("set logged", schema.set_logged, conn, schema.physical_tables(layout))
+        phase("analyze", schema.analyze, conn)
+        typer.echo("📊 Phases: " + ", ".join(f"{name} {secs:.1f}s" for name, secs in phases.items()))
+
+    write_report()
     typer.echo("✅ Done generating all benchmark data!")
     conn.close()
 
 
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+@app.command()
+def bench(
+    db: str = typer.Option(..., help="PostgreSQL database to load; the benchmark tables are recreated for every run"),
+    scale: float = typer.Option(0.01, help="Scale factor per run (0.01 = ~100k orders)"),
+    batch_sizes: str = typer.Option("1000,10000,100000", help="--loader insert: rows per INSERT, comma-separated"),
+    workers: str = typer.Option("1,4", help="Worker counts, comma-separated"),
+    loaders: str = typer.Option(",".join(LOADERS), help="Loaders, comma-separated"),
+    engine: str = typer.Option("faker", help="faker | numpy"),
+    seed: int = typer.Option(0, help="Base seed (every run loads identical rows)"),
+    commit_every: int = typer.Option(1_000_000, help="Rows per commit"),
+    out: Optional[Path] = typer.Option(None, help="Write the JSON report here instead of stdout"),
+):
+    """
+    Sweep loaders, worker counts and INSERT batch sizes on the same data and
+    report throughput, generation vs load time and commit latency per run.
+    COPY loaders stream rather than batch, so they run once per worker count.
+    """
+    if engine not in ENGINES:
+        raise typer.BadParameter("engine must be 'faker' or 'numpy'")
+    loader_names = [name.strip() for name in loaders.split(",") if name.strip()]
+    unknown = [name for name in loader_names if name not in LOADERS]
+    if unknown:
+        raise typer.BadParameter(f"unknown loader(s): {', '.join(unknown)}")
+    stages = build_stages(scale, engine, seed=seed)
+
+    runs: List[Dict] = []
+    for loader in loader_names:
+        for worker_count in _int_list(workers):
+            for batch_size in _int_list(batch_sizes) if loader == "insert" else [None]:
+                conn = psycopg2.connect(db)
+                try:
+                    schema.create_tables(conn)
+                finally:
+                    conn.close()
+                started = perf_counter()
+                stats = run_stages(
+                    PostgresSink(db, make_loader(loader, engine, batch_size=batch_size)),
+                    stages,
+                    workers=worker_count,
+                    base_seed=seed,
+                    commit_rows=max(commit_every, SEED_BLOCK),
+                )
+                elapsed = perf_counter() - started
+                report = metrics.build_report({}, stats, {"load": elapsed})
+                runs.append({
+                    "loader": loader,
+                    "workers": worker_count,
+                    "batch_size": batch_size,
+                    "seconds": elapsed,
+                    **{key: report[key] for key in ("rows", "rows_per_s", "gen_seconds", "load_seconds",
+                                                    "bytes_out", "peak_rss_mb")},
+                    "mean_commit_ms": {name: s.as_dict()["mean_commit_ms"] for name, s in stats.items()},
+                    "max_commit_ms": {name: 1000 * s.max_commit_seconds for name, s in stats.items()},
+                })
+                typer.echo(
+                    f"   {loader} x{worker_count}"
+                    + (f" batch={batch_size:,}" if batch_size else "")
+                    + f": {report['rows']:,} rows in {elapsed:.1f}s ({report['rows_per_s']:,.0f} rows/s; "
+                      f"generate {report['gen_seconds']:.1f}s, load {report['load_seconds']:.1f}s)",
+                    err=True,
+                )
+
+    best = max(runs, key=lambda run: run["rows_per_s"]) if runs else None
+    result = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "settings": {"scale": scale, "engine": engine, "seed": seed, "commit_every": commit_every},
+        "runs": runs,
+        "best": best,
+    }
+    if best:
+        typer.secho(
+            f"🏁 Fastest: {best['loader']} x{best['workers']}"
+            + (f" batch={best['batch_size']:,}" if best["batch_size"] else "")
+            + f" ({best['rows_per_s']:,.0f} rows/s)",
+            fg=typer.colors.GREEN,
+            err=True,
+        )
+    if out:
+        metrics.write_report(out, result)
+        typer.secho(f"✅ Report written to {out}", fg=typer.colors.GREEN, err=True)
+    else:
+        typer.echo(json.dumps(result, indent=2))
+
+
+@app.command("hospital")
+def hospital_db(
+    out: Path = typer.Option(Path("hospital_bench.db"), help="SQLite file to (re)create"),
+    scale: float = typer.Option(1.0, help="Scale factor (1 = 100k patients, 1M appointments, 1.5M prescriptions)"),
+    seed: int = typer.Option(0, help="Seed; the same settings always produce the same rows"),
+    batch_size: int = typer.Option(50_000, help="Rows per executemany() batch"),
+    as_of: datetime = typer.Option(DEFAULT_AS_OF, help="Reference 'now' for visit dates"),
+):
+    """
+    Build the hospital schema (patients, doctors, appointments, prescriptions)
+    on SQLite at a scale factor, for benchmarking the sqlite profiles offline.
+    """
+    def on_table_done(table, rows, seconds):
+        typer.echo(f"   {table}: {rows:,} rows, {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+    typer.echo(f"🩺 Building {out} at scale {scale:g}...")
+    phases = hospital.build(out, scale=scale, seed=seed, batch_size=batch_size, as_of=as_of,
+                            on_table_done=on_table_done)
+    typer.echo("📊 Phases: " + ", ".join(f"{name} {secs:.1f}s" for name, secs in phases.items()))
+    typer.echo(f"✅ Done: sqlite:///{out}")
+
+
 if __name__ == "__main__":
     app()
 # To run the CLI, use: python -m generator.cli generate --db "your_connection_string" --scale 1 --truncate
@@ -0,0 +1,266 @@
+# generator/distributions.py
+#
+# Value distributions shared by both generator engines. Everything that
+# links rows across tables (an order's customer and timestamp, its line
+# items, its total, its payment) is a pure function of (seed, id), computed
+# with a counter-based hash, so each table can be generated independently,
+# in any block order, and still agree with the others.
+
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # only the *_array helpers need it
+    np = None
+
+ITEMS_PER_ORDER = 3
+ORDER_WINDOW_DAYS = 2 * 365
+MAX_QUANTITY = 10
+PAYMENT_DELAY_S = 2 * 3600
+
+# Hash streams: one per independent quantity
+_CUSTOMER, _ORDER_TS, _ITEM_PRODUCT, _ITEM_QTY, _PRODUCT_PRICE, _PAYMENT_DELAY = range(1, 7)
+
+_MASK = (1 << 64) - 1
+_SCATTER = 0x9E3779B1  # odd multiplier spreading hot ranks over the key space
+
+# Relative activity by weekday (Mon..Sun) and hour of day, for seasonal curves
+_WEEKDAY = (1.0, 0.95, 0.95, 1.0, 1.1, 1.25, 1.15)
+_HOURLY = (
+    0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.4, 0.7, 0.9, 1.0, 1.1, 1.2,
+    1.4, 1.3, 1.1, 1.0, 1.0, 1.1, 1.3, 1.5, 1.6, 1.4, 0.9, 0.5,
+)
+
+
+@dataclass(frozen=True)
+class Distributions:
+    """Skew exponents (0 = uniform) and whether timestamps follow a seasonal curve."""
+    customer_skew: float = 0.0
+    product_skew: float = 0.0
+    seasonal: bool = False
+
+
+UNIFORM = Distributions()
+
+
+# ---------------------------------------------------------------
+# Counter-based uniforms
+# ---------------------------------------------------------------
+
+def _mix64(x: int) -> int:
+    """splitmix64 finalizer."""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+@lru_cache(maxsize=None)
+def _stream_base(seed: int, stream: int) -> int:
+    return _mix64((seed & _MASK) ^ (stream << 56))
+
+
+def unit(seed: int, stream: int, key: int) -> float:
+    """Uniform in [0, 1) determined by (seed, stream, key)."""
+    return (_mix64((_stream_base(seed, stream) + key) & _MASK) >> 11) * 2.0 ** -53
+
+
+def unit_array(seed: int, stream: int, keys: "np.ndarray") -> "np.ndarray":
+    """unit() over an array of keys; identical values, computed in uint64 arithmetic."""
+    x = keys.astype(np.uint64) + np.uint64(_stream_base(seed, stream))
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+# ---------------------------------------------------------------
+# Skewed keys
+# ---------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _scatter_multiplier(max_id: int) -> int:
+    m = _SCATTER
+    while math.gcd(m, max_id) != 1:
+        m += 2
+    return m
+
+
+def _rank(u: float, max_id: int, skew: float) -> int:
+    """Inverse CDF of a bounded power law over ranks 1..max_id (Zipf-like)."""
+    if skew <= 0:
+        return int(u * max_id) + 1
+    if skew == 1:
+        rank = int((max_id + 1) ** u)
+    else:
+        rank = int((((max_id + 1) ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew)))
+    return min(max(rank, 1), max_id)
+
+
+def skewed_key(u: float, max_id: int, skew: float) -> int:
+    """A key in 1..max_id; with skew, rank 1 is hottest, and ranks are scattered over ids."""
+    rank = _rank(u, max_id, skew)
+    if skew <= 0:
+        return rank
+    return (rank - 1) * _scatter_multiplier(max_id) % max_id + 1
+
+
+def skewed_keys(u: "np.ndarray", max_id: int, skew: float) -> "np.ndarray":
+    if skew <= 0:
+        return (u * max_id).astype(np.int64) + 1
+    if skew == 1:
+        rank = np.floor((max_id + 1) ** u)
+    else:
+        rank = np.floor((((max_id + 1) ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew)))
+    rank = np.clip(rank.astype(np.int64), 1, max_id)
+    return (rank - 1) * _scatter_multiplier(max_id) % max_id + 1
+
+
+# ---------------------------------------------------------------
+# Time curves
+# ---------------------------------------------------------------
+
+class TimeCurve:
+    """
+    Maps a uniform to a timestamp in [since, until). Seasonal curves weight
+    days by a yearly cycle (peak in early December), weekday and a growth
+    trend, and the time of day by an hourly profile; flat curves are uniform.
+    """
+
+    def __init__(self, since: datetime, until: datetime, seasonal: bool):
+        self.since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = max(1, (until - self.since).days)
+        weights = []
+        for i in range(days):
+            day = self.since + timedelta(days=i)
+            if seasonal:
+                yearly = 1 + 0.35 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 340) / 365)
+                weights.append(yearly * _WEEKDAY[day.weekday()] * (1 + 0.5 * i / days))
+            else:
+                weights.append(1.0)
+        hourly = _HOURLY if seasonal else (1.0,) * 24
+        self._day_cum = self._cumulative(weights)
+        self._hour_cum = self._cumulative(hourly)
+
+    @staticmethod
+    def _cumulative(weights) -> List[float]:
+        total, cum = sum(weights), []
+        running = 0.0
+        for w in weights:
+            running += w
+            cum.append(running / total)
+        return cum
+
+    @staticmethod
+    def _pick(u: float, cum: List[float]) -> Tuple[int, float]:
+        """Bucket for u plus u's position within it, reused as the next uniform."""
+        i = min(bisect_right(cum, u), len(cum) - 1)
+        lo = cum[i - 1] if i else 0.0
+        return i, min(max((u - lo) / (cum[i] - lo), 0.0), 1.0 - 1e-12)
+
+    def at(self, u: float) -> datetime:
+        day, u = self._pick(u, self._day_cum)
+        hour, u = self._pick(u, self._hour_cum)
+        return self.since + timedelta(days=day, hours=hour, seconds=int(u * 3600))
+
+    def epochs(self, u: "np.ndarray") -> "np.ndarray":
+        """Vectorized at(): epoch seconds (UTC) as int64."""
+        seconds = np.zeros(len(u), dtype=np.int64)
+        for cum, unit_s in ((self._day_cum, 86400), (self._hour_cum, 3600)):
+            cum = np.asarray(cum)
+            i = np.minimum(np.searchsorted(cum, u, side="right"), len(cum) - 1)
+            lo = np.where(i > 0, cum[i - 1], 0.0)
+            seconds += i * unit_s
+            u = np.clip((u - lo) / (cum[i] - lo), 0.0, 1.0 - 1e-12)
+        seconds += (u * 3600).astype(np.int64)
+        return seconds + int((self.since - datetime(1970, 1, 1)).total_seconds())
+
+
+def to_iso(epochs: "np.ndarray") -> "np.ndarray":
+    return np.datetime_as_string(epochs.astype("datetime64[s]"), unit="s")
+
+
+def order_curve(as_of: datetime, dist: Distributions) -> TimeCurve:
+    return TimeCurve(as_of - timedelta(days=ORDER_WINDOW_DAYS), as_of, dist.seasonal)
+
+
+# ---------------------------------------------------------------
+# Cross-table values
+# ---------------------------------------------------------------
+
+def product_price(seed: int, product_id: int) -> float:
+    """Catalog price; line items use it, so order totals match the catalog."""
+    return round(5 + 495 * unit(seed, _PRODUCT_PRICE, product_id) ** 2, 2)
+
+
+def product_prices(seed: int, product_ids: "np.ndarray") -> "np.ndarray":
+    return np.round(5 + 495 * unit_array(seed, _PRODUCT_PRICE, product_ids) ** 2, 2)
+
+
+def _quantity(u: float) -> int:
+    """Mostly 1-2 units, with a tail up to MAX_QUANTITY."""
+    return min(MAX_QUANTITY, 1 + int(-1.2 * math.log1p(-u)))
+
+
+def order_of_item(item_id: int) -> int:
+    return (item_id - 1) // ITEMS_PER_ORDER + 1
+
+
+def order_customer(seed: int, order_id: int, num_customers: int, dist: Distributions) -> int:
+    return skewed_key(unit(seed, _CUSTOMER, order_id), num_customers, dist.customer_skew)
+
+
+def order_time(seed: int, order_id: int, curve: TimeCurve) -> datetime:
+    return curve.at(unit(seed, _ORDER_TS, order_id))
+
+
+def item_line(seed: int, item_id: int, max_product_id: int, dist: Distributions) -> Tuple[int, int, float]:
+    """(product_id, quantity, unit_price) of one order line."""
+    product_id = skewed_key(unit(seed, _ITEM_PRODUCT, item_id), max_product_id, dist.product_skew)
+    quantity = _quantity(unit(seed, _ITEM_QTY, item_id))
+    return product_id, quantity, product_price(seed, product_id)
+
+
+def order_total(seed: int, order_id: int, max_product_id: int, dist: Distributions) -> float:
+    first = (order_id - 1) * ITEMS_PER_ORDER + 1
+    lines = (item_line(seed, item, max_product_id, dist) for item in range(first, first + ITEMS_PER_ORDER))
+    return round(sum(q * p for _, q, p in lines), 2)
+
+
+def payment_time(seed: int, order_id: int, curve: TimeCurve) -> datetime:
+    return order_time(seed, order_id, curve) + timedelta(
+        seconds=int(unit(seed, _PAYMENT_DELAY, order_id) * PAYMENT_DELAY_S)
+    )
+
+
+# Array versions for the NumPy engine
+
+def order_customers(seed: int, order_ids, num_customers: int, dist: Distributions):
+    return skewed_keys(unit_array(seed, _CUSTOMER, order_ids), num_customers, dist.customer_skew)
+
+
+def order_epochs(seed: int, order_ids, curve: TimeCurve):
+    return curve.epochs(unit_array(seed, _ORDER_TS, order_ids))
+
+
+def item_lines(seed: int, item_ids, max_product_id: int, dist: Distributions):
+    product_ids = skewed_keys(unit_array(seed, _ITEM_PRODUCT, item_ids), max_product_id, dist.product_skew)
+    quantity = np.minimum(MAX_QUANTITY, 1 + (-1.2 * np.log1p(-unit_array(seed, _ITEM_QTY, item_ids))).astype(np.int64))
+    return product_ids, quantity, product_prices(seed, product_ids)
+
+
+def order_totals(seed: int, order_ids, max_product_id: int, dist: Distributions):
+    items = ((order_ids - 1) * ITEMS_PER_ORDER + 1)[:, None] + np.arange(ITEMS_PER_ORDER)
+    _, quantity, price = item_lines(seed, items.ravel(), max_product_id, dist)
+    return np.round((quantity * price).reshape(-1, ITEMS_PER_ORDER).sum(axis=1), 2)
+
+
+def payment_epochs(seed: int, order_ids, curve: TimeCurve):
+    delay = (unit_array(seed, _PAYMENT_DELAY, order_ids) * PAYMENT_DELAY_S).astype(np.int64)
+    return order_epochs(seed, order_ids, curve) + delay
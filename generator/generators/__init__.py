@@ -0,0 +1,4 @@
+from datetime import datetime
+
+# Reference "now" for generated timestamps, so reruns produce identical rows
+DEFAULT_AS_OF = datetime(2026, 1, 1)
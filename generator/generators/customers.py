@@ -1,19 +1,31 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
 from faker import Faker
 
+from . import DEFAULT_AS_OF
+
 fake = Faker()
 
-def generate(num_customers: int):
+def generate(num_customers: int, start: int = 1, seed: Optional[int] = None, as_of: Optional[datetime] = None):
     """
-    Generate unique customers with email, full_name, country, created_at.
+    Generate customers with ids start..start+num_customers-1:
+    (id, email, full_name, country, created_at).
     Uses deterministic unique email to avoid duplicate key errors.
     """
+    as_of = as_of or DEFAULT_AS_OF
+    since = as_of - timedelta(days=5 * 365)
+
     def generator():
-        for i in range(1, num_customers + 1):
+        # Seed on first next(), so blocks chained lazily never reseed each other
+        if seed is not None:
+            fake.seed_instance(seed)
+        for i in range(start, start + num_customers):
             # Make email unique using the index
             email = f"{fake.first_name().lower()}.{fake.last_name().lower()}{i}@example.com"
             full_name = fake.name()
             country = fake.country()
-            created_at = fake.date_time_between(start_date="-5y", end_date="now")
-            yield (email, full_name, country, created_at)
+            created_at = fake.date_time_between(start_date=since, end_date=as_of)
+            yield (i, email, full_name, country, created_at)
 
     return generator()
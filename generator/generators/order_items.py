@@ -1,17 +1,28 @@
-import random
-from faker import Faker
+from datetime import datetime
+from typing import Optional
 
-fake = Faker()
+from . import DEFAULT_AS_OF
+from ..distributions import UNIFORM, Distributions, item_line, order_curve, order_of_item, order_time
 
-def generate(num_order_items, max_order_id, max_product_id):
+def generate(
+    num_order_items,
+    max_order_id,
+    max_product_id,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+):
     """
     Generates order_items tuples:
-    (order_id, product_id, quantity, unit_price, created_at)
+    (id, order_id, product_id, quantity, unit_price, created_at)
+    Items 3k-2..3k belong to order k (up to max_order_id) and carry its timestamp.
     """
-    for _ in range(num_order_items):
-        order_id = random.randint(1, max_order_id)
-        product_id = random.randint(1, max_product_id)
-        quantity = random.randint(1, 10)
-        unit_price = round(random.uniform(5, 500), 2)
-        created_at = fake.date_time_between(start_date='-2y', end_date='now')
-        yield (order_id, product_id, quantity, unit_price, created_at)
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
+
+    for item_id in range(start, start + num_order_items):
+        order_id = min(order_of_item(item_id), max_order_id)
+        product_id, quantity, unit_price = item_line(key_seed, item_id, max_product_id, dist)
+        created_at = order_time(key_seed, order_id, curve)
+        yield (item_id, order_id, product_id, quantity, unit_price, created_at)
@@ -1,18 +1,39 @@
-import random
+from datetime import datetime
+from typing import Optional
+
 from faker import Faker
 
+from . import DEFAULT_AS_OF
+from ..distributions import UNIFORM, Distributions, order_curve, order_customer, order_time, order_total
+
 fake = Faker()
 
-def generate(num_orders: int, num_customers: int):
-    """Orders generator"""
+def generate(
+    num_orders: int,
+    num_customers: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+    max_product_id: int = 50_000,
+):
+    """
+    Orders generator: (id, customer_id, order_total, status, created_at).
+    Customer, timestamp and total are functions of (key_seed, id), shared
+    with order_items and payments; the total is the sum of the order's lines.
+    """
     statuses = ["pending", "completed", "shipped", "cancelled"]
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
 
     def generator():
-        for order_id in range(1, num_orders + 1):
-            customer_id = random.randint(1, num_customers)
-            order_total = round(random.uniform(20.0, 2000.0), 2)
+        if seed is not None:
+            fake.seed_instance(seed)
+        for order_id in range(start, start + num_orders):
+            customer_id = order_customer(key_seed, order_id, num_customers, dist)
+            total = order_total(key_seed, order_id, max_product_id, dist)
             status = fake.random.choice(statuses)
-            created_at = fake.date_time_between(start_date="-2y", end_date="now")
-            yield (customer_id, order_total, status, created_at)
+            created_at = order_time(key_seed, order_id, curve)
+            yield (order_id, customer_id, total, status, created_at)
     
     return generator()
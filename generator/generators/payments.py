@@ -1,19 +1,38 @@
-import random
+from datetime import datetime
+from typing import Optional
+
 from faker import Faker
 
+from . import DEFAULT_AS_OF
+from ..distributions import UNIFORM, Distributions, order_curve, order_total, payment_time
+
 fake = Faker()
 
-def generate(num_payments: int):
-    """Payments generator"""
+def generate(
+    num_payments: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+    max_product_id: int = 50_000,
+):
+    """
+    Payments generator: (id, order_id, amount, payment_method, status, created_at).
+    One payment per order, for the order's total, shortly after it was placed.
+    """
     methods = ["credit_card", "paypal", "bank_transfer", "gift_card"]
     statuses = ["pending", "completed", "failed"]
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
 
     def generator():
-        for order_id in range(1, num_payments + 1):  # 1 payment per order
-            amount = round(random.uniform(20.0, 2000.0), 2)
+        if seed is not None:
+            fake.seed_instance(seed)
+        for order_id in range(start, start + num_payments):  # 1 payment per order
+            amount = order_total(key_seed, order_id, max_product_id, dist)
             payment_method = fake.random.choice(methods)
             status = fake.random.choice(statuses)
-            created_at = fake.date_time_between(start_date="-2y", end_date="now")
-            yield (order_id, amount, payment_method, status, created_at)
+            created_at = payment_time(key_seed, order_id, curve)
+            yield (order_id, order_id, amount, payment_method, status, created_at)
     
     return generator()
@@ -1,17 +1,36 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
 from faker import Faker
 
+from . import DEFAULT_AS_OF
+from ..distributions import product_price
+
 fake = Faker()
 
-def generate(num_products: int):
-    """Unique products generator"""
+def generate(
+    num_products: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+):
+    """
+    Unique products generator: (id, name, category, price, created_at).
+    Prices come from the catalog function order lines also use.
+    """
     categories = ["Electronics", "Books", "Clothing", "Home", "Toys", "Sports"]
-    
+    as_of = as_of or DEFAULT_AS_OF
+    since = as_of - timedelta(days=3 * 365)
+
     def generator():
-        for i in range(1, num_products + 1):
+        if seed is not None:
+            fake.seed_instance(seed)
+        for i in range(start, start + num_products):
             name = f"{fake.word().capitalize()} Product {i}"  # unique
             category = fake.random.choice(categories)
-            price = round(fake.random_number(digits=3) + fake.random.random(), 2)
-            created_at = fake.date_time_between(start_date="-3y", end_date="now")
-            yield (name, category, price, created_at)
+            price = product_price(key_seed, i)
+            created_at = fake.date_time_between(start_date=since, end_date=as_of)
+            yield (i, name, category, price, created_at)
     
     return generator()
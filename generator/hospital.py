@@ -0,0 +1,227 @@
+# generator/hospital.py
+#
+# Scale-factor builder for the hospital schema (setup_pro_db.py) on SQLite,
+# so the sqlite profiles can be benchmarked at realistic sizes offline.
+# Every value is a pure function of (seed, id), so the same settings always
+# produce the same rows.
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .distributions import skewed_key, unit
+from .generators import DEFAULT_AS_OF
+
+# Rows per table at scale 1
+BASE_ROWS = {
+    "patients": 100_000,
+    "doctors": 500,
+    "appointments": 1_000_000,
+    "prescriptions": 1_500_000,
+}
+
+TABLES: Dict[str, str] = {
+    "patients": """
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        age INTEGER,
+        gender TEXT,
+        blood_type TEXT""",
+    "doctors": """
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        specialty TEXT,
+        experience_years INTEGER""",
+    "appointments": """
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER,
+        doctor_id INTEGER,
+        visit_date DATE,
+        reason TEXT,
+        FOREIGN KEY(patient_id) REFERENCES patients(id),
+        FOREIGN KEY(doctor_id) REFERENCES doctors(id)""",
+    "prescriptions": """
+        id INTEGER PRIMARY KEY,
+        appointment_id INTEGER,
+        medication_name TEXT,
+        dosage TEXT,
+        FOREIGN KEY(appointment_id) REFERENCES appointments(id)""",
+}
+
+# Built after the load (index, table, columns)
+INDEXES = (
+    ("idx_appointments_patient", "appointments", "patient_id"),
+    ("idx_appointments_doctor", "appointments", "doctor_id"),
+    ("idx_appointments_visit_date", "appointments", "visit_date"),
+    ("idx_prescriptions_appointment", "prescriptions", "appointment_id"),
+    ("idx_patients_name", "patients", "name"),
+)
+
+VISIT_WINDOW_DAYS = 2 * 365
+
+_FIRST_NAMES = (
+    "Daniel", "Sarah", "James", "Linda", "Amara", "Chinedu", "Fatima", "Emeka", "Grace", "Tunde",
+    "Maria", "David", "Aisha", "John", "Ngozi", "Peter", "Zainab", "Michael", "Ifeoma", "Samuel",
+    "Elena", "Yusuf", "Chloe", "Kwame", "Hannah", "Omar", "Priya", "Luca", "Nia", "Ahmed",
+)
+_LAST_NAMES = (
+    "Okoro", "Smith", "Adams", "Johnson", "Adeyemi", "Brown", "Nwosu", "Garcia", "Bello", "Taylor",
+    "Eze", "Wilson", "Mensah", "Lopez", "Ibrahim", "Clark", "Obi", "Martin", "Diallo", "Walker",
+)
+_GENDERS = ("M", "F")
+_BLOOD_TYPES = ("O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-")
+_BLOOD_WEIGHTS = (0.38, 0.07, 0.34, 0.06, 0.09, 0.02, 0.03, 0.01)
+_SPECIALTIES = (
+    "General Medicine", "Cardiology", "Pediatrics", "Dermatology", "Neurology",
+    "Orthopedics", "Gynecology", "Oncology", "Psychiatry", "Ophthalmology",
+)
+_REASONS = (
+    "General Wellness", "Malaria Checkup", "Heart Palpitations", "Flu Symptoms", "Follow-up",
+    "Hypertension Review", "Skin Rash", "Back Pain", "Vaccination", "Headache",
+    "Diabetes Review", "Prenatal Visit", "Chest Pain", "Allergy", "Eye Exam",
+)
+_MEDICATIONS = (
+    ("Artemether", "80mg"), ("Aspirin", "100mg"), ("Paracetamol", "500mg"), ("Amoxicillin", "250mg"),
+    ("Ibuprofen", "400mg"), ("Metformin", "850mg"), ("Lisinopril", "10mg"), ("Amlodipine", "5mg"),
+    ("Omeprazole", "20mg"), ("Cetirizine", "10mg"), ("Atorvastatin", "20mg"), ("Salbutamol", "100mcg"),
+)
+
+# Hash streams, one per independent column
+(_FIRST, _LAST, _AGE, _GENDER, _BLOOD, _DOCTOR_NAME, _SPECIALTY, _EXPERIENCE,
+ _PATIENT, _DOCTOR, _VISIT, _REASON, _APPOINTMENT, _MEDICATION) = range(1, 15)
+
+
+def _pick(options, u: float):
+    return options[min(int(u * len(options)), len(options) - 1)]
+
+
+def _weighted(options, weights, u: float):
+    for option, weight in zip(options, weights):
+        u -= weight
+        if u < 0:
+            return option
+    return options[-1]
+
+
+def row_counts(scale: float) -> Dict[str, int]:
+    return {table: max(1, int(rows * scale)) for table, rows in BASE_ROWS.items()}
+
+
+def patients(count: int, seed: int) -> Iterator[Tuple]:
+    for i in range(1, count + 1):
+        name = f"{_pick(_FIRST_NAMES, unit(seed, _FIRST, i))} {_pick(_LAST_NAMES, unit(seed, _LAST, i))}"
+        yield (
+            i,
+            name,
+            int(unit(seed, _AGE, i) * 96),
+            _pick(_GENDERS, unit(seed, _GENDER, i)),
+            _weighted(_BLOOD_TYPES, _BLOOD_WEIGHTS, unit(seed, _BLOOD, i)),
+        )
+
+
+def doctors(count: int, seed: int) -> Iterator[Tuple]:
+    for i in range(1, count + 1):
+        yield (
+            i,
+            f"Dr. {_pick(_LAST_NAMES, unit(seed, _DOCTOR_NAME, i))}",
+            _pick(_SPECIALTIES, unit(seed, _SPECIALTY, i)),
+            1 + int(unit(seed, _EXPERIENCE, i) * 40),
+        )
+
+
+def appointments(count: int, seed: int, num_patients: int, num_doctors: int,
+                 as_of: datetime = DEFAULT_AS_OF, skew: float = 1.1) -> Iterator[Tuple]:
+    """Visits in the VISIT_WINDOW_DAYS before `as_of`; a few patients and doctors see most of them."""
+    since = as_of.date() - timedelta(days=VISIT_WINDOW_DAYS)
+    for i in range(1, count + 1):
+        yield (
+            i,
+            skewed_key(unit(seed, _PATIENT, i), num_patients, skew),
+            skewed_key(unit(seed, _DOCTOR, i), num_doctors, skew),
+            (since + timedelta(days=int(unit(seed, _VISIT, i) * VISIT_WINDOW_DAYS))).isoformat(),
+            _pick(_REASONS, unit(seed, _REASON, i)),
+        )
+
+
+def prescriptions(count: int, seed: int, num_appointments: int) -> Iterator[Tuple]:
+    for i in range(1, count + 1):
+        medication, dosage = _pick(_MEDICATIONS, unit(seed, _MEDICATION, i))
+        yield (i, skewed_key(unit(seed, _APPOINTMENT, i), num_appointments, 0), medication, dosage)
+
+
+def _insert(conn: sqlite3.Connection, table: str, rows: Iterator[Tuple], batch_size: int) -> int:
+    """executemany() over fixed-size batches of one prepared INSERT."""
+    loaded = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return loaded
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(batch[0]))})", batch)
+        loaded += len(batch)
+
+
+def build(
+    path: Path,
+    scale: float = 1.0,
+    seed: int = 0,
+    batch_size: int = 50_000,
+    as_of: datetime = DEFAULT_AS_OF,
+    on_table_done: Optional[Callable[[str, int, float], None]] = None,
+) -> Dict[str, float]:
+    """
+    Build the hospital database at `path` (replaced if it exists) and return
+    phase timings. Rows go in one transaction with synchronous=OFF and WAL;
+    indexes are created after the load, then ANALYZE. The file is written
+    under a temporary name and renamed when complete.
+    """
+    counts = row_counts(scale)
+    tmp = path.with_name(path.name + ".tmp")
+    for stale in (tmp, Path(f"{tmp}-wal"), Path(f"{tmp}-shm")):
+        stale.unlink(missing_ok=True)
+
+    phases: Dict[str, float] = {}
+    conn = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")  # 256 MB
+        for table, columns in TABLES.items():
+            conn.execute(f"CREATE TABLE {table} ({columns}\n)")
+
+        generators = {
+            "patients": patients(counts["patients"], seed),
+            "doctors": doctors(counts["doctors"], seed),
+            "appointments": appointments(
+                counts["appointments"], seed, counts["patients"], counts["doctors"], as_of
+            ),
+            "prescriptions": prescriptions(counts["prescriptions"], seed, counts["appointments"]),
+        }
+        started = perf_counter()
+        conn.execute("BEGIN")
+        for table, rows in generators.items():
+            table_start = perf_counter()
+            loaded = _insert(conn, table, rows, batch_size)
+            if on_table_done:
+                on_table_done(table, loaded, perf_counter() - table_start)
+        conn.execute("COMMIT")
+        phases["load"] = perf_counter() - started
+
+        started = perf_counter()
+        for name, table, column in INDEXES:
+            conn.execute(f"CREATE INDEX {name} ON {table}({column})")
+        phases["indexes"] = perf_counter() - started
+
+        started = perf_counter()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        phases["analyze"] = perf_counter() - started
+    finally:
+        conn.close()
+
+    os.replace(tmp, path)
+    return phases
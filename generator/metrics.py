@@ -0,0 +1,161 @@
+# generator/metrics.py
+#
+# Load instrumentation. Workers time each partition (generation inside the
+# row iterator vs. the sink writing it, commits, bytes out, peak RSS); the
+# parent merges those per table, prints live progress and writes the report.
+
+import json
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MB."""
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class Timed:
+    """Iterator wrapper that adds the time spent producing items to `seconds`."""
+
+    def __init__(self, items: Iterable):
+        self._items = iter(items)
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        started = perf_counter()
+        try:
+            return next(self._items)
+        finally:
+            self.seconds += perf_counter() - started
+
+
+@dataclass
+class LoadStats:
+    """
+    Per-table (or per-partition) load timings. `write_seconds` covers the
+    sink's write calls, which drive generation; `gen_seconds` is the part
+    spent inside the row generator. With COPY prefetch the two overlap, so
+    load_seconds is then a lower bound.
+    """
+    table: str
+    rows: int = 0
+    partitions: int = 0
+    gen_seconds: float = 0.0
+    write_seconds: float = 0.0
+    commits: int = 0
+    commit_seconds: float = 0.0
+    max_commit_seconds: float = 0.0
+    bytes_out: int = 0
+    peak_rss_mb: float = 0.0
+    seconds: float = 0.0  # wall time from stage start until the table's last partition finished
+
+    @property
+    def load_seconds(self) -> float:
+        return max(0.0, self.write_seconds - self.gen_seconds)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def add(self, other: "LoadStats") -> None:
+        self.rows += other.rows
+        self.partitions += other.partitions
+        self.gen_seconds += other.gen_seconds
+        self.write_seconds += other.write_seconds
+        self.commits += other.commits
+        self.commit_seconds += other.commit_seconds
+        self.max_commit_seconds = max(self.max_commit_seconds, other.max_commit_seconds)
+        self.bytes_out += other.bytes_out
+        self.peak_rss_mb = max(self.peak_rss_mb, other.peak_rss_mb)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["load_seconds"] = self.load_seconds
+        data["rows_per_s"] = self.rows_per_s
+        data["mean_commit_ms"] = 1000 * self.commit_seconds / self.commits if self.commits else 0.0
+        return data
+
+
+class Progress:
+    """
+    Live rows/s and ETA per table, fed with (table, rows) after every block.
+    Prints at most once per `interval` seconds.
+    """
+
+    def __init__(self, echo: Callable[[str], None], interval: float = 5.0,
+                 labels: Optional[Dict[str, str]] = None):
+        self.echo = echo
+        self.interval = interval
+        self.labels = labels or {}
+        self._totals: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._started: Dict[str, float] = {}
+        self._last_print = perf_counter()
+
+    def start(self, table: str, total: int) -> None:
+        self._totals[table] = total
+        self._rows[table] = 0
+        self._started[table] = perf_counter()
+
+    def finish(self, table: str) -> None:
+        self._totals.pop(table, None)
+
+    def update(self, table: str, rows: int) -> None:
+        if table not in self._totals:
+            return
+        self._rows[table] += rows
+        now = perf_counter()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            for name in list(self._totals):
+                self.echo(self.line(name, now))
+
+    def line(self, table: str, now: Optional[float] = None) -> str:
+        now = now if now is not None else perf_counter()
+        done, total = self._rows[table], self._totals[table]
+        rate = done / max(now - self._started[table], 1e-9)
+        eta = f"{(total - done) / rate:,.0f}s" if rate > 0 else "?"
+        return (
+            f"   … {self.labels.get(table, table)}: {done:,}/{total:,} rows "
+            f"({100 * done / max(total, 1):.0f}%), {rate:,.0f} rows/s, ETA {eta}"
+        )
+
+
+def build_report(settings: Dict[str, Any], tables: Dict[str, LoadStats], phases: Dict[str, float]) -> Dict[str, Any]:
+    """Machine-readable summary of one generator run."""
+    rows = sum(s.rows for s in tables.values())
+    load = phases.get("load", 0.0)
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "settings": settings,
+        "rows": rows,
+        "rows_per_s": rows / load if load > 0 else 0.0,
+        "gen_seconds": sum(s.gen_seconds for s in tables.values()),
+        "load_seconds": sum(s.load_seconds for s in tables.values()),
+        "bytes_out": sum(s.bytes_out for s in tables.values()),
+        "peak_rss_mb": {
+            "parent": peak_rss_mb(),
+            "worker": max((s.peak_rss_mb for s in tables.values()), default=0.0),
+        },
+        "phases": phases,
+        "tables": {name: s.as_dict() for name, s in tables.items()},
+    }
+
+
+def write_report(path: Path, report: Dict[str, Any]) -> None:
+    path.write_text(json.dumps(report, indent=2, default=str))
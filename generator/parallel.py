@@ -0,0 +1,246 @@
+# generator/parallel.py
+
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .metrics import LoadStats, Timed, peak_rss_mb
+
+# Rows per seed block: block k of a table always gets the same seed, so the
+# data is identical whatever the worker count. Also the checkpoint unit.
+SEED_BLOCK = 100_000
+
+# Don't split tables into partitions smaller than this many rows
+MIN_PARTITION_ROWS = SEED_BLOCK
+
+# Per-block progress hook: (table, rows) -> None. Workers get a queue's put
+# through the pool initializer; the sequential path calls back directly.
+_on_block: Optional[Callable[[Tuple[str, int]], None]] = None
+
+
+def _init_worker(queue) -> None:
+    global _on_block
+    _on_block = queue.put
+
+
+@dataclass(frozen=True)
+class TableJob:
+    """
+    One table to generate. `make_rows(count, start=..., seed=...)` must yield
+    rows for ids start..start+count-1, depend only on its arguments, and be
+    picklable (module-level function or functools.partial of one) so it can
+    run in a worker process.
+    """
+    table: str
+    columns: Tuple[str, ...]
+    make_rows: Callable[..., Iterable[tuple]]
+    total: int
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    columns: Tuple[str, ...]
+    make_rows: Callable[..., Iterable[tuple]]
+    start: int
+    count: int
+    base_seed: int
+    done: FrozenSet[int] = frozenset()  # block starts already loaded (--resume)
+
+    def blocks(self) -> Iterator[Tuple[int, int]]:
+        end = self.start + self.count
+        for block_start in range(self.start, end, SEED_BLOCK):
+            yield block_start, min(SEED_BLOCK, end - block_start)
+
+
+def partition_ranges(total: int, parts: int) -> List[Tuple[int, int]]:
+    """Split ids 1..total into `parts` contiguous (start, count) ranges of whole seed blocks."""
+    blocks = -(-total // SEED_BLOCK)
+    parts = max(1, min(parts, blocks)) if total > 0 else 1
+    base, extra = divmod(blocks, parts)
+    ranges = []
+    start = 1
+    for i in range(parts):
+        count = min((base + (1 if i < extra else 0)) * SEED_BLOCK, total - (start - 1))
+        ranges.append((start, count))
+        start += count
+    return ranges
+
+
+def block_seed(base_seed: int, table: str, block_start: int) -> int:
+    """Stable per-block seed, independent of process, partitioning and hash randomization."""
+    digest = hashlib.sha256(f"{base_seed}:{table}:{block_start}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def plan_partitions(
+    job: TableJob, workers: int, base_seed: int, done: Optional[Set[int]] = None
+) -> List[Partition]:
+    parts = min(workers, max(1, job.total // MIN_PARTITION_ROWS))
+    return [
+        Partition(
+            table=job.table,
+            columns=job.columns,
+            make_rows=job.make_rows,
+            start=start,
+            count=count,
+            base_seed=base_seed,
+            done=frozenset(b for b in (done or ()) if start <= b < start + count),
+        )
+        for start, count in partition_ranges(job.total, parts)
+        if count > 0
+    ]
+
+
+def load_partition(
+    sink,
+    part: Partition,
+    run_key: Optional[str] = None,
+    commit_blocks: int = 1,
+) -> LoadStats:
+    """
+    Generate and write one partition through its own sink writer (runs in a
+    worker), block by block. Every `commit_blocks` blocks are committed
+    together with their checkpoints (when `run_key` is set), so a crash
+    loses at most the uncommitted blocks.
+    """
+    stats = LoadStats(part.table, partitions=1)
+
+    def commit(call) -> None:
+        started = perf_counter()
+        call()
+        elapsed = perf_counter() - started
+        stats.commits += 1
+        stats.commit_seconds += elapsed
+        stats.max_commit_seconds = max(stats.max_commit_seconds, elapsed)
+
+    writer = sink.open(part.table, part.start)
+    try:
+        pending = 0
+        for block_start, count in part.blocks():
+            if block_start in part.done:
+                continue
+            rows = Timed(part.make_rows(count, start=block_start, seed=block_seed(part.base_seed, part.table, block_start)))
+            started = perf_counter()
+            writer.write(part.table, part.columns, rows)
+            stats.write_seconds += perf_counter() - started
+            stats.gen_seconds += rows.seconds
+            if run_key is not None:
+                writer.checkpoint(part.table, block_start, count, run_key)
+            stats.rows += count
+            pending += 1
+            if pending >= commit_blocks:
+                commit(writer.commit)
+                pending = 0
+            if _on_block is not None:
+                _on_block((part.table, count))
+        commit(writer.finish)
+    finally:
+        writer.close()
+    stats.bytes_out = writer.bytes_out
+    stats.peak_rss_mb = peak_rss_mb()
+    return stats
+
+
+def run_stages(
+    sink,
+    stages: Sequence[Sequence[TableJob]],
+    workers: int,
+    base_seed: int,
+    on_stage_start: Optional[Callable[[Sequence[TableJob]], None]] = None,
+    on_table_done: Optional[Callable[[LoadStats], None]] = None,
+    run_key: Optional[str] = None,
+    done: Optional[Dict[str, Set[int]]] = None,
+    commit_rows: int = SEED_BLOCK,
+    progress=None,
+) -> Dict[str, LoadStats]:
+    """
+    Load stages in order (later stages reference earlier ones by foreign key).
+    Within a stage, every partition of every table is queued on one process
+    pool, so independent tables are generated concurrently. Blocks listed in
+    `done` (from checkpoints) are skipped. `progress` (a metrics.Progress)
+    gets every block as it is written; the merged per-table stats are returned.
+    """
+    global _on_block
+    commit_blocks = max(1, commit_rows // SEED_BLOCK)
+    queue = multiprocessing.Queue() if workers > 1 and progress is not None else None
+    pool = None
+    drain = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker if queue is not None else None,
+            initargs=(queue,) if queue is not None else (),
+        )
+    if queue is not None:
+        drain = threading.Thread(target=_drain, args=(queue, progress), daemon=True)
+        drain.start()
+    elif progress is not None:
+        _on_block = lambda item: progress.update(*item)  # noqa: E731
+
+    totals: Dict[str, LoadStats] = {}
+    try:
+        for stage in stages:
+            if on_stage_start:
+                on_stage_start(stage)
+            stage_start = perf_counter()
+            pending: Dict[str, int] = {}
+            parts: List[Partition] = []
+            for job in stage:
+                job_done = (done or {}).get(job.table) or set()
+                job_parts = plan_partitions(job, workers, base_seed, job_done)
+                pending[job.table] = len(job_parts)
+                totals[job.table] = LoadStats(job.table)
+                if progress is not None:
+                    skipped = sum(min(SEED_BLOCK, job.total - start + 1) for start in job_done)
+                    progress.start(job.table, job.total - skipped)
+                parts.extend(job_parts)
+
+            if pool is None:
+                results = (load_partition(sink, part, run_key, commit_blocks) for part in parts)
+            else:
+                futures = [pool.submit(load_partition, sink, part, run_key, commit_blocks) for part in parts]
+                results = (f.result() for f in as_completed(futures))
+
+            for stats in results:
+                table = totals[stats.table]
+                table.add(stats)
+                pending[stats.table] -= 1
+                if pending[stats.table] == 0:
+                    table.seconds = perf_counter() - stage_start
+                    if progress is not None:
+                        progress.finish(stats.table)
+                    if on_table_done:
+                        on_table_done(table)
+    finally:
+        _on_block = None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if queue is not None:
+            queue.put(None)
+            drain.join()
+    return totals
+
+
+def _drain(queue, progress) -> None:
+    """Feed worker block reports to `progress` until the None sentinel."""
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        progress.update(*item)
+
+
+def reset_sequences(conn, tables: Iterable[str]) -> None:
+    """Rows are loaded with explicit ids; move each BIGSERIAL past the max."""
+    with conn.cursor() as cur:
+        for table in tables:
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            )
+    conn.commit()
@@ -0,0 +1,104 @@
+# generator/partitions.py
+#
+# Optional range partitioning of the fact tables on created_at, and a loader
+# wrapper that routes each block's rows straight to their child partition.
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+PARTITIONED_TABLES = ("orders", "order_items", "payments")
+GRANULARITIES = {"month": 1, "quarter": 3, "year": 12}
+PARTITION_WINDOW_DAYS = 2 * 365  # the fact tables' created_at window before --as-of
+
+
+@dataclass(frozen=True)
+class Layout:
+    """Flat tables, or PARTITIONED_TABLES range-partitioned by created_at."""
+    bounds: Tuple[Tuple[str, str, str], ...] = ()  # (suffix, from, to) as ISO dates, UTC
+
+    @property
+    def partitioned(self) -> bool:
+        return bool(self.bounds)
+
+    def is_partitioned(self, table: str) -> bool:
+        return self.partitioned and table in PARTITIONED_TABLES
+
+    def children(self, table: str) -> List[str]:
+        """Child tables of a partitioned table, the DEFAULT catch-all last."""
+        return [f"{table}_{suffix}" for suffix, _, _ in self.bounds] + [f"{table}_default"]
+
+
+FLAT = Layout()
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + d.month - 1 + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def partition_layout(granularity: Optional[str], as_of: datetime) -> Layout:
+    """Bounds covering the generated created_at window, one range per period."""
+    if not granularity or granularity == "none":
+        return FLAT
+    step = GRANULARITIES[granularity]
+    since = (as_of - timedelta(days=PARTITION_WINDOW_DAYS)).date()
+    first_month = (since.month - 1) // step * step + 1
+    lower = date(since.year, first_month, 1)
+    bounds = []
+    while lower <= as_of.date():
+        upper = _add_months(lower, step)
+        if step == 12:
+            suffix = f"p{lower.year}"
+        elif step == 3:
+            suffix = f"p{lower.year}q{(lower.month - 1) // 3 + 1}"
+        else:
+            suffix = f"p{lower.year}_{lower.month:02d}"
+        bounds.append((suffix, lower.isoformat(), upper.isoformat()))
+        lower = upper
+    return Layout(tuple(bounds))
+
+
+@dataclass(frozen=True)
+class PartitionRouter:
+    """
+    Loader wrapper: splits each block by created_at and calls `inner` once per
+    child partition, so COPY skips per-row tuple routing in the parent.
+    At most one block (SEED_BLOCK rows) is held while it is split.
+    """
+    inner: Callable
+    layout: Layout
+    batches: bool = False
+
+    def _child_index(self, value) -> int:
+        key = value if isinstance(value, str) else value.isoformat()
+        lows = [low for _, low, _ in self.layout.bounds]
+        i = bisect_right(lows, key) - 1
+        if i < 0 or key >= self.layout.bounds[i][2]:
+            return len(self.layout.bounds)  # DEFAULT partition
+        return i
+
+    def __call__(self, conn, table, columns, rows) -> Optional[int]:
+        if not self.layout.is_partitioned(table):
+            return self.inner(conn, table, columns, rows)
+        children = self.layout.children(table)
+        ts = list(columns).index("created_at")
+        routed: Dict[int, list] = {}
+        if self.batches:
+            import numpy as np
+
+            lows = np.array([low for _, low, _ in self.layout.bounds])
+            last_high = self.layout.bounds[-1][2]
+            for batch in rows:
+                stamps = batch[ts]
+                idx = np.searchsorted(lows, stamps, side="right") - 1
+                idx[(idx < 0) | (stamps >= last_high)] = len(self.layout.bounds)
+                for i in np.unique(idx).tolist():
+                    mask = idx == i
+                    routed.setdefault(i, []).append(tuple(col[mask] for col in batch))
+        else:
+            for row in rows:
+                routed.setdefault(self._child_index(row[ts]), []).append(row)
+        sent = [self.inner(conn, children[i], columns, routed[i]) for i in sorted(routed)]
+        return None if None in sent else sum(sent)
@@ -1,16 +1,288 @@
-from io import StringIO
+# generator/postgres.py
+#
+# Streaming COPY FROM STDIN loader. Rows are encoded on demand into a small
+# buffer that psycopg2's copy_expert() reads from, so memory stays constant
+# no matter how many rows a partition has.
 
-def copy_rows(conn, table, columns, rows):
-    buffer = StringIO()
-    for row in rows:
-        buffer.write("\t".join(map(str, row)) + "\n")
-    buffer.seek(0)
-
-    with conn.cursor() as cur:
-        cur.copy_from(
-            buffer,
-            table,
-            sep="\t",
-            columns=columns,
+import queue
+import struct
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+CHUNK_BYTES = 1 << 20  # encoded bytes handed to the socket per read()
+PREFETCH_CHUNKS = 2    # double-buffering: one chunk in flight, one being encoded
+
+# ---------------------------------------------------------------
+# Text format
+# ---------------------------------------------------------------
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _text_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.translate(_TEXT_ESCAPES)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def encode_text(row: Sequence) -> bytes:
+    return ("\t".join(map(_text_value, row)) + "\n").encode("utf-8")
+
+
+# ---------------------------------------------------------------
+# Binary format (https://www.postgresql.org/docs/current/sql-copy.html)
+# ---------------------------------------------------------------
+
+BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+BINARY_TRAILER = struct.pack("!h", -1)
+_PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_NULL = struct.pack("!i", -1)
+
+
+def _int8(value) -> bytes:
+    return struct.pack("!iq", 8, value)
+
+
+def _int4(value) -> bytes:
+    return struct.pack("!ii", 4, value)
+
+
+def _text(value) -> bytes:
+    data = str(value).encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _numeric(value) -> bytes:
+    """NUMERIC as base-10000 digit groups: ndigits, weight, sign, dscale, digits."""
+    d = value if isinstance(value, Decimal) else Decimal(str(value))
+    sign, digits, exp = d.as_tuple()
+    if not isinstance(exp, int):  # NaN
+        body = struct.pack("!hhHh", 0, 0, 0xC000, 0)
+        return struct.pack("!i", len(body)) + body
+
+    digit_str = "".join(map(str, digits))
+    if exp > 0:
+        digit_str += "0" * exp
+    frac_len = max(0, -exp)
+    if frac_len > len(digit_str):
+        digit_str = "0" * (frac_len - len(digit_str)) + digit_str
+    int_part = digit_str[: len(digit_str) - frac_len]
+    frac_part = digit_str[len(digit_str) - frac_len:]
+    int_part = int_part.zfill(-(-len(int_part) // 4) * 4)
+    frac_part = frac_part.ljust(-(-len(frac_part) // 4) * 4, "0")
+
+    groups = [int(int_part[i:i + 4]) for i in range(0, len(int_part), 4)]
+    weight = len(groups) - 1
+    groups += [int(frac_part[i:i + 4]) for i in range(0, len(frac_part), 4)]
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+
+    body = struct.pack(f"!hhHh{len(groups)}H", len(groups), weight, 0x4000 if sign else 0, frac_len, *groups)
+    return struct.pack("!i", len(body)) + body
+
+
+def _timestamptz(value) -> bytes:
+    """Microseconds since 2000-01-01 UTC; naive datetimes / ISO strings are taken as UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return struct.pack("!iq", 8, (value - _PG_EPOCH) // timedelta(microseconds=1))
+
+
+BINARY_ENCODERS: Dict[str, Callable[..., bytes]] = {
+    "int8": _int8,
+    "int4": _int4,
+    "text": _text,
+    "numeric": _numeric,
+    "timestamptz": _timestamptz,
+}
+
+
+def binary_row_encoder(types: Sequence[str]) -> Callable[[Sequence], bytes]:
+    encoders = [BINARY_ENCODERS[t] for t in types]
+    field_count = struct.pack("!h", len(encoders))
+
+    def encode(row: Sequence) -> bytes:
+        return field_count + b"".join(
+            _NULL if value is None else enc(value) for enc, value in zip(encoders, row)
         )
-    conn.commit()
+
+    return encode
+
+
+# ---------------------------------------------------------------
+# File-like adapter
+# ---------------------------------------------------------------
+
+def _chunks(rows: Iterable[Sequence], encode: Callable[[Sequence], bytes], header: bytes,
+            trailer: bytes, chunk_bytes: int) -> Iterator[bytes]:
+    buf = bytearray(header)
+    for row in rows:
+        buf += encode(row)
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    buf += trailer
+    if buf:
+        yield bytes(buf)
+
+
+class _Prefetcher:
+    """Encodes chunks on a background thread into a bounded queue."""
+
+    _DONE = object()
+
+    def __init__(self, chunks: Iterator[bytes], depth: int):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, chunks: Iterator[bytes]) -> None:
+        try:
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+            self._put(self._DONE)
+        except BaseException as e:  # surfaced to the reader
+            self._put(e)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class RowStream:
+    """
+    Read-only file-like object over a row iterator, in COPY text or binary
+    format. At most `chunk_bytes` (plus one row) is buffered, or
+    `PREFETCH_CHUNKS` chunks when `prefetch` encodes ahead on a thread.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Sequence],
+        fmt: str = "text",
+        types: Optional[Sequence[str]] = None,
+        chunk_bytes: int = CHUNK_BYTES,
+        prefetch: bool = False,
+    ):
+        if fmt == "binary":
+            if types is None:
+                raise ValueError("binary COPY needs a column type per column")
+            chunks = _chunks(rows, binary_row_encoder(types), BINARY_HEADER, BINARY_TRAILER, chunk_bytes)
+        elif fmt == "text":
+            chunks = _chunks(rows, encode_text, b"", b"", chunk_bytes)
+        else:
+            raise ValueError(f"Unknown COPY format: {fmt}")
+        self._prefetcher = _Prefetcher(chunks, PREFETCH_CHUNKS) if prefetch else None
+        self._chunks = iter(self._prefetcher) if self._prefetcher else chunks
+        self._pending = b""
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._pending + b"".join(self._chunks)
+            self._pending = b""
+        else:
+            while len(self._pending) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._pending += chunk
+            data, self._pending = self._pending[:size], self._pending[size:]
+        self.bytes_read += len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:  # copy_expert only calls read()
+        return self.read(size)
+
+    def close(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+
+
+def copy_stream(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence],
+                fmt: str = "text", types: Optional[Sequence[str]] = None,
+                prefetch: bool = False, chunk_bytes: int = CHUNK_BYTES) -> int:
+    """Run one COPY ... FROM STDIN for `rows` (no commit); returns bytes sent."""
+    options = "FORMAT binary" if fmt == "binary" else "FORMAT text"
+    stream = RowStream(rows, fmt=fmt, types=types, chunk_bytes=chunk_bytes, prefetch=prefetch)
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({options})", stream, size=chunk_bytes)
+    finally:
+        stream.close()
+    return stream.bytes_read
+
+
+def copy_rows(conn, table, columns, rows, fmt: str = "text", types: Optional[Sequence[str]] = None,
+              commit_every: Optional[int] = None, prefetch: bool = False) -> None:
+    """
+    Stream `rows` into `table` with COPY. With `commit_every`, rows are sent
+    as consecutive COPY statements of that many rows, each committed.
+    """
+    rows = iter(rows)
+    if not commit_every:
+        copy_stream(conn, table, columns, rows, fmt, types, prefetch)
+        conn.commit()
+        return
+    while True:
+        first = next(rows, None)
+        if first is None:
+            return
+        copy_stream(conn, table, columns, chain((first,), islice(rows, commit_every - 1)), fmt, types, prefetch)
+        conn.commit()
+
+
+@dataclass(frozen=True)
+class CopyLoader:
+    """
+    Picklable loader for generator.parallel: `loader(conn, table, columns, rows)`
+    sends one COPY, leaves the commit to the caller and returns the bytes
+    sent. `batches=True` accepts column batches from generator.vectorized
+    instead of rows.
+    """
+    fmt: str = "text"
+    types: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    prefetch: bool = True
+    batches: bool = False
+
+    def __call__(self, conn, table, columns, rows) -> int:
+        if self.batches:
+            from .vectorized import batch_rows
+
+            rows = chain.from_iterable(map(batch_rows, rows))
+        return copy_stream(conn, table, columns, rows, fmt=self.fmt, types=self.types.get(table), prefetch=self.prefetch)
@@ -0,0 +1,245 @@
+# generator/schema.py
+#
+# Benchmark schema DDL, split so a bulk load can defer the expensive parts.
+# schema.sql is the same (flat) schema as one script; keep the two in sync.
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import psycopg2
+
+from .partitions import FLAT, Layout
+
+# Parents before children: creation, SET LOGGED and ANALYZE all go in this order
+TABLES = ("customers", "products", "orders", "order_items", "payments")
+
+COLUMNS: Dict[str, str] = {
+    "customers": """
+        id BIGSERIAL NOT NULL,
+        email TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        country TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()""",
+    "products": """
+        id BIGSERIAL NOT NULL,
+        name TEXT NOT NULL,
+        category TEXT NOT NULL,
+        price NUMERIC(10,2) NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()""",
+    "orders": """
+        id BIGSERIAL NOT NULL,
+        customer_id BIGINT NOT NULL,
+        order_total NUMERIC(12,2) NOT NULL,
+        status TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()""",
+    "order_items": """
+        id BIGSERIAL NOT NULL,
+        order_id BIGINT NOT NULL,
+        product_id BIGINT NOT NULL,
+        quantity INT NOT NULL,
+        unit_price NUMERIC(10,2) NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()""",
+    "payments": """
+        id BIGSERIAL NOT NULL,
+        order_id BIGINT NOT NULL,
+        amount NUMERIC(12,2) NOT NULL,
+        payment_method TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()""",
+}
+
+# (table, constraint, columns, kind): built as unique indexes, then attached.
+# A partitioned table's key must include the partition column.
+UNIQUE_KEYS: List[Tuple[str, str, str, str]] = [
+    ("customers", "customers_pkey", "id", "PRIMARY KEY"),
+    ("customers", "customers_email_key", "email", "UNIQUE"),
+    ("products", "products_pkey", "id", "PRIMARY KEY"),
+    ("orders", "orders_pkey", "id", "PRIMARY KEY"),
+    ("order_items", "order_items_pkey", "id", "PRIMARY KEY"),
+    ("payments", "payments_pkey", "id", "PRIMARY KEY"),
+]
+
+# (table, index, definition after the table name)
+INDEXES: List[Tuple[str, str, str]] = [
+    ("orders", "idx_orders_customer", "(customer_id)"),
+    ("order_items", "idx_order_items_order", "(order_id)"),
+    ("order_items", "idx_order_items_product", "(product_id)"),
+    ("payments", "idx_payments_order", "(order_id)"),
+    ("orders", "idx_orders_active", "(status) WHERE status = 'active'"),
+    ("payments", "idx_payments_success", "(status) WHERE status = 'success'"),
+]
+
+# (table, constraint, column, referenced table)
+FOREIGN_KEYS: List[Tuple[str, str, str, str]] = [
+    ("orders", "orders_customer_id_fkey", "customer_id", "customers"),
+    ("order_items", "order_items_order_id_fkey", "order_id", "orders"),
+    ("order_items", "order_items_product_id_fkey", "product_id", "products"),
+    ("payments", "payments_order_id_fkey", "order_id", "orders"),
+]
+
+
+def _key_columns(table: str, columns: str, layout: Layout) -> str:
+    return f"{columns}, created_at" if layout.is_partitioned(table) else columns
+
+
+def foreign_keys(layout: Layout = FLAT) -> List[Tuple[str, str, str, str]]:
+    """
+    FKs for this layout. A partitioned orders has no unique key on id alone,
+    so nothing can reference it; those FKs are dropped.
+    """
+    return [fk for fk in FOREIGN_KEYS if not layout.is_partitioned(fk[3])]
+
+
+def physical_tables(layout: Layout = FLAT) -> List[str]:
+    """Tables that hold rows: partitions instead of their (empty) parents."""
+    tables: List[str] = []
+    for table in TABLES:
+        tables.extend(layout.children(table) if layout.is_partitioned(table) else [table])
+    return tables
+
+
+def index_statements(layout: Layout = FLAT) -> List[str]:
+    """
+    Every index build, unique keys included; each can run on its own
+    connection. Partitioned tables get one build per partition, which
+    attach_keys() then attaches to an index on the parent.
+    """
+    statements = []
+    for table, name, columns, _ in UNIQUE_KEYS:
+        cols = _key_columns(table, columns, layout)
+        if layout.is_partitioned(table):
+            statements += [f"CREATE UNIQUE INDEX {child}_{name[len(table) + 1:]} ON {child}({cols})"
+                           for child in layout.children(table)]
+        else:
+            statements.append(f"CREATE UNIQUE INDEX {name} ON {table}({cols})")
+    for table, name, definition in INDEXES:
+        if layout.is_partitioned(table):
+            statements += [f"CREATE INDEX {name}_{child[len(table) + 1:]} ON {child}{definition}"
+                           for child in layout.children(table)]
+        else:
+            statements.append(f"CREATE INDEX {name} ON {table}{definition}")
+    return statements
+
+
+def create_tables(conn, unlogged: bool = False, deferred: bool = False, layout: Layout = FLAT) -> None:
+    """
+    Drop and recreate the benchmark tables. With `deferred`, tables are
+    created bare (no keys, indexes or FKs) and the caller runs
+    build_indexes() / attach_keys() / add_foreign_keys() after loading.
+    Partitioned parents are always logged (Postgres requires it); `unlogged`
+    applies to their partitions.
+    """
+    kind = "UNLOGGED TABLE" if unlogged else "TABLE"
+    with conn.cursor() as cur:
+        for table in reversed(TABLES):
+            cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        for table in TABLES:
+            if not layout.is_partitioned(table):
+                cur.execute(f"CREATE {kind} {table} ({COLUMNS[table]}\n)")
+                continue
+            cur.execute(f"CREATE TABLE {table} ({COLUMNS[table]}\n) PARTITION BY RANGE (created_at)")
+            for (_, low, high), child in zip(layout.bounds, layout.children(table)):
+                cur.execute(
+                    f"CREATE {kind} {child} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{low} 00:00:00+00') TO ('{high} 00:00:00+00')"
+                )
+            cur.execute(f"CREATE {kind} {table}_default PARTITION OF {table} DEFAULT")
+    conn.commit()
+    if not deferred:
+        for sql in index_statements(layout):
+            with conn.cursor() as cur:
+                cur.execute(sql)
+        attach_keys(conn, layout)
+        add_foreign_keys(conn, validate=False, not_valid=False, layout=layout)
+
+
+def build_indexes(db: str, jobs: int, maintenance_work_mem: str = "512MB", layout: Layout = FLAT) -> None:
+    """
+    Build every index concurrently, one connection per job. CREATE INDEX only
+    takes a SHARE lock, so builds on the same table don't block each other.
+    """
+    def build(sql: str) -> None:
+        conn = psycopg2.connect(db)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+                cur.execute(sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        list(pool.map(build, index_statements(layout)))
+
+
+def attach_keys(conn, layout: Layout = FLAT) -> None:
+    """
+    Turn the prebuilt indexes into constraints without rescanning: unique
+    indexes become PRIMARY KEY / UNIQUE, and per-partition indexes are
+    attached to a parent index (which becomes valid once all are attached).
+    """
+    with conn.cursor() as cur:
+        for table, name, columns, kind in UNIQUE_KEYS:
+            if not layout.is_partitioned(table):
+                cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {kind} USING INDEX {name}")
+                continue
+            for child in layout.children(table):
+                child_name = f"{child}_{name[len(table) + 1:]}"
+                cur.execute(f"ALTER TABLE {child} ADD CONSTRAINT {child_name} {kind} USING INDEX {child_name}")
+            # Finds and attaches the partitions' matching constraints
+            cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {kind} ({_key_columns(table, columns, layout)})")
+        for table, name, definition in INDEXES:
+            if not layout.is_partitioned(table):
+                continue
+            cur.execute(f"CREATE INDEX {name} ON ONLY {table}{definition}")
+            for child in layout.children(table):
+                cur.execute(f"ALTER INDEX {name} ATTACH PARTITION {name}_{child[len(table) + 1:]}")
+    conn.commit()
+
+
+def add_foreign_keys(conn, validate: bool = True, not_valid: bool = True, layout: Layout = FLAT) -> None:
+    """
+    Add the FKs. NOT VALID skips the table scan under the ACCESS EXCLUSIVE
+    lock; VALIDATE CONSTRAINT then checks existing rows under a weaker one.
+    Partitioned tables don't support NOT VALID, so theirs are checked here.
+    """
+    with conn.cursor() as cur:
+        for table, name, column, ref in foreign_keys(layout):
+            suffix = " NOT VALID" if not_valid and not layout.is_partitioned(table) else ""
+            cur.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                f"FOREIGN KEY ({column}) REFERENCES {ref}(id){suffix}"
+            )
+    conn.commit()
+    if validate and not_valid:
+        validate_foreign_keys(conn, layout)
+
+
+def validate_foreign_keys(conn, layout: Layout = FLAT) -> None:
+    with conn.cursor() as cur:
+        for table, name, _, _ in foreign_keys(layout):
+            if layout.is_partitioned(table):
+                continue
+            cur.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+            conn.commit()
+
+
+def set_logged(conn, tables: Sequence[str] = TABLES) -> None:
+    """SET LOGGED, parents first: a logged table can't reference an unlogged one."""
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"ALTER TABLE {table} SET LOGGED")
+    finally:
+        conn.autocommit = False
+
+
+def analyze(conn, tables: Sequence[str] = TABLES) -> None:
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"ANALYZE {table}")
+    finally:
+        conn.autocommit = False
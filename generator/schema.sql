@@ -1,6 +1,8 @@
 -- ===============================
 -- SQL-Speak Benchmark Schema
 -- Optimized for PostgreSQL 12+
+-- Mirrors generator/schema.py, which the generator uses for
+-- --create-schema / --fast-load. Keep the two in sync.
 -- ===============================
 
 -- Customers
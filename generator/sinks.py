@@ -0,0 +1,398 @@
+# generator/sinks.py
+#
+# Where generated blocks go. A sink is a small picklable config; each worker
+# opens its own writer per partition, so every target loads in parallel the
+# same way Postgres does.
+
+import csv
+import gzip
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import psycopg2
+
+from . import checkpoints
+
+
+def _rows(data: Iterable, batches: bool) -> Iterable[Sequence]:
+    """Rows from either a row iterator or NumPy column batches."""
+    if not batches:
+        return data
+    from .vectorized import batch_rows
+
+    return chain.from_iterable(map(batch_rows, data))
+
+
+class Writer:
+    """One partition's output. Blocks are written, then committed in groups."""
+    bytes_out = 0  # bytes sent or written, where the target can tell
+
+    def write(self, table: str, columns: Sequence[str], data: Iterable) -> None:
+        raise NotImplementedError
+
+    def checkpoint(self, table: str, block_start: int, count: int, run_key: str) -> None:
+        raise NotImplementedError(f"{type(self).__name__} can't checkpoint (--resume is Postgres-only)")
+
+    def commit(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        """Called once after the last block; the partition's output is complete."""
+        self.commit()
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------
+# Postgres
+# ---------------------------------------------------------------
+
+class PostgresWriter(Writer):
+    def __init__(self, db: str, loader: Callable):
+        # Generated timestamps are naive UTC; text COPY would otherwise read them in the session zone
+        self.conn = psycopg2.connect(db, options="-c timezone=UTC")
+        self.loader = loader
+
+    def write(self, table, columns, data) -> None:
+        # COPY loaders return the bytes sent; the INSERT loaders return None
+        self.bytes_out += self.loader(self.conn, table, columns, data) or 0
+
+    def checkpoint(self, table, block_start, count, run_key) -> None:
+        checkpoints.record(self.conn, table, block_start, count, run_key)
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+@dataclass(frozen=True)
+class PostgresSink:
+    """Load over psycopg2 with `loader(conn, table, columns, data)`; the writer commits."""
+    db: str
+    loader: Callable
+    name: str = "postgres"
+
+    def open(self, table: str, start: int) -> Writer:
+        return PostgresWriter(self.db, self.loader)
+
+    def prepare(self, tables: Sequence[str]) -> None:
+        pass
+
+    def finish(self, tables: Sequence[str]) -> None:
+        pass
+
+
+# ---------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------
+
+def _part_name(table: str, start: int) -> str:
+    return f"{table}-{start:012d}"
+
+
+def _table_dirs(out: str, tables: Sequence[str]) -> None:
+    """Fresh <out>/<table>/ directories; earlier output for these tables is removed."""
+    for table in tables:
+        shutil.rmtree(Path(out) / table, ignore_errors=True)
+        (Path(out) / table).mkdir(parents=True, exist_ok=True)
+
+
+class _FileWriter(Writer):
+    """Writes to `<name>.tmp` files and renames them on finish(), so partial output is obvious."""
+
+    def __init__(self):
+        self._tmp_paths = []
+
+    def _track(self, path: Path) -> Path:
+        tmp = path.with_name(path.name + ".tmp")
+        self._tmp_paths.append((tmp, path))
+        return tmp
+
+    def _close_files(self) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        self._close_files()
+        for tmp, final in self._tmp_paths:
+            os.replace(tmp, final)
+            self.bytes_out += final.stat().st_size
+        self._tmp_paths = []
+
+    def close(self) -> None:
+        self._close_files()
+
+
+class CsvWriter(_FileWriter):
+    def __init__(self, sink: "CsvSink", table: str, start: int):
+        super().__init__()
+        self.sink, self.table, self.start = sink, table, start
+        self._file = None
+        self._csv = None
+        self._shard = 0
+        self._shard_rows = 0
+
+    def _roll(self, columns: Sequence[str]) -> None:
+        self._close_files()
+        suffix = ".csv.gz" if self.sink.compress else ".csv"
+        path = self._track(Path(self.sink.out) / self.table / f"{_part_name(self.table, self.start)}-{self._shard:04d}{suffix}")
+        self._file = gzip.open(path, "wt", newline="", compresslevel=self.sink.compresslevel) \
+            if self.sink.compress else open(path, "w", newline="")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(columns)
+        self._shard += 1
+        self._shard_rows = 0
+
+    def write(self, table, columns, data) -> None:
+        # Shards roll on block boundaries, so a block never spans two files
+        if self._file is None or self._shard_rows >= self.sink.shard_rows:
+            self._roll(columns)
+        count = 0
+        for row in _rows(data, self.sink.batches):
+            self._csv.writerow(row)
+            count += 1
+        self._shard_rows += count
+
+    def _close_files(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass(frozen=True)
+class CsvSink:
+    """CSV shards per table directory, gzip-compressed by default, ~`shard_rows` rows each."""
+    out: str
+    shard_rows: int = 1_000_000
+    compress: bool = True
+    compresslevel: int = 6
+    batches: bool = False
+    name: str = "csv"
+
+    def open(self, table: str, start: int) -> Writer:
+        return CsvWriter(self, table, start)
+
+    def prepare(self, tables: Sequence[str]) -> None:
+        _table_dirs(self.out, tables)
+
+    def finish(self, tables: Sequence[str]) -> None:
+        pass
+
+
+# Parquet / Arrow types per COPY binary type name (generator.cli.COLUMN_TYPES)
+_ARROW_TYPES = {
+    "int8": "int64",
+    "int4": "int32",
+    "text": "string",
+    "numeric": "float64",
+    "timestamptz": "timestamp",
+}
+
+
+class ParquetWriter(_FileWriter):
+    def __init__(self, sink: "ParquetSink", table: str, start: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__()
+        self.pa, self.sink = pa, sink
+        self.types = sink.types[table]
+        fields = [
+            pa.field(name, pa.timestamp("us", tz="UTC") if t == "timestamptz" else getattr(pa, _ARROW_TYPES[t])(),
+                     nullable=False)
+            for name, t in zip(sink.columns[table], self.types)
+        ]
+        self.schema = pa.schema(fields)
+        path = self._track(Path(sink.out) / table / f"{_part_name(table, start)}.parquet")
+        self._writer = pq.ParquetWriter(path, self.schema, compression=sink.compression)
+
+    def _arrays(self, data):
+        pa = self.pa
+        if self.sink.batches:
+            for batch in data:
+                yield [
+                    pa.array(col.astype("datetime64[s]") if t == "timestamptz" else col, type=f.type)
+                    for col, t, f in zip(batch, self.types, self.schema)
+                ]
+        else:
+            columns = list(zip(*data))
+            if columns:
+                yield [pa.array(col, type=f.type) for col, f in zip(columns, self.schema)]
+
+    def write(self, table, columns, data) -> None:
+        for arrays in self._arrays(data):
+            self._writer.write_table(
+                self.pa.Table.from_arrays(arrays, schema=self.schema),
+                row_group_size=self.sink.row_group_rows,
+            )
+
+    def _close_files(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+@dataclass(frozen=True)
+class ParquetSink:
+    """One Parquet file per table partition, row groups of `row_group_rows` (needs pyarrow)."""
+    out: str
+    columns: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    types: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    row_group_rows: int = 100_000
+    compression: str = "zstd"
+    batches: bool = False
+    name: str = "parquet"
+
+    def open(self, table: str, start: int) -> Writer:
+        return ParquetWriter(self, table, start)
+
+    def prepare(self, tables: Sequence[str]) -> None:
+        import pyarrow  # noqa: F401  (fail before generating anything)
+
+        _table_dirs(self.out, tables)
+
+    def finish(self, tables: Sequence[str]) -> None:
+        pass
+
+
+# ---------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------
+
+_SQLITE_TYPES = {"int8": "INTEGER", "int4": "INTEGER", "text": "TEXT", "numeric": "NUMERIC", "timestamptz": "TEXT"}
+
+
+def _bulk_pragmas(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+class SqliteWriter(_FileWriter):
+    """A shard database per partition, written in one transaction and merged by SqliteSink.finish()."""
+
+    def __init__(self, sink: "SqliteSink", table: str, start: int):
+        super().__init__()
+        self.sink = sink
+        path = self._track(sink.parts_dir / f"{_part_name(table, start)}.db")
+        if path.exists():
+            path.unlink()
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        _bulk_pragmas(self.conn)
+        self.conn.execute(sink.create_sql(table, constraints=False))
+        self.conn.execute("BEGIN")
+
+    def write(self, table, columns, data) -> None:
+        ts = list(columns).index("created_at") if "created_at" in columns else None
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            (self._sqlite_row(row, ts) for row in _rows(data, self.sink.batches)),
+        )
+
+    @staticmethod
+    def _sqlite_row(row, ts):
+        if ts is None:
+            return row
+        value = row[ts]
+        value = value.replace("T", " ") if isinstance(value, str) else value.isoformat(sep=" ")
+        return (*row[:ts], value, *row[ts + 1:])
+
+    def _close_files(self) -> None:
+        if self.conn is not None:
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT")
+            self.conn.close()
+            self.conn = None
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()  # unfinished: roll back
+            self.conn = None
+
+
+@dataclass(frozen=True)
+class SqliteSink:
+    """
+    A single SQLite file usable with the sqlite profiles. Workers write shard
+    databases; finish() merges them with ATTACH + INSERT ... SELECT, then
+    builds indexes and runs ANALYZE.
+    """
+    out: str
+    columns: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    types: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    foreign_keys: Tuple[Tuple[str, str, str, str], ...] = ()
+    unique: Tuple[Tuple[str, str, str], ...] = ()
+    indexes: Tuple[Tuple[str, str, str], ...] = ()
+    batches: bool = False
+    name: str = "sqlite"
+
+    @property
+    def parts_dir(self) -> Path:
+        return Path(f"{self.out}.parts")
+
+    def create_sql(self, table: str, constraints: bool = True) -> str:
+        refs = {col: ref for t, _, col, ref in self.foreign_keys if t == table}
+        cols = []
+        for col, t in zip(self.columns[table], self.types[table]):
+            if col == "id":
+                cols.append("id INTEGER PRIMARY KEY" if constraints else "id INTEGER NOT NULL")
+                continue
+            ref = f" REFERENCES {refs[col]}(id)" if constraints and col in refs else ""
+            cols.append(f"{col} {_SQLITE_TYPES[t]} NOT NULL{ref}")
+        return f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(cols)})"
+
+    def open(self, table: str, start: int) -> Writer:
+        return SqliteWriter(self, table, start)
+
+    def prepare(self, tables: Sequence[str]) -> None:
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        self.parts_dir.mkdir(parents=True)
+
+    def finish(self, tables: Sequence[str]) -> None:
+        out = Path(self.out)
+        if out.exists():
+            out.unlink()
+        conn = sqlite3.connect(out, isolation_level=None)
+        try:
+            _bulk_pragmas(conn)
+            for table in tables:
+                conn.execute(self.create_sql(table))
+                cols = ", ".join(self.columns[table])
+                # Shard names sort by start id, so rows append in primary-key order
+                for shard in sorted(self.parts_dir.glob(f"{table}-*.db")):
+                    conn.execute("ATTACH DATABASE ? AS shard", (str(shard),))
+                    conn.execute("BEGIN")
+                    conn.execute(f"INSERT INTO main.{table} ({cols}) SELECT {cols} FROM shard.{table}")
+                    conn.execute("COMMIT")
+                    conn.execute("DETACH DATABASE shard")
+            for table, name, column in self.unique:
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table}({column})")
+            for table, name, definition in self.indexes:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}{definition}")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+SINKS = ("postgres", "csv", "parquet", "sqlite")
+
+
+def make_sink(kind: str, out: Optional[str], **options):
+    """File sink by name; Postgres sinks are built directly by the CLI."""
+    if out is None:
+        raise ValueError(f"--out is required for --sink {kind}")
+    sinks = {"csv": CsvSink, "parquet": ParquetSink, "sqlite": SqliteSink}
+    if kind not in sinks:
+        raise ValueError(f"Unknown sink: {kind}")
+    accepted = sinks[kind].__dataclass_fields__
+    return sinks[kind](out=out, **{k: v for k, v in options.items() if k in accepted})
@@ -0,0 +1,210 @@
+# generator/vectorized.py
+#
+# Column-at-a-time generation with NumPy: each table is produced as batches
+# of arrays (one per column) instead of one Python tuple per row. Text comes
+# from small vocabulary pools built once with Faker and indexed by arrays.
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterator, Optional, Sequence, Tuple
+
+from faker import Faker
+
+from .distributions import (
+    ITEMS_PER_ORDER,
+    UNIFORM,
+    Distributions,
+    item_lines,
+    order_curve,
+    order_customers,
+    order_epochs,
+    order_totals,
+    payment_epochs,
+    product_prices,
+    to_iso,
+)
+from .generators import DEFAULT_AS_OF
+
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for --engine numpy
+    np = None
+
+BATCH_ROWS = 100_000
+POOL_SIZE = 2_000
+POOL_SEED = 0  # pools are vocabulary only; row choices come from the block's rng
+
+ORDER_STATUSES = ["pending", "completed", "shipped", "cancelled"]
+PAYMENT_METHODS = ["credit_card", "paypal", "bank_transfer", "gift_card"]
+PAYMENT_STATUSES = ["pending", "completed", "failed"]
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Toys", "Sports"]
+
+Batch = Tuple["np.ndarray", ...]
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("NumPy is required for --engine numpy (pip install numpy)")
+
+
+class Pools:
+    """Vocabulary pools drawn once per process from a seeded Faker and reused for every batch."""
+
+    def __init__(self, seed: int):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = np.array([fake.first_name().lower() for _ in range(POOL_SIZE)])
+        self.last_names = np.array([fake.last_name().lower() for _ in range(POOL_SIZE)])
+        self.full_names = np.array([fake.name() for _ in range(POOL_SIZE)])
+        self.words = np.array([fake.word().capitalize() for _ in range(POOL_SIZE)])
+        self.countries = np.array(sorted({fake.country() for _ in range(POOL_SIZE)}))
+
+
+@lru_cache(maxsize=1)
+def _pools() -> Pools:
+    return Pools(POOL_SEED)
+
+
+def _rng(seed: Optional[int]) -> "np.random.Generator":
+    return np.random.default_rng(seed)
+
+
+def id_range(start: int, count: int) -> "np.ndarray":
+    return np.arange(start, start + count, dtype=np.int64)
+
+
+def timestamps(rng, count: int, start: datetime, end: datetime) -> "np.ndarray":
+    """Uniform timestamps as epoch-second offsets, rendered as ISO strings for the loader."""
+    lo, hi = int(start.timestamp()), int(end.timestamp())
+    return to_iso(rng.integers(lo, hi, size=count, dtype=np.int64))
+
+
+def choice(rng, pool: Sequence[str], count: int) -> "np.ndarray":
+    values = np.asarray(pool)
+    return values[rng.integers(0, len(values), size=count)]
+
+
+def _window(years: int, as_of: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = as_of or DEFAULT_AS_OF
+    return end - timedelta(days=365 * years), end
+
+
+def _batches(count: int, start: int) -> Iterator[Tuple[int, int]]:
+    offset = 0
+    while offset < count:
+        n = min(BATCH_ROWS, count - offset)
+        yield start + offset, n
+        offset += n
+
+
+def customers(
+    count: int, start: int = 1, seed: Optional[int] = None, as_of: Optional[datetime] = None
+) -> Iterator[Batch]:
+    """(id, email, full_name, country, created_at) column batches."""
+    require_numpy()
+    rng = _rng(seed)
+    pools = _pools()
+    since, until = _window(5, as_of)
+    for first_id, n in _batches(count, start):
+        ids = id_range(first_id, n)
+        first = pools.first_names[rng.integers(0, POOL_SIZE, size=n)]
+        last = pools.last_names[rng.integers(0, POOL_SIZE, size=n)]
+        # Unique email via the id, as the row-by-row generator does
+        email = np.char.add(np.char.add(np.char.add(np.char.add(first, "."), last), ids.astype(str)), "@example.com")
+        yield (
+            ids,
+            email,
+            pools.full_names[rng.integers(0, POOL_SIZE, size=n)],
+            choice(rng, pools.countries, n),
+            timestamps(rng, n, since, until),
+        )
+
+
+def products(
+    count: int, start: int = 1, seed: Optional[int] = None, as_of: Optional[datetime] = None, key_seed: int = 0
+) -> Iterator[Batch]:
+    """(id, name, category, price, created_at) column batches; prices from the shared catalog function."""
+    require_numpy()
+    rng = _rng(seed)
+    pools = _pools()
+    since, until = _window(3, as_of)
+    for first_id, n in _batches(count, start):
+        ids = id_range(first_id, n)
+        words = pools.words[rng.integers(0, POOL_SIZE, size=n)]
+        name = np.char.add(np.char.add(words, " Product "), ids.astype(str))  # unique
+        yield (ids, name, choice(rng, CATEGORIES, n), product_prices(key_seed, ids), timestamps(rng, n, since, until))
+
+
+def orders(
+    count: int,
+    num_customers: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+    max_product_id: int = 50_000,
+) -> Iterator[Batch]:
+    """(id, customer_id, order_total, status, created_at) column batches; totals sum the order's lines."""
+    require_numpy()
+    rng = _rng(seed)
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
+    for first_id, n in _batches(count, start):
+        ids = id_range(first_id, n)
+        yield (
+            ids,
+            order_customers(key_seed, ids, num_customers, dist),
+            order_totals(key_seed, ids, max_product_id, dist),
+            choice(rng, ORDER_STATUSES, n),
+            to_iso(order_epochs(key_seed, ids, curve)),
+        )
+
+
+def order_items(
+    count: int,
+    max_order_id: int,
+    max_product_id: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+) -> Iterator[Batch]:
+    """(id, order_id, product_id, quantity, unit_price, created_at) column batches."""
+    require_numpy()
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
+    for first_id, n in _batches(count, start):
+        ids = id_range(first_id, n)
+        order_ids = np.minimum((ids - 1) // ITEMS_PER_ORDER + 1, max_order_id)
+        product_ids, quantity, unit_price = item_lines(key_seed, ids, max_product_id, dist)
+        yield (ids, order_ids, product_ids, quantity, unit_price, to_iso(order_epochs(key_seed, order_ids, curve)))
+
+
+def payments(
+    count: int,
+    start: int = 1,
+    seed: Optional[int] = None,
+    as_of: Optional[datetime] = None,
+    key_seed: int = 0,
+    dist: Distributions = UNIFORM,
+    max_product_id: int = 50_000,
+) -> Iterator[Batch]:
+    """(id, order_id, amount, payment_method, status, created_at) column batches."""
+    require_numpy()
+    rng = _rng(seed)
+    curve = order_curve(as_of or DEFAULT_AS_OF, dist)
+    for first_id, n in _batches(count, start):
+        ids = id_range(first_id, n)
+        yield (
+            ids,
+            ids,  # 1 payment per order
+            order_totals(key_seed, ids, max_product_id, dist),
+            choice(rng, PAYMENT_METHODS, n),
+            choice(rng, PAYMENT_STATUSES, n),
+            to_iso(payment_epochs(key_seed, ids, curve)),
+        )
+
+
+def batch_rows(batch: Batch) -> Iterator[tuple]:
+    """Row tuples for loaders that need them; tolist() converts each column in C."""
+    return zip(*(col.tolist() for col in batch))
@@ -1,10 +1,20 @@
-import typer
-import subprocess
-import re
-from tabulate import tabulate
+import getpass
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.exc import SQLAlchemyError
+
+import typer
+
+# Only light modules at import time: SQLAlchemy, pyarrow and core.engine are
+# imported where they are first needed, so --help and the prompt come up fast.
+from core.history_db import init_history_db
+from core.logging import configure_logging
+from core.models import QueryResult, UserContext
+from core.profiler import paused, profile_request, should_profile
+from core.profiles import get_profile
+from core.providers import ProviderError
 
 app = typer.Typer(
     help="SQL-Speak: Talk to your database in plain English via GitHub Copilot CLI."
@@ -21,121 +31,194 @@ def get_db_url(db_input: str) -> str:
     return f"sqlite:///{db_input}"
 
 
-def is_postgres(db_url: str) -> bool:
-    return db_url.startswith("postgresql://")
+def cli_user() -> UserContext:
+    name = getpass.getuser()
+    return UserContext(id=f"cli:{name}", display_name=name, roles=["cli"])
 
 
-def is_benchmark_postgres(profile: str, db_url: str) -> bool:
-    return profile == "benchmark-postgres" and is_postgres(db_url)
+def data_source_label(db_url: str) -> str:
+    """History label for --db, without the password."""
+    from sqlalchemy.engine import make_url
 
+    return make_url(db_url).render_as_string(hide_password=True)
 
-def get_db_schema(db_url: str) -> str:
-    """Discovers the database schema using SQLAlchemy inspector."""
-    try:
-        engine = create_engine(db_url)
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
 
-        if not tables:
-            return "The database is currently empty."
+# ------------------------
+# One-shot Mode
+# ------------------------
+
+# Terminal tables stop here unless paged or raised with --max-rows
+DEFAULT_MAX_ROWS = 1000
 
-        schema_text = f"""Database Type: {engine.dialect.name}
-Database Schema:
-"""
 
-        for table_name in tables:
-            columns = inspector.get_columns(table_name)
-            col_desc = ", ".join(
-                [f"{c['name']} ({c['type']})" for c in columns]
-            )
-            schema_text += f"- Table '{table_name}': columns=[{col_desc}]\n"
+@dataclass
+class OutputOptions:
+    """Where result rows go: the terminal (optionally paged) or a file."""
+    max_rows: Optional[int] = None  # None: DEFAULT_MAX_ROWS, or everything when paging; 0: everything
+    pager: Optional[bool] = None    # None: page when stdout is a terminal and $PAGER is set
+    fmt: Optional[str] = None       # csv | ndjson | parquet: stream to `path` instead
+    path: Optional[Path] = None
 
-        return schema_text
 
-    except Exception as e:
-        typer.secho(f"Schema Discovery Error: {e}", fg=typer.colors.RED)
-        raise typer.Exit(1)
+def open_writer(options: OutputOptions):
+    """(writer, pager or None) for one result."""
+    from core.export import Pager, TableWriter, file_writer
 
+    if options.fmt:
+        return file_writer(options.fmt, options.path or Path(f"query_results.{options.fmt}")), None
 
-# ------------------------
-# SQL Execution
-# ------------------------
+    paging = options.pager if options.pager is not None else sys.stdout.isatty() and bool(os.getenv("PAGER"))
+    max_rows = options.max_rows if options.max_rows is not None else (None if paging else DEFAULT_MAX_ROWS)
+    pager = Pager(os.getenv("PAGER", "less")) if paging else None
+    writer = TableWriter(
+        pager.out if pager else typer.echo,
+        max_rows=max_rows or None,
+        stopped=(lambda: pager.closed) if pager else (lambda: False),
+        on_start=lambda: typer.secho("\n✓ Query Results:\n", fg=typer.colors.GREEN, bold=True),
+    )
+    return writer, pager
 
-def run_sql(db_url: str, sql: str, profile: str = "default"):
-    try:
-        engine = create_engine(db_url)
-
-        # Benchmark safety rules
-        if is_benchmark_postgres(profile, db_url):
-            if not sql.strip().lower().startswith("select"):
-                typer.secho(
-                    "⛔ Benchmark profile is READ-ONLY (SELECT only).",
-                    fg=typer.colors.RED,
-                    bold=True,
-                )
-                return
-
-            if "limit" not in sql.lower():
-                sql = sql.rstrip(";") + " LIMIT 100;"
-                typer.secho(
-                    "⚠ LIMIT 100 auto-applied (benchmark safety)",
-                    fg=typer.colors.YELLOW,
-                )
-
-            typer.secho(
-                "\n📊 EXPLAIN ANALYZE (preview):",
-                fg=typer.colors.CYAN,
-                bold=True,
-            )
-            with engine.connect() as conn:
-                plan = conn.execute(
-                    text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
-                ).fetchall()
-                for row in plan:
-                    typer.echo(row[0])
-
-            if not typer.confirm("\n▶ Run actual query?"):
-                typer.secho("Query cancelled.", fg=typer.colors.YELLOW)
-                return
-
-        with engine.connect() as connection:
-            result = connection.execute(text(sql))
-
-            if result.returns_rows:
-                rows = result.fetchall()
-                if rows:
-                    data = [dict(row._mapping) for row in rows]
-                    typer.secho(
-                        "\n✓ Query Results:\n",
-                        fg=typer.colors.GREEN,
-                        bold=True,
-                    )
-                    typer.echo(tabulate(data, headers="keys", tablefmt="grid"))
-                else:
-                    typer.secho(
-                        "\n✓ Query executed successfully (0 rows returned).",
-                        fg=typer.colors.GREEN,
-                    )
-            else:
-                connection.commit()
-                typer.secho(
-                    f"\n✓ Command executed successfully. Rows affected: {result.rowcount}",
-                    fg=typer.colors.GREEN,
-                )
 
+def show_result(result: QueryResult, writer) -> None:
+    """Status after the rows were streamed to `writer`."""
+    from core.export import TableWriter
+
+    if result.meta["status"] != "success":
+        typer.secho(f"Database Error: {result.meta.get('error', result.sql)}", fg=typer.colors.RED)
+        return
+
+    if "rows_affected" in result.meta:
+        typer.secho(
+            f"\n✓ Command executed successfully. Rows affected: {result.meta['rows_affected']}",
+            fg=typer.colors.GREEN,
+        )
+    elif not result.meta["row_count"]:
+        typer.secho(
+            "\n✓ Query executed successfully (0 rows returned).",
+            fg=typer.colors.GREEN,
+        )
+    elif not isinstance(writer, TableWriter):
+        typer.secho(f"\n✓ {writer.rows:,} rows written to {writer.path}", fg=typer.colors.GREEN)
+    elif writer.truncated:
+        typer.secho(
+            f"… stopped after {writer.rows:,} rows (--max-rows); use --output csv|ndjson|parquet for everything",
+            fg=typer.colors.YELLOW,
+        )
+
+
+def show_plan(plan, title: str) -> None:
+    typer.secho(f"\n📊 {title}: {plan.summary()}", fg=typer.colors.CYAN, bold=True)
+    for line in plan.lines:
+        typer.echo(line)
+
+
+def run_turn(
+    session,
+    query_text: str,
+    execute: bool,
+    yes: bool = False,
+    analyze: bool = False,
+    output: Optional[OutputOptions] = None,
+) -> Optional[QueryResult]:
+    """
+    Generate SQL for one question in `session`, show it (and a plain EXPLAIN
+    preview for explain profiles), then run it once after confirmation
+    (skipped with `yes`). `analyze` replaces the preview with the plan of
+    the actual execution, shown after the results. Rows are streamed to
+    the terminal or a file as `output` says.
+    """
+    from sqlalchemy.exc import SQLAlchemyError
+
+    try:
+        prepared = session.prepare(query_text)
     except SQLAlchemyError as e:
         typer.secho(f"Database Error: {e}", fg=typer.colors.RED)
-    except Exception as e:
-        typer.secho(f"Error: {e}", fg=typer.colors.RED)
+        return None
+    except ProviderError as e:
+        typer.secho(f"⛔ No SQL generated: {e}", fg=typer.colors.RED)
+        return None
+    except ValueError as e:
+        typer.secho(f"⛔ {e}", fg=typer.colors.RED, bold=True)
+        return None
+
+    typer.secho(f"\n✓ Generated SQL ({prepared.provider}):\n{prepared.sql}", fg=typer.colors.GREEN)
+    if not execute:
+        return None
+
+    plan = None
+    if prepared.profile.explain and not analyze:
+        try:
+            plan = session.explain(prepared)
+        except SQLAlchemyError as e:
+            typer.secho(f"Database Error: {e}", fg=typer.colors.RED)
+            return None
+        show_plan(plan, "Query plan (estimate, not executed)")
+
+    with paused():  # a --cprofile run doesn't count the time spent deciding
+        confirmed = yes or typer.confirm("▶ Run this query?")
+    if not confirmed:
+        session.cancel(prepared, plan)
+        typer.secho("Query cancelled.", fg=typer.colors.YELLOW)
+        return None
+
+    if session.answers_locally(prepared.sql):
+        typer.secho("↺ Answering from the previous result", fg=typer.colors.CYAN)
+    writer, pager = open_writer(output or OutputOptions())
+    result = None
+    try:
+        result = session.run(prepared, analyze=analyze, plan=plan, writer=writer)
+    finally:
+        if result is not None and result.meta["status"] == "success":
+            writer.close()
+        else:
+            writer.discard()  # no half-written output file
+        if pager:
+            with paused():  # waits until the user quits the pager
+                pager.close()
+    show_result(result, writer)
+    if analyze and result.meta["status"] == "success":
+        executed = result.meta.get("plan")
+        if executed:
+            title = "Executed plan" if executed["analyzed"] else "Plan (estimate; executed plan unavailable)"
+            typer.secho(f"\n📊 {title}:", fg=typer.colors.CYAN, bold=True)
+            for line in executed["lines"]:
+                typer.echo(line)
+        typer.secho(
+            f"⏱ {result.meta['generation_ms']:.1f} ms generation, {result.meta['execution_ms']:.1f} ms execution",
+            fg=typer.colors.CYAN,
+        )
+    return result
+
+
+def open_session(db_url: str, profile: str):
+    from core.session import ConversationSession
+
+    return ConversationSession(db_url, profile, cli_user(), data_source_label(db_url))
+
+
+def one_shot_query(
+    db_url: str,
+    query_text: str,
+    execute: bool,
+    profile: str,
+    yes: bool = False,
+    analyze: bool = False,
+    output: Optional[OutputOptions] = None,
+) -> Optional[QueryResult]:
+    session = open_session(db_url, profile)
+    try:
+        return run_turn(session, query_text, execute, yes, analyze, output)
+    finally:
+        session.close()
 
 
 # ------------------------
 # Multi-turn Mode
 # ------------------------
 
-def multi_turn_conversation(db_url: str, profile: str):
-    schema = get_db_schema(db_url)
-
+def multi_turn_conversation(
+    db_url: str, profile: str, yes: bool = False, analyze: bool = False, output: Optional[OutputOptions] = None
+):
     typer.secho(
         "\n🔄 Entering Multi-Turn Conversation Mode",
         fg=typer.colors.CYAN,
@@ -143,59 +226,19 @@ def multi_turn_conversation(db_url: str, profile: str):
     )
     typer.secho("Type 'exit' or 'quit' to end the session.\n", fg=typer.colors.CYAN)
 
-    current_sql = None
-
-    while True:
-        user_input = typer.prompt("You").strip()
-
-        if user_input.lower() in {"exit", "quit"}:
-            typer.secho("\n👋 Goodbye!", fg=typer.colors.CYAN)
-            break
-
-        if not current_sql:
-            if is_benchmark_postgres(profile, db_url):
-                prompt = f"""You are a PostgreSQL performance expert.
-This is a LARGE benchmark database (10M+ rows).
-
-Rules:
-- Prefer aggregates over SELECT *
-- Always include LIMIT
-- Use PostgreSQL idioms
-
-{schema}
-
-Request:
-{user_input}
-
-Return ONLY SQL in ```sql``` blocks.
-"""
-            else:
-                prompt = f"""You are a SQL expert.
-{schema}
-
-Request:
-{user_input}
-
-Return ONLY SQL in ```sql``` blocks.
-"""
-
-            result = subprocess.run(
-                f'gh copilot -p "{prompt}"',
-                shell=True,
-                capture_output=True,
-                text=True,
-            )
+    # Follow-ups see the previous question, SQL and result (as table _prev)
+    session = open_session(db_url, profile)
+    try:
+        while True:
+            user_input = typer.prompt("You").strip()
 
-            sql_match = re.search(r"```sql\s*([\s\S]*?)\s*```", result.stdout)
+            if user_input.lower() in {"exit", "quit"}:
+                typer.secho("\n👋 Goodbye!", fg=typer.colors.CYAN)
+                break
 
-            if sql_match:
-                current_sql = sql_match.group(1).strip()
-                typer.secho(f"\n✓ Generated SQL:\n{current_sql}", fg=typer.colors.GREEN)
-                run_sql(db_url, current_sql, profile)
-            else:
-                typer.secho("⚠ No SQL found.", fg=typer.colors.YELLOW)
-        else:
-            typer.secho("Refinement not implemented in benchmark demo.", fg=typer.colors.YELLOW)
+            run_turn(session, user_input, execute=True, yes=yes, analyze=analyze, output=output)
+    finally:
+        session.close()
 
 
 # ------------------------
@@ -208,65 +251,77 @@ def query(
     db: str = typer.Option(..., help="Path to SQLite DB or Postgres URL"),
     multi_turn: bool = typer.Option(False, "--multi-turn"),
     execute: bool = typer.Option(True),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Run the generated SQL without asking for confirmation"),
+    analyze: bool = typer.Option(
+        False,
+        "--analyze",
+        help="Run the query once and show its executed plan (auto_explain on Postgres) with the results",
+    ),
+    max_rows: Optional[int] = typer.Option(
+        None,
+        "--max-rows",
+        help=f"Stop the terminal table after N rows (default {DEFAULT_MAX_ROWS}, unlimited when paging; 0 = no limit)",
+    ),
+    pager: Optional[bool] = typer.Option(
+        None, "--pager/--no-pager", help="Page results through $PAGER (default: when it is set and stdout is a terminal)"
+    ),
+    output: Optional[str] = typer.Option(
+        None, "--output", help="Stream all rows to a file instead: csv | ndjson | parquet"
+    ),
+    output_file: Optional[Path] = typer.Option(
+        None, "--output-file", help="File for --output (default: query_results.<format>)"
+    ),
     profile: str = typer.Option(
         "default",
-        help="Execution profile: default | benchmark-postgres",
+        help="Execution profile: default | sqlite-dev | prod-readonly | benchmark-postgres",
+    ),
+    cprofile: bool = typer.Option(
+        False,
+        "--cprofile",
+        help="Profile this query (cProfile + peak memory); dump goes to $SQLSPEAK_PROFILE_DIR",
     ),
 ):
     db_url = get_db_url(db)
+    try:
+        get_profile(profile)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    if output is not None:
+        from core.export import EXPORT_FORMATS
+
+        if output not in EXPORT_FORMATS:
+            raise typer.BadParameter(f"--output must be one of: {', '.join(EXPORT_FORMATS)}")
+        if output == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise typer.BadParameter("--output parquet needs pyarrow (pip install pyarrow)")
+    out = OutputOptions(max_rows=max_rows, pager=pager, fmt=output, path=output_file)
+
+    configure_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+    init_history_db()
 
     if multi_turn:
-        multi_turn_conversation(db_url, profile)
+        multi_turn_conversation(db_url, profile, yes, analyze, out)
         return
 
     if not query_text:
         query_text = typer.prompt("Enter your database query in plain English")
 
-    schema = get_db_schema(db_url)
-
-    if is_benchmark_postgres(profile, db_url):
-        prompt = f"""You are a PostgreSQL performance expert.
-This is a LARGE benchmark database (10M+ rows).
-
-Rules:
-- Prefer aggregates
-- Always include LIMIT
-- Avoid SELECT *
-
-{schema}
-
-Request:
-{query_text}
-
-Return ONLY SQL in ```sql``` blocks.
-"""
-    else:
-        prompt = f"""You are a SQL expert.
-{schema}
-
-Request:
-{query_text}
-
-Return ONLY SQL in ```sql``` blocks.
-"""
-
-    result = subprocess.run(
-        f'gh copilot -p "{prompt}"',
-        shell=True,
-        capture_output=True,
-        text=True,
-    )
-
-    sql_match = re.search(r"```sql\s*([\s\S]*?)\s*```", result.stdout)
-
-    if sql_match:
-        sql = sql_match.group(1).strip()
-        typer.secho(f"\n✓ Extracted SQL:\n{sql}", fg=typer.colors.GREEN)
+    if not should_profile(cprofile):
+        one_shot_query(db_url, query_text, execute, profile, yes, analyze, out)
+        return
 
-        if execute and typer.confirm("▶ Run this query?"):
-            run_sql(db_url, sql, profile)
-    else:
-        typer.secho("⛔ No SQL block found.", fg=typer.colors.RED)
+    with profile_request("cli") as prof:
+        one_shot_query(db_url, query_text, execute, profile, yes, analyze, out)
+    if prof is not None:
+        typer.secho(
+            f"\n⏱ Profile: {prof.wall_ms:.1f} ms wall, "
+            f"{prof.peak_memory_bytes / 1024:.0f} KiB peak, "
+            f"{prof.row_conversion_ms:.1f} ms row conversion -> {prof.profile_path}",
+            fg=typer.colors.CYAN,
+        )
 
 
 if __name__ == "__main__":
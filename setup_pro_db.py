@@ -1,7 +1,7 @@
 import sqlite3
 
-def setup():
-    conn = sqlite3.connect("hospital.db")
+def setup(path="hospital.db"):
+    conn = sqlite3.connect(path)
     cursor = conn.cursor()
     
     # 1. Clear old data
@@ -67,7 +67,7 @@ def setup():
     
     conn.commit()
     conn.close()
-    print("✅ hospital.db boosted with 4 tables and relational data!")
+    print(f"✅ {path} boosted with 4 tables and relational data!")
 
 if __name__ == "__main__":
     setup()
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from core.export import ParquetWriter
+
+
+def write_parquet(path, columns, *chunks):
+    writer = ParquetWriter(path)
+    writer.start(columns)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    return pq.read_table(path)
+
+
+def test_parquet_keeps_decimal_and_timestamp_types(tmp_path):
+    table = write_parquet(
+        tmp_path / "out.parquet",
+        ["amount", "created_at", "day"],
+        [(Decimal("12.34"), datetime(2025, 1, 2, 3, 4, 5), date(2025, 1, 2))],
+        [(Decimal("1500.5"), datetime(2025, 2, 1), date(2025, 2, 1))],
+    )
+
+    assert pa.types.is_decimal(table.schema.field("amount").type)
+    assert table.schema.field("created_at").type == pa.timestamp("us")
+    assert table.schema.field("day").type == pa.date32()
+    assert table.column("amount").to_pylist() == [Decimal("12.34"), Decimal("1500.50")]
+    assert table.column("created_at").to_pylist()[0] == datetime(2025, 1, 2, 3, 4, 5)
+
+
+def test_parquet_widens_integers_instead_of_truncating(tmp_path):
+    table = write_parquet(tmp_path / "out.parquet", ["v"], [(1500,)], [(1500.5,), (2.25,)])
+
+    assert table.schema.field("v").type == pa.float64()
+    assert table.column("v").to_pylist() == [1500.0, 1500.5, 2.25]